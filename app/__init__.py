@@ -1,5 +1,4 @@
 from datetime import datetime, timedelta
-import time
 import os
 import hashlib
 from flask import Flask, request, jsonify, send_from_directory
@@ -118,15 +117,21 @@ def call_api_on_start():
         url = "http://localhost:5000/mail/send" 
         requests.post(url, json={"recipients":[get_env_variable("MAIL_RECIPIENTS")], "subject":"项目的测试邮件", "body":"<h1>测试邮件</h1>"})
 
+def send_rss_digest():
+    """调用 /trigger 发送当天的 RSS 邮件"""
+    url = "http://localhost:5000/trigger" 
+    formatted_time = datetime.now().strftime("%Y-%m-%d %H:%M")
+    print("开始发送 RSS 邮件 " + formatted_time)
+    requests.post(url, json={"modelType": "deepseek", "recipients":[get_env_variable("MAIL_RECIPIENTS")], "subject":formatted_time + " RSS"})
+
 def call_api_timed():
+    """
+    启动RSS调度器：按每个订阅源的发布频率持续抓取，并在每天固定时间发送 RSS 邮件
+    空闲时用模型重新摘要抽取式摘要的条目
+    """
     print("定时任务启动")
-    while True:
-        now = datetime.now()
-        url = "http://localhost:5000/trigger" 
-        current_time = datetime.now()
-        formatted_time = current_time.strftime("%Y-%m-%d %H:%M")
-        if now.hour == 8:
-            print("开始发送 RSS 邮件 " + formatted_time)
-            requests.post(url, json={"modelType": "deepseek", "recipients":[get_env_variable("MAIL_RECIPIENTS")], "subject":formatted_time + " RSS"})
-        time.sleep(1800)
-
+    from src.core.models.scheduler import feed_scheduler, SCHEDULER_DIGEST_HOUR
+    from src.core.models.rss import resummarize_extractive, RESUMMARY_INTERVAL
+    feed_scheduler.add_daily_job(SCHEDULER_DIGEST_HOUR, send_rss_digest)
+    feed_scheduler.add_idle_job(RESUMMARY_INTERVAL, resummarize_extractive)
+    feed_scheduler.run_forever()
@@ -1,11 +1,15 @@
 from flask import Blueprint, request, jsonify
-from src.core.models.rss import output_rss, search_rss_feeds, get_all_rss_feeds, parse_rss
+from src.core.models.rss import output_rss, search_rss_feeds, get_all_rss_feeds, get_ingest_stats
+from src.core.models.probe import probe_feed
+from src.core.models.scheduler import feed_scheduler
+from src.core.models.opml import OPMLImporter
 from src.core.storage.rss_storage import RSSStorage
 from datetime import datetime
 from bson.objectid import ObjectId
 
 rss_bp = Blueprint("rss", __name__, url_prefix="/rss")
 rss_storage = RSSStorage()
+opml_importer = OPMLImporter(rss_storage.mongo_storage)
 
 @rss_bp.route('/story', methods=['POST'])
 def get_story_rss():
@@ -31,21 +35,26 @@ def get_all_rss():
     date = request.args.get('date') or None
     preference = request.args.get('preference')  # 添加喜好状态筛选参数：liked/disliked/unmarked/recommended/all
     source_id = request.args.get('source_id')  # 添加订阅源筛选参数
+    start_date = request.args.get('start_date') or None  # 日期范围筛选参数
+    end_date = request.args.get('end_date') or None
+    before = request.args.get('before') or None  # 游标分页参数：上一页返回的 next_cursor
+    after = request.args.get('after') or None  # 上一页返回的 prev_cursor，向更新的条目翻页
     if date and date == "all":
         date = None
 
     # 验证日期格式
-    if date :
-        try:
-            # 验证日期格式是否为 YYYY-MM-DD
-            datetime.strptime(date, '%Y-%m-%d')
-        except ValueError:
-            return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD'}), 400
+    for value in (date, start_date, end_date):
+        if value:
+            try:
+                # 验证日期格式是否为 YYYY-MM-DD
+                datetime.strptime(value, '%Y-%m-%d')
+            except ValueError:
+                return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD'}), 400
     
     # 如果提供了source_id，先获取对应的URL
     source_url = None
-    # 获取RSSStorage实例，确保使用同一实例进行操作
-    storage = RSSStorage()
+    # 使用模块级的RSSStorage实例，连接在进程内共享
+    storage = rss_storage
     
     if source_id:
         try:
@@ -73,85 +82,24 @@ def get_all_rss():
             # 如果导入失败，继续使用默认排序
             pass
     
-    # 根据参数获取数据
-    if date :
-        # 按指定日期筛选
-        feeds = storage.get_all_feeds(limit, date)
-    else:
-        # 获取所有数据按日期排序
-        feeds = storage.get_all_feeds(limit)
-    
-    # 确保包含喜好信息
-    # 获取所有喜好数据
-    preferences = {pref["feed_id"]: pref for pref in storage.mongo_storage.get_all_preferences()}
-
-    # 为每个结果添加喜好信息（确保结构完整）
-    if 'ids' in feeds and feeds['ids'] and len(feeds['ids']) > 0 and isinstance(feeds['ids'][0], list):
-        for i, doc_id in enumerate(feeds['ids'][0]):
-            # 获取当前文档的喜好信息
-            pref = preferences.get(doc_id, None)
-            
-            # 添加喜好信息到元数据
-            if 'metadatas' in feeds and feeds['metadatas'] and i < len(feeds['metadatas'][0]):
-                feeds['metadatas'][0][i]['user_preference'] = pref
-        
-        # 按发布日期排序（如果还没排序）
-        if 'metadatas' in feeds and feeds['metadatas'] and len(feeds['metadatas'][0]) > 0:
-            items = []
-            for i in range(len(feeds['ids'][0])):
-                item = {
-                    'metadata': feeds['metadatas'][0][i] if 'metadatas' in feeds and feeds['metadatas'] else {}
-                }
-                items.append(item)
-            
-            # 按发布日期排序
-            def sort_key(item):
-                try:
-                    metadata = item['metadata']
-                    if 'published' in metadata:
-                        try:
-                            return datetime.strptime(metadata['published'], '%a, %d %b %Y %H:%M:%S %z')
-                        except ValueError:
-                            try:
-                                return datetime.strptime(metadata['published'], '%Y-%m-%d %H:%M:%S')
-                            except ValueError:
-                                return datetime.strptime(metadata['published'], '%Y-%m-%d')
-                except (ValueError, TypeError):
-                    pass
-                return datetime(1970, 1, 1)  # 默认日期为早期时间
-            
-            # 从新到旧排序 (降序)
-            items.sort(key=sort_key, reverse=True)
-            # 根据喜好状态筛选
-            if preference:
-                filtered_items = []
-                for item in items:
-                    pref = item['metadata'].get('user_preference')
-                    
-                    if preference == 'liked' and pref and pref.get('is_liked'):
-                        filtered_items.append(item)
-                    elif preference == 'disliked' and pref and not pref.get('is_liked'):
-                        filtered_items.append(item)
-                    elif preference == 'unmarked' and not pref:
-                        filtered_items.append(item)
-                    elif preference == 'all':
-                        filtered_items.append(item)
-                
-                items = filtered_items
+    # 根据参数从条目目录读取一页数据，日期、订阅源和喜好状态条件都在 Mongo 索引中过滤
+    try:
+        feeds = storage.get_all_feeds(
+            limit, date, start_date, end_date,
+            source_id=source_id, preference=preference, before=before, after=after
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-            # 根据订阅源筛选
-            if source_url:
-                items = [item for item in items if item['metadata'].get('source') == source_url]
-            
-            # 重构结果
-            feeds = {
-                'ids': [feeds['ids'][0]] if 'ids' in feeds else [[]],
-                'documents': [feeds['documents'][0]] if 'documents' in feeds else [[]],
-                'metadatas': [[item['metadata'] for item in items]] if 'metadatas' in feeds else None
-            }
-    
     return feeds
 
+@rss_bp.route('/stats', methods=['GET'])
+def get_stats():
+    """
+    获取抓取和摘要相关的统计信息
+    """
+    return jsonify(get_ingest_stats())
+
 @rss_bp.route('/preference', methods=['POST'])
 def store_preference():
     data = request.get_json()
@@ -172,10 +120,25 @@ def store_preference():
 def get_dates_with_data():
     """
     获取所有有RSS数据的日期列表
+    可选参数 source_id: 只统计该订阅源的条目
     """
-    dates = rss_storage.get_dates_with_data()
+    dates = rss_storage.get_dates_with_data(request.args.get('source_id') or None)
     return jsonify(dates)
 
+@rss_bp.route('/feeds/<feed_id>', methods=['DELETE'])
+def delete_feed(feed_id):
+    """
+    删除已存储的RSS条目，同时更新条目目录和日期统计
+    """
+    try:
+        deleted = rss_storage.delete_feeds([feed_id])
+        if deleted:
+            return jsonify({'success': True, 'message': 'Feed deleted'})
+        else:
+            return jsonify({'error': 'Feed not found'}), 404
+    except Exception as e:
+        return jsonify({'error': f'Failed to delete feed: {str(e)}'}), 500
+
 # 新增的RSS源管理相关API
 @rss_bp.route('/sources', methods=['GET'])
 def get_sources():
@@ -185,6 +148,34 @@ def get_sources():
     sources = rss_storage.mongo_storage.get_all_rss_sources()
     return jsonify(sources)
 
+@rss_bp.route('/sources/stats', methods=['GET'])
+def get_sources_stats():
+    """
+    获取每个RSS订阅源的条件请求统计（304次数、节省的字节数和时间）
+    """
+    stats = rss_storage.mongo_storage.get_rss_fetch_stats()
+    return jsonify(stats)
+
+@rss_bp.route('/sources/health', methods=['GET'])
+def get_sources_health():
+    """
+    获取每个RSS订阅源的健康状态（连续失败次数、最近错误、耗时和熔断状态）
+    """
+    health = rss_storage.mongo_storage.get_rss_sources_health()
+    return jsonify(health)
+
+@rss_bp.route('/sources/probe', methods=['POST'])
+def probe_source():
+    """
+    探测RSS订阅源，只抓取和解析feed并返回元数据
+    """
+    data = request.get_json()
+    # 验证参数
+    if not data or 'url' not in data:
+        return jsonify({'error': 'Missing URL parameter'}), 400
+    
+    return jsonify(probe_feed(data['url']))
+
 @rss_bp.route('/sources', methods=['POST'])
 def add_source():
     """
@@ -198,22 +189,60 @@ def add_source():
     url = data['url']
     name = data.get('name', '')
     
-    # 验证URL并尝试解析RSS
+    # 只探测feed是否有效，不在请求中做摘要
+    probe = probe_feed(url)
+    if not probe['ok']:
+        return jsonify({'error': f"Invalid RSS feed or no entries found: {probe['error']}"}), 400
+    
+    # 如果没有提供名称，使用feed的标题作为源名称
+    if not name:
+        name = probe['title'] or f"Feed from {url}"
+    
+    # 存储RSS源，摘要交给后台抓取流程
+    result = rss_storage.mongo_storage.add_rss_source(url, name)
+    feed_scheduler.schedule_now(result['_id'])
+    return jsonify(result)
+
+@rss_bp.route('/sources/import', methods=['POST'])
+def import_sources():
+    """
+    通过 OPML 批量导入RSS订阅源
+    支持上传文件(file)、JSON 中的 opml 字段或直接提交 OPML 文本；
+    传入 job_id 时继续之前中断的导入任务
+    导入在后台执行，立即返回 job_id，通过 /rss/sources/import/<job_id> 查询进度和报告
+    """
+    job_id = request.args.get('job_id')
+    content = None
+    if not job_id:
+        if 'file' in request.files:
+            content = request.files['file'].read()
+        elif request.is_json:
+            content = (request.get_json() or {}).get('opml')
+        else:
+            content = request.get_data()
+        if not content:
+            return jsonify({'error': 'Missing OPML content'}), 400
+    
     try:
-        # 尝试解析RSS，如果成功则添加源
-        entries = parse_rss(url)
-        if not entries:
-            return jsonify({'error': 'Invalid RSS feed or no entries found'}), 400
-        
-        # 如果没有提供名称，使用第一个条目的标题作为源名称
-        if not name and entries:
-            name = f"Feed from {url}"
-        
-        # 存储RSS源
-        result = rss_storage.mongo_storage.add_rss_source(url, name)
-        return jsonify(result)
+        job_id = opml_importer.start_import(content, job_id)
     except Exception as e:
-        return jsonify({'error': f'Failed to parse RSS: {str(e)}'}), 400
+        return jsonify({'error': f'Failed to import OPML: {str(e)}'}), 400
+    if not job_id:
+        return jsonify({'error': 'Import job not found'}), 404
+    return jsonify({'job_id': job_id, 'status': 'running'}), 202
+
+@rss_bp.route('/sources/import/<job_id>', methods=['GET'])
+def get_import_report(job_id):
+    """
+    获取 OPML 导入报告
+    """
+    try:
+        report = opml_importer.report(job_id)
+    except Exception as e:
+        return jsonify({'error': f'Invalid job_id: {str(e)}'}), 400
+    if not report:
+        return jsonify({'error': 'Import job not found'}), 404
+    return jsonify(report)
 
 @rss_bp.route('/sources/<source_id>', methods=['DELETE'])
 def delete_source(source_id):
@@ -247,19 +276,18 @@ def update_source(source_id):
     if not url and not name:
         return jsonify({'error': 'At least one field (url or name) is required for update'}), 400
     try:
-        # 如果提供了新的URL，验证URL是否有效
+        # 如果提供了新的URL，探测URL是否有效
         if url:
-            try:
-                # 尝试解析RSS，验证URL有效性
-                entries = parse_rss(url)
-                if not entries:
-                    return jsonify({'error': 'Invalid RSS feed or no entries found'}), 400
-            except Exception as e:
-                return jsonify({'error': f'Failed to parse RSS: {str(e)}'}), 400
+            probe = probe_feed(url)
+            if not probe['ok']:
+                return jsonify({'error': f"Invalid RSS feed or no entries found: {probe['error']}"}), 400
         
         # 更新RSS源
         result = rss_storage.mongo_storage.update_rss_source(source_id, url, name)
         if result:
+            if url:
+                # 新URL的摘要交给后台抓取流程
+                feed_scheduler.schedule_now(source_id)
             return jsonify({'success': True, 'message': 'RSS source updated', 'data': result})
         else:
             return jsonify({'error': 'RSS source not found'}), 404
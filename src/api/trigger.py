@@ -1,8 +1,10 @@
 from flask import Blueprint, request, jsonify
 from src.core.utils.config import RSS_SYSTEM_PROMPT, get_env_variable
 from src.core.models.chat import AIChat
-from src.core.models.email import send_email
-from src.core.models.rss import output_rss
+from src.core.models.llm_gateway import BATCH
+from src.core.models.email import send_email, SEND_SUCCESS_MESSAGE
+from src.core.models.rss import rss_storage
+from datetime import datetime, timedelta
 
 trigger_bp = Blueprint("trigger", __name__, url_prefix="/trigger")
 
@@ -10,13 +12,26 @@ trigger_bp = Blueprint("trigger", __name__, url_prefix="/trigger")
 def get_trigger():
     data = request.get_json()
     
-    outputRss = output_rss()
+    # 调度器持续抓取和存储，这里不再全量抓取，只从条目目录读取上次发送之后新存储的条目
+    sent_until = datetime.now()
+    since = rss_storage.mongo_storage.get_digest_watermark() or sent_until - timedelta(days=1)
+    outputRss = {}
+    for metadata in rss_storage.get_feeds_stored_between(since, sent_until):
+        outputRss.setdefault(metadata.get('source'), []).append({
+            'title': metadata.get('title'),
+            'link': metadata.get('link'),
+            'summary': metadata.get('summary'),
+            'published': metadata.get('published'),
+        })
     
+    if not outputRss:
+        return jsonify({"message": "no new feeds"})
+
     body = ""
+    # 所有订阅源共用一个实例，邮件汇总走网关的批处理通道，不影响在线聊天
+    aiChat = AIChat(data.get('modelType'), system_prompt=RSS_SYSTEM_PROMPT, lane=BATCH)
     
     for value in outputRss.values():
-        modelType = data.get('modelType')
-        aiChat = AIChat(modelType, system_prompt=RSS_SYSTEM_PROMPT)
         s = str(value)
         aiResponse = aiChat.get_response(s)
         
@@ -35,6 +50,8 @@ def get_trigger():
             return jsonify({"error": "Missing recipients, subject, or body"}), 400
 
     if get_env_variable("TIMED_SEND_MAIL") == "True": 
-        send_email(subject, recipients, body)
+        # 发送成功后才推进位置，发送失败或未发送的条目下次仍会包含
+        if send_email(subject, recipients, body) == SEND_SUCCESS_MESSAGE:
+            rss_storage.mongo_storage.set_digest_watermark(sent_until)
     
     return jsonify({"message": "success"})
@@ -82,86 +82,38 @@ async def call_streaming_model(model_type: str, user_input: str, history=None, s
     logger.info(f"系统提示: {system_prompt[:100] if system_prompt else 'None'}")
     logger.info(f"历史记录: {len(history) if history else 0} 条消息")
     
-    # 这里需要实现具体模型的流式API调用
-    # 以下是示例实现，实际需要根据您使用的模型进行适配
     try:
-        # 检查模型类型并使用相应的API
-        if model_type.lower() == 'deepseek':
-            # 使用DeepSeek模型API
-            from src.core.models.deepseek import get_deepseek_streaming_response
-            
-            logger.info("使用DeepSeek模型进行流式响应")
-            
-            # 确保历史记录格式正确
-            formatted_history = history
-            if history and isinstance(history, list):
-                # 已经是正确格式，无需转换
-                pass
-            
-            # 直接传递所有参数
-            chunk_count = 0
-            total_size = 0
-            
-            try:
-                async for chunk in get_deepseek_streaming_response(user_input, formatted_history, system_prompt):
-                    if chunk and chunk.strip():  # 确保不返回空块
-                        chunk_count += 1
-                        total_size += len(chunk)
-                        yield chunk
-                
-                logger.info(f"DeepSeek流式响应完成: 共返回{chunk_count}个块, 总大小={total_size}字节")
-            except Exception as e:
-                error = f"DeepSeek流式处理错误: {str(e)}"
-                logger.error(f"DeepSeek流式处理失败: {str(e)}", exc_info=True)
-                yield error
-                
-        elif model_type.lower() == 'openai':
-            # 示例：使用OpenAI API
-            from openai import AsyncOpenAI
-            
-            logger.info("使用OpenAI模型进行流式响应")
-            
-            client = AsyncOpenAI(api_key=get_env_variable("OPENAI_API_KEY"))
-            
-            # 格式化历史记录
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            
-            if history:
-                for msg in history:
-                    if msg["role"] in ["user", "assistant", "system"]:
-                        messages.append({"role": msg["role"], "content": msg["content"]})
-            
-            messages.append({"role": "user", "content": user_input})
-            
-            logger.info(f"OpenAI请求消息数量: {len(messages)}")
-            
-            # 创建流式完成
-            logger.info("开始创建OpenAI流式完成")
-            stream = await client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                stream=True
-            )
-            
-            # 返回流式响应
-            chunk_count = 0
-            total_size = 0
-            
-            async for chunk in stream:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    content = chunk.choices[0].delta.content
-                    chunk_count += 1
-                    total_size += len(content)
-                    logger.info(f"收到OpenAI响应块 #{chunk_count}: 大小={len(content)}, 内容={content}")
-                    yield content
-            
-            logger.info(f"OpenAI流式响应完成: 共返回{chunk_count}个块, 总大小={total_size}字节")
-        else:
+        from src.core.models.model_router import model_router, PROVIDERS
+        
+        provider = model_type.lower()
+        if provider not in PROVIDERS:
             # 不支持的模型类型
             logger.warning(f"不支持的模型类型: {model_type}")
-            yield f"不支持的模型类型: {model_type}，请使用 deepseek 或 openai"
+            yield f"不支持的模型类型: {model_type}，请使用 {' 或 '.join(PROVIDERS)}"
+            return
+        
+        # 格式化历史记录
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        
+        if history:
+            for msg in history:
+                if msg["role"] in ["user", "assistant"]:
+                    messages.append({"role": msg["role"], "content": msg["content"]})
+        
+        messages.append({"role": "user", "content": user_input})
+        
+        # 首选模型迟迟没有输出时，路由会对冲请求其他已配置的模型
+        chunk_count = 0
+        total_size = 0
+        async for chunk in model_router.stream(provider, messages):
+            if chunk and chunk.strip():  # 确保不返回空块
+                chunk_count += 1
+                total_size += len(chunk)
+                yield chunk
+        
+        logger.info(f"流式响应完成: 共返回{chunk_count}个块, 总大小={total_size}字节")
     except Exception as e:
         error_message = f"流式模型调用错误: {str(e)}"
         logger.error(f"流式模型调用失败: {str(e)}", exc_info=True)
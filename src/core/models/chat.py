@@ -3,15 +3,16 @@ import time
 from typing import Literal
 
 from src.core.langchain.ollama import ChatManager
-from src.core.utils.config import get_env_variable
+from src.core.models.llm_gateway import llm_gateway, INTERACTIVE
 # from cozepy import COZE_CN_BASE_URL
 # from cozepy import Coze, TokenAuth, Message, ChatStatus
-from openai import OpenAI
 class AIChat:
-    def __init__(self, modelType: Literal["ollama", "coze", "deepseek"], system_prompt=""):
+    def __init__(self, modelType: Literal["ollama", "coze", "deepseek"], system_prompt="", lane=INTERACTIVE):
         self.modelType = modelType
         self.history = []
         self.system_prompt = system_prompt
+        # 网关优先级通道：聊天使用 interactive，后台摘要使用 batch
+        self.lane = lane
 
     def add_history(self, user_message, ai_response):
         self.history.append({"user": user_message, "ai": ai_response})
@@ -112,18 +113,18 @@ class AIChat:
     #     return answer
     
     def _deepseek_generate(self, user_input):
-        client = OpenAI(api_key=get_env_variable("DEEPSEEK_KEY"), base_url="https://api.deepseek.com")
-        response = client.chat.completions.create(
-            model="deepseek-reasoner",
-            messages=[
+        # 通过网关使用共享的连接池、限流和重试
+        content = llm_gateway.chat(
+            "deepseek",
+            [
                 {"role": "system", "content": self.system_prompt},
                 {"role": "user", "content": user_input},
             ],
-            stream=False,
+            model="deepseek-reasoner",
+            lane=self.lane,
             max_tokens=4096,
             temperature=0.7
         )
-        content = response.choices[0].message.content
         
         # 使用正则表达式去除开头的 ```json 和结尾的 ```
         content = re.sub(r'^```json\s*', '', content)  # 移除开头的 ```json
@@ -131,6 +132,30 @@ class AIChat:
             
         return content
     
+    def stream_response(self, user_input):
+        """
+        以生成器方式逐段返回模型输出
+        deepseek 使用流式接口，其他模型一次性返回完整输出
+        """
+        if self.modelType == "deepseek":
+            yield from self._deepseek_stream(user_input)
+        else:
+            response = self.get_response(user_input)
+            yield response.get("response", "") if isinstance(response, dict) else response
+
+    def _deepseek_stream(self, user_input):
+        yield from llm_gateway.stream_chat(
+            "deepseek",
+            [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": user_input},
+            ],
+            model="deepseek-reasoner",
+            lane=self.lane,
+            max_tokens=4096,
+            temperature=0.7
+        )
+    
     def _generate_prompt(self, user_input):
         context = ["你是一个聊天机器人，正在与一个用户进行对话。"]
         for item in self.history:
@@ -2,6 +2,8 @@ from flask_mail import Message
 from app.extensions import mail
 from src.core.utils.config import get_env_variable
 
+SEND_SUCCESS_MESSAGE = '邮件发送成功！'
+
 def send_email(subject, recipients,  html):
     msg = Message(
         subject=subject,
@@ -11,6 +13,6 @@ def send_email(subject, recipients,  html):
     )
     try:
         mail.send(msg)
-        return '邮件发送成功！'
+        return SEND_SUCCESS_MESSAGE
     except Exception as e:
         return f'邮件发送失败：{str(e)}'
@@ -0,0 +1,110 @@
+"""
+抽取式摘要
+
+LLM 不可用、超时或显式选择快速模式时，在本地用 TF-IDF 给句子打分，
+选出与全文及标题最相近的几句作为摘要，只依赖 NumPy，每条在毫秒级完成。
+生成的条目标记为 summary_mode=extractive，之后由后台任务交给 LLM 重新摘要。
+"""
+import re
+import numpy as np
+from src.core.utils.config import get_env_variable
+from src.core.utils.content_reducer import truncate_to_tokens
+from src.core.utils.tokens import estimate_tokens, text_features
+
+# 摘要最多选取的句子数
+EXTRACTIVE_MAX_SENTENCES = int(get_env_variable("RSS_EXTRACTIVE_MAX_SENTENCES", "3"))
+# 摘要的 token 上限
+EXTRACTIVE_MAX_TOKENS = int(get_env_variable("RSS_EXTRACTIVE_MAX_TOKENS", "150"))
+
+# 按中英文句末标点断句
+SENTENCE_PATTERN = re.compile(r"[^。！？!?；;\n]+?(?:[。！？!?；;]+|\.(?=\s)|(?=\n)|$)")
+# 过短的句子（如“图片”“更新”）不参与打分
+MIN_SENTENCE_CHARS = 8
+# 标题特征的额外权重
+TITLE_WEIGHT = 2.0
+# 新闻类文章开头的句子通常更重要，按位置给予加成
+POSITION_WEIGHT = 0.3
+
+
+def split_sentences(text):
+    """把正文切分成句子"""
+    sentences = (match.group().strip() for match in SENTENCE_PATTERN.finditer(text or ""))
+    return [sentence for sentence in sentences if len(sentence) >= MIN_SENTENCE_CHARS]
+
+
+def _join(sentences):
+    """中文句子直接拼接，其他句子之间加空格"""
+    text = ""
+    for sentence in sentences:
+        if text and not text.endswith(("。", "！", "？", "；")):
+            text += " "
+        text += sentence
+    return text
+
+
+def extractive_summary(text, title="", max_sentences=EXTRACTIVE_MAX_SENTENCES, max_tokens=EXTRACTIVE_MAX_TOKENS):
+    """
+    从正文中抽取摘要
+    text: 纯文本正文
+    title: 标题，与标题相近的句子得分更高
+    返回: 按原文顺序拼接的摘要
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return truncate_to_tokens(_join(sentences) or (text or "").strip(), max_tokens)
+
+    features = [text_features(sentence) for sentence in sentences]
+    vocabulary = {}
+    for sentence_features in features:
+        for feature in sentence_features:
+            vocabulary.setdefault(feature, len(vocabulary))
+    if not vocabulary:
+        return truncate_to_tokens(_join(sentences[:max_sentences]), max_tokens)
+
+    # 句子 × 词 的词频矩阵
+    counts = np.zeros((len(sentences), len(vocabulary)))
+    for row, sentence_features in enumerate(features):
+        for feature in sentence_features:
+            counts[row, vocabulary[feature]] += 1
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    tfidf = counts * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors = tfidf / norms
+
+    # 全文中心向量加上标题向量，句子与其余弦相似度作为得分
+    centroid = vectors.sum(axis=0)
+    for feature in text_features(title or ""):
+        if feature in vocabulary:
+            centroid[vocabulary[feature]] += TITLE_WEIGHT * idf[vocabulary[feature]]
+    centroid_norm = np.linalg.norm(centroid) or 1
+    scores = vectors @ centroid / centroid_norm
+    scores *= 1 + POSITION_WEIGHT / (1 + np.arange(len(sentences)))
+
+    selected = sorted(np.argsort(-scores)[:max_sentences])
+    summary = []
+    used_tokens = 0
+    for index in selected:
+        sentence = sentences[index]
+        sentence_tokens = estimate_tokens(sentence)
+        if summary and used_tokens + sentence_tokens > max_tokens:
+            break
+        summary.append(sentence)
+        used_tokens += sentence_tokens
+    return truncate_to_tokens(_join(summary), max_tokens)
+
+
+def summarize_extractive(entry):
+    """
+    为精简后的条目生成与 LLM 输出格式一致的结果
+    entry: reduce_entry 返回的 {"title", "link", "summary"}
+    返回: {"AITitle", "AISummary", "link", "summary_mode"}
+    """
+    return {
+        "AITitle": entry.get("title"),
+        "AISummary": extractive_summary(entry.get("summary"), entry.get("title")),
+        "link": entry.get("link"),
+        "summary_mode": "extractive",
+    }
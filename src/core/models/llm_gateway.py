@@ -0,0 +1,392 @@
+"""
+LLM 调用网关
+
+进程内所有模型调用共用的入口：
+- 每个服务商一个带连接池的客户端，复用 HTTP 连接
+- 请求数和 token 数两个令牌桶限流
+- 全局并发上限，分为交互和批处理两个优先级通道
+- 遇到 429、5xx 和网络错误时按带抖动的指数退避重试，优先遵循 Retry-After
+
+交互通道（聊天）预留一部分并发名额和限流配额，批处理通道（RSS 摘要、邮件汇总）
+只能使用其余部分；交互通道空闲一段时间后，批处理可以借用预留名额，但始终留出一个。
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+from openai import APIConnectionError, APITimeoutError, APIStatusError, RateLimitError, InternalServerError
+from src.core.utils.config import get_env_variable
+from src.core.utils.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = {
+    "deepseek": {"api_key": "DEEPSEEK_KEY", "base_url": "https://api.deepseek.com"},
+    "openai": {"api_key": "OPENAI_API_KEY", "base_url": None},
+}
+
+# 同时进行的模型请求数上限
+LLM_MAX_CONCURRENCY = int(get_env_variable("LLM_MAX_CONCURRENCY", "8"))
+# 为交互通道预留的并发数
+LLM_INTERACTIVE_RESERVED = int(get_env_variable("LLM_INTERACTIVE_RESERVED", "2"))
+# 交互通道空闲多久后批处理可以借用预留名额（秒）
+LLM_INTERACTIVE_IDLE_SECONDS = float(get_env_variable("LLM_INTERACTIVE_IDLE_SECONDS", "60"))
+# 每分钟请求数和 token 数上限
+LLM_REQUESTS_PER_MINUTE = int(get_env_variable("LLM_REQUESTS_PER_MINUTE", "60"))
+LLM_TOKENS_PER_MINUTE = int(get_env_variable("LLM_TOKENS_PER_MINUTE", "300000"))
+# 重试次数和退避时间（秒）
+LLM_MAX_RETRIES = int(get_env_variable("LLM_MAX_RETRIES", "4"))
+LLM_RETRY_BASE_DELAY = float(get_env_variable("LLM_RETRY_BASE_DELAY", "1"))
+LLM_RETRY_MAX_DELAY = float(get_env_variable("LLM_RETRY_MAX_DELAY", "30"))
+# 单次请求超时（秒），deepseek-reasoner 的长输出需要较长时间
+LLM_TIMEOUT = float(get_env_variable("LLM_TIMEOUT", "300"))
+
+# 未指定 max_tokens 时为输出预留的 token 数
+DEFAULT_OUTPUT_TOKENS = 1024
+# 等待并发名额时的轮询间隔（秒）
+SLOT_POLL_INTERVAL = 0.05
+# 批处理等待限流配额时的最长单次等待（秒）
+QUOTA_POLL_MAX = 1.0
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+RETRYABLE_ERRORS = (RateLimitError, InternalServerError, APIConnectionError, APITimeoutError)
+
+
+def _close_created_stream(future):
+    """关闭调用方已放弃的流式响应"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class TokenBucket:
+    """
+    令牌桶，允许预支：取令牌时直接扣减，余额为负时返回需要等待的秒数，
+    同步和异步调用方各自按返回值等待
+    """
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount):
+        """取走 amount 个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= min(amount, self.capacity)
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def take(self, amount, floor=0.0):
+        """
+        扣减后余额不低于 floor 时取走令牌并返回 0，否则不取，返回预计需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            amount = min(amount, self.capacity - floor)
+            if self._tokens - amount >= floor:
+                self._tokens -= amount
+                return 0.0
+            return (floor + amount - self._tokens) / self.rate
+
+    def refund(self, amount):
+        """归还多预留的令牌"""
+        if amount <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class LaneScheduler:
+    """按通道分配并发名额"""
+    def __init__(self, total, reserved, idle_seconds):
+        self.total = max(1, total)
+        self.reserved = min(max(0, reserved), self.total - 1)
+        self.idle_seconds = idle_seconds
+        self._cond = threading.Condition()
+        self._active = {lane: 0 for lane in LANES}
+        self._waiting = {lane: 0 for lane in LANES}
+        self._stats = {lane: {"acquired": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0} for lane in LANES}
+        self._interactive_idle_since = time.monotonic()
+
+    def _can_run(self, lane):
+        if sum(self._active.values()) >= self.total:
+            return False
+        if lane == INTERACTIVE:
+            return True
+        # 有交互请求排队时批处理让行
+        if self._waiting[INTERACTIVE]:
+            return False
+        limit = self.total - self.reserved
+        interactive_idle = (self._active[INTERACTIVE] == 0
+                            and time.monotonic() - self._interactive_idle_since >= self.idle_seconds)
+        if interactive_idle:
+            limit = self.total - 1
+        return self._active[BATCH] < limit
+
+    def _start(self, lane):
+        self._active[lane] += 1
+        self._stats[lane]["acquired"] += 1
+
+    def acquire(self, lane):
+        """阻塞等待名额"""
+        with self._cond:
+            self._waiting[lane] += 1
+            try:
+                # 定时醒来，交互通道空闲超时后批处理可以借用名额
+                while not self._can_run(lane):
+                    self._cond.wait(timeout=1.0)
+            finally:
+                self._waiting[lane] -= 1
+            self._start(lane)
+
+    async def acquire_async(self, lane):
+        """异步等待名额，不阻塞事件循环"""
+        with self._cond:
+            self._waiting[lane] += 1
+        try:
+            while True:
+                with self._cond:
+                    if self._can_run(lane):
+                        self._start(lane)
+                        return
+                await asyncio.sleep(SLOT_POLL_INTERVAL)
+        finally:
+            with self._cond:
+                self._waiting[lane] -= 1
+
+    def release(self, lane):
+        with self._cond:
+            self._active[lane] -= 1
+            if lane == INTERACTIVE and self._active[INTERACTIVE] == 0:
+                self._interactive_idle_since = time.monotonic()
+            self._cond.notify_all()
+
+    def record_wait(self, lane, seconds):
+        with self._cond:
+            stats = self._stats[lane]
+            stats["wait_seconds"] += seconds
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], seconds)
+
+    def stats(self):
+        with self._cond:
+            lanes = {}
+            for lane in LANES:
+                stats = self._stats[lane]
+                lanes[lane] = {
+                    "active": self._active[lane],
+                    "queued": self._waiting[lane],
+                    "acquired": stats["acquired"],
+                    "avg_wait_seconds": round(stats["wait_seconds"] / stats["acquired"], 3) if stats["acquired"] else None,
+                    "max_wait_seconds": round(stats["max_wait_seconds"], 3),
+                }
+            return lanes
+
+
+class LLMGateway:
+    def __init__(self,
+                 max_concurrency=LLM_MAX_CONCURRENCY,
+                 requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+                 interactive_reserved=LLM_INTERACTIVE_RESERVED):
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        self._lanes = LaneScheduler(max_concurrency, interactive_reserved, LLM_INTERACTIVE_IDLE_SECONDS)
+        # 批处理通道只能使用限流配额中不属于交互通道的部分
+        self._interactive_share = self._lanes.reserved / self._lanes.total
+        self._request_bucket = TokenBucket(requests_per_minute)
+        self._token_bucket = TokenBucket(tokens_per_minute)
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "failures": 0}
+
+    def client(self, provider):
+        """获取服务商的共享客户端，首次使用时创建"""
+        with self._clients_lock:
+            client = self._clients.get(provider)
+            if client is None:
+                config = PROVIDERS[provider]
+                client = OpenAI(
+                    api_key=get_env_variable(config["api_key"]),
+                    base_url=config["base_url"],
+                    # 重试由网关统一处理
+                    max_retries=0,
+                    timeout=LLM_TIMEOUT,
+                    http_client=DefaultHttpxClient(
+                        limits=httpx.Limits(max_connections=LLM_MAX_CONCURRENCY * 2, max_keepalive_connections=LLM_MAX_CONCURRENCY)
+                    ),
+                )
+                self._clients[provider] = client
+        return client
+
+    @staticmethod
+    def _estimate_request_tokens(messages, params):
+        prompt_tokens = sum(estimate_tokens(message.get("content") or "") for message in messages)
+        return prompt_tokens + (params.get("max_tokens") or DEFAULT_OUTPUT_TOKENS)
+
+    def _reserve_interactive_quota(self, tokens):
+        """交互通道直接预支配额，返回需要等待的秒数"""
+        return max(self._request_bucket.reserve(1), self._token_bucket.reserve(tokens))
+
+    def _take_batch_quota(self, tokens):
+        """批处理通道只在不占用交互预留配额时取走配额，返回需要等待的秒数"""
+        wait = self._request_bucket.take(1, self._request_bucket.capacity * self._interactive_share)
+        if wait:
+            return wait
+        wait = self._token_bucket.take(tokens, self._token_bucket.capacity * self._interactive_share)
+        if wait:
+            self._request_bucket.refund(1)
+        return wait
+
+    def _admit(self, lane, messages, params):
+        """
+        等待限流配额和并发名额
+        返回: 预留的 token 数
+        """
+        start_time = time.monotonic()
+        reserved = self._estimate_request_tokens(messages, params)
+        if lane == INTERACTIVE:
+            time.sleep(self._reserve_interactive_quota(reserved))
+        else:
+            while True:
+                wait = self._take_batch_quota(reserved)
+                if not wait:
+                    break
+                time.sleep(min(wait, QUOTA_POLL_MAX))
+        self._lanes.acquire(lane)
+        self._lanes.record_wait(lane, time.monotonic() - start_time)
+        return reserved
+
+    async def _admit_async(self, lane, messages, params):
+        start_time = time.monotonic()
+        reserved = self._estimate_request_tokens(messages, params)
+        if lane == INTERACTIVE:
+            await asyncio.sleep(self._reserve_interactive_quota(reserved))
+        else:
+            while True:
+                wait = self._take_batch_quota(reserved)
+                if not wait:
+                    break
+                await asyncio.sleep(min(wait, QUOTA_POLL_MAX))
+        await self._lanes.acquire_async(lane)
+        self._lanes.record_wait(lane, time.monotonic() - start_time)
+        return reserved
+
+    @staticmethod
+    def _retry_delay(error, attempt):
+        """带抖动的指数退避，服务端返回 Retry-After 时以其为下限"""
+        delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+        if isinstance(error, APIStatusError):
+            retry_after = error.response.headers.get("retry-after")
+            try:
+                delay = max(delay, min(float(retry_after), LLM_RETRY_MAX_DELAY))
+            except (TypeError, ValueError):
+                pass
+        return delay
+
+    def _record(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _create(self, provider, messages, model, stream, params):
+        """在并发名额内发起请求，可重试的错误按退避重试"""
+        attempt = 0
+        while True:
+            self._record("requests")
+            try:
+                return self.client(provider).chat.completions.create(
+                    model=model, messages=messages, stream=stream, **params
+                )
+            except RETRYABLE_ERRORS as e:
+                if attempt >= LLM_MAX_RETRIES:
+                    self._record("failures")
+                    raise
+                delay = self._retry_delay(e, attempt)
+                logger.warning(f"{provider} 请求失败，{delay:.1f} 秒后重试 ({attempt + 1}/{LLM_MAX_RETRIES}): {e}")
+                self._record("retries")
+                time.sleep(delay)
+                attempt += 1
+            except Exception:
+                self._record("failures")
+                raise
+
+    def chat(self, provider, messages, model, lane=INTERACTIVE, **params):
+        """
+        同步调用模型
+        provider: 服务商名称，见 PROVIDERS
+        messages: OpenAI 格式的消息列表
+        lane: 优先级通道，interactive 或 batch
+        返回: 模型输出的文本
+        """
+        reserved = self._admit(lane, messages, params)
+        try:
+            response = self._create(provider, messages, model, False, params)
+        finally:
+            self._lanes.release(lane)
+        usage = getattr(response, "usage", None)
+        if usage and usage.total_tokens:
+            self._token_bucket.refund(reserved - usage.total_tokens)
+        return response.choices[0].message.content
+
+    def stream_chat(self, provider, messages, model, lane=INTERACTIVE, **params):
+        """
+        以流式方式调用模型
+        只在开始输出前重试，输出过程中断时直接抛出异常
+        返回: 生成器，逐段返回模型输出的文本
+        """
+        self._admit(lane, messages, params)
+        try:
+            stream = self._create(provider, messages, model, True, params)
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            self._lanes.release(lane)
+
+    async def astream_chat(self, provider, messages, model, lane=INTERACTIVE, **params):
+        """
+        stream_chat 的异步版本
+        同步客户端在线程中读取，事件循环不被阻塞，不同事件循环之间也能共用连接池
+        被取消时关闭底层的 HTTP 流，连接立即归还连接池
+        """
+        await self._admit_async(lane, messages, params)
+        stream = None
+        try:
+            create = asyncio.ensure_future(asyncio.to_thread(self._create, provider, messages, model, True, params))
+            try:
+                stream = await asyncio.shield(create)
+            except asyncio.CancelledError:
+                # 请求仍在线程中进行，完成后再关闭
+                create.add_done_callback(_close_created_stream)
+                raise
+            iterator = iter(stream)
+            finished = object()
+            while True:
+                chunk = await asyncio.to_thread(next, iterator, finished)
+                if chunk is finished:
+                    break
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            if stream is not None:
+                stream.close()
+            self._lanes.release(lane)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["lanes"] = self._lanes.stats()
+        return stats
+
+
+# 创建单例实例
+llm_gateway = LLMGateway()
@@ -0,0 +1,211 @@
+"""
+流式模型路由
+
+首选模型在阈值时间内没有返回第一个 token 时，向下一个已配置的模型（其他服务商或本地 Ollama）
+发起对冲请求，哪个先开始输出就使用哪个，其余请求立即取消。
+首个 token 耗时（TTFT）按模型分别记录，对冲阈值取最近 TTFT 的 P90 乘以系数，随实际延迟自动调整。
+被对冲取消的慢请求把已等待的时间作为 TTFT 的下限记录，否则只有跑赢的快样本会被记录，
+阈值会越来越低，对冲越来越频繁。
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from src.core.models.llm_gateway import llm_gateway
+from src.core.utils.config import get_env_variable
+
+logger = logging.getLogger(__name__)
+
+# 是否启用对冲请求
+LLM_HEDGE_ENABLED = get_env_variable("LLM_HEDGE_ENABLED", "True") == "True"
+# 参与对冲的模型及顺序，未配置密钥的服务商会被跳过
+LLM_HEDGE_PROVIDERS = [
+    name.strip() for name in get_env_variable("LLM_HEDGE_PROVIDERS", "deepseek,openai").split(",") if name.strip()
+]
+# 样本不足时的对冲阈值，以及阈值的上下限（秒）
+LLM_HEDGE_DELAY = float(get_env_variable("LLM_HEDGE_DELAY", "4"))
+LLM_HEDGE_MIN_DELAY = float(get_env_variable("LLM_HEDGE_MIN_DELAY", "1"))
+LLM_HEDGE_MAX_DELAY = float(get_env_variable("LLM_HEDGE_MAX_DELAY", "15"))
+# 阈值 = P90 TTFT × 系数
+LLM_HEDGE_FACTOR = float(get_env_variable("LLM_HEDGE_FACTOR", "1.5"))
+
+OLLAMA_HOST = get_env_variable("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = get_env_variable("OLLAMA_MODEL", "deepseek-r1:8b")
+
+# 每个模型保留的 TTFT 样本数，以及开始自适应所需的最少样本数
+TTFT_SAMPLES = 50
+MIN_SAMPLES = 5
+
+
+def _percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def _stream_deepseek(messages):
+    async for content in llm_gateway.astream_chat("deepseek", messages, model="deepseek-chat"):
+        yield content
+
+
+async def _stream_openai(messages):
+    async for content in llm_gateway.astream_chat("openai", messages, model="gpt-3.5-turbo"):
+        yield content
+
+
+async def _stream_ollama(messages):
+    from ollama import AsyncClient
+
+    # 本地推理模型会先输出 <think> 思考过程，不返回给用户
+    in_think = False
+    buffer = ""
+    async for part in await AsyncClient(host=OLLAMA_HOST).chat(model=OLLAMA_MODEL, messages=messages, stream=True):
+        buffer += part["message"]["content"] or ""
+        if not in_think and buffer.lstrip().startswith("<think>"):
+            in_think = True
+        if in_think:
+            if "</think>" not in buffer:
+                continue
+            buffer = buffer.split("</think>", 1)[1].lstrip()
+            in_think = False
+        if buffer:
+            yield buffer
+            buffer = ""
+
+
+PROVIDERS = {
+    "deepseek": {"stream": _stream_deepseek, "api_key": "DEEPSEEK_KEY"},
+    "openai": {"stream": _stream_openai, "api_key": "OPENAI_API_KEY"},
+    "ollama": {"stream": _stream_ollama, "api_key": None},
+}
+
+
+class ModelRouter:
+    def __init__(self, hedge_providers=LLM_HEDGE_PROVIDERS, hedge_enabled=LLM_HEDGE_ENABLED):
+        self.hedge_providers = hedge_providers
+        self.hedge_enabled = hedge_enabled
+        self._lock = threading.Lock()
+        self._ttft = {name: deque(maxlen=TTFT_SAMPLES) for name in PROVIDERS}
+        self._stats = {name: {"started": 0, "wins": 0, "hedges": 0, "failures": 0, "cancelled": 0} for name in PROVIDERS}
+
+    @staticmethod
+    def is_configured(provider):
+        config = PROVIDERS.get(provider)
+        return bool(config) and (config["api_key"] is None or bool(get_env_variable(config["api_key"])))
+
+    def threshold(self, provider):
+        """对冲阈值：最近 TTFT 的 P90 乘以系数，样本不足时使用默认值"""
+        with self._lock:
+            samples = list(self._ttft[provider])
+        if len(samples) < MIN_SAMPLES:
+            return LLM_HEDGE_DELAY
+        return min(LLM_HEDGE_MAX_DELAY, max(LLM_HEDGE_MIN_DELAY, _percentile(samples, 0.9) * LLM_HEDGE_FACTOR))
+
+    def _candidates(self, provider):
+        candidates = [provider]
+        if self.hedge_enabled:
+            candidates += [
+                name for name in self.hedge_providers
+                if name != provider and name in PROVIDERS and self.is_configured(name)
+            ]
+        return candidates
+
+    def _record(self, provider, key, ttft=None):
+        with self._lock:
+            self._stats[provider][key] += 1
+            if ttft is not None:
+                self._ttft[provider].append(ttft)
+
+    async def stream(self, provider, messages):
+        """
+        流式调用模型，必要时对冲
+        provider: 首选模型名称
+        messages: OpenAI 格式的消息列表
+        返回: 异步生成器，逐段返回首个开始输出的模型的文本
+        """
+        candidates = self._candidates(provider)
+        # {首个 token 任务: (模型名称, 生成器, 开始时间)}
+        pending = {}
+        last_error = None
+
+        def start_next():
+            name = candidates.pop(0)
+            generator = PROVIDERS[name]["stream"](messages)
+            task = asyncio.ensure_future(generator.__anext__())
+            pending[task] = (name, generator, time.monotonic())
+            self._record(name, "started")
+            return name
+
+        current = start_next()
+        winner = None
+        try:
+            while pending and winner is None:
+                # 还有备选模型时，等待当前模型的对冲阈值
+                timeout = self.threshold(current) if candidates else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"{current} 在 {timeout:.1f} 秒内未返回首个 token，对冲请求 {candidates[0]}")
+                    self._record(candidates[0], "hedges")
+                    current = start_next()
+                    continue
+
+                for task in done:
+                    name, generator, started_at = pending.pop(task)
+                    try:
+                        first_chunk = task.result()
+                    except Exception as e:
+                        last_error = e
+                        logger.warning(f"{name} 流式请求失败: {e}")
+                        self._record(name, "failures")
+                        await generator.aclose()
+                        continue
+                    if winner is None:
+                        winner = (name, generator, first_chunk)
+                        self._record(name, "wins", ttft=time.monotonic() - started_at)
+                    else:
+                        await generator.aclose()
+
+                # 所有请求都失败但仍有备选模型时，立即尝试下一个
+                if winner is None and not pending and candidates:
+                    current = start_next()
+        finally:
+            # 取消未胜出的请求
+            for task, (name, generator, started_at) in pending.items():
+                elapsed = time.monotonic() - started_at
+                # 等待超过自身阈值的请求，实际 TTFT 至少是已等待的时间，作为下限样本记录；
+                # 刚发起就被取消的对冲请求没有参考价值，不记录
+                if winner is not None and elapsed >= self.threshold(name):
+                    self._record(name, "cancelled", ttft=elapsed)
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+                await generator.aclose()
+
+        if winner is None:
+            raise last_error or RuntimeError("没有可用的模型")
+
+        name, generator, first_chunk = winner
+        if name != provider:
+            logger.info(f"使用对冲模型 {name} 的响应")
+        yield first_chunk
+        async for chunk in generator:
+            yield chunk
+
+    def stats(self):
+        stats = {}
+        for name in PROVIDERS:
+            with self._lock:
+                samples = list(self._ttft[name])
+                provider_stats = dict(self._stats[name])
+            provider_stats["configured"] = self.is_configured(name)
+            provider_stats["ttft_p50"] = round(_percentile(samples, 0.5), 3) if samples else None
+            provider_stats["ttft_p90"] = round(_percentile(samples, 0.9), 3) if samples else None
+            provider_stats["hedge_threshold"] = round(self.threshold(name), 3)
+            stats[name] = provider_stats
+        return stats
+
+
+# 创建单例实例
+model_router = ModelRouter()
@@ -0,0 +1,209 @@
+"""
+OPML 批量导入RSS订阅源
+
+解析 OPML 文件，与 rss_sources 中已有的订阅源去重，
+用有界线程池并发探测每个 feed，有效的订阅源通过一次 bulk_write 写入。
+每个 feed 的处理状态保存在 opml_import_items 中，导入中断后可以按 job_id 继续。
+导入在后台线程中执行，接口立即返回 job_id，客户端按 job_id 轮询导入报告。
+"""
+import logging
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from src.core.models.probe import probe_feed
+from src.core.utils.config import get_env_variable
+from src.core.utils.url import normalize_link
+
+logger = logging.getLogger(__name__)
+
+# 并发探测的 feed 数量
+OPML_IMPORT_CONCURRENCY = int(get_env_variable("RSS_OPML_IMPORT_CONCURRENCY", "8"))
+
+# 导入条目的状态
+STATUS_PENDING = "pending"      # 等待探测
+STATUS_VALID = "valid"          # 探测通过，等待写入
+STATUS_INVALID = "invalid"      # 探测失败
+STATUS_EXISTS = "exists"        # 已存在于 rss_sources
+STATUS_DUPLICATE = "duplicate"  # 文件内重复
+STATUS_ADDED = "added"          # 已写入 rss_sources
+
+
+def parse_opml(content):
+    """
+    解析 OPML 内容
+    content: OPML 文本或字节
+    返回: [{"url": ..., "name": ...}, ...]
+    """
+    root = ET.fromstring(content)
+    feeds = []
+    for outline in root.iter("outline"):
+        url = outline.get("xmlUrl") or outline.get("xmlurl")
+        if not url:
+            continue
+        feeds.append({
+            "url": url.strip(),
+            "name": outline.get("title") or outline.get("text") or "",
+        })
+    return feeds
+
+
+class OPMLImporter:
+    def __init__(self, mongo_storage, concurrency=OPML_IMPORT_CONCURRENCY):
+        self.mongo_storage = mongo_storage
+        self.jobs = mongo_storage.db["opml_imports"]
+        self.items = mongo_storage.db["opml_import_items"]
+        self.concurrency = max(1, concurrency)
+        # 本进程中正在执行的任务，避免同一任务被重复启动
+        self._running = set()
+        self._lock = threading.Lock()
+
+    def create_job(self, content):
+        """
+        解析 OPML 并创建导入任务，文件内重复和已存在的订阅源在这一步标记
+        返回: job_id
+        """
+        feeds = parse_opml(content)
+        now = datetime.now()
+        job_id = self.jobs.insert_one({
+            "status": "running",
+            "total": len(feeds),
+            "created_at": now,
+            "updated_at": now,
+        }).inserted_id
+
+        existing = {normalize_link(url) for url in self.mongo_storage.get_rss_source_urls()}
+        seen = set()
+        items = []
+        for feed in feeds:
+            key = normalize_link(feed["url"])
+            if key in existing:
+                status = STATUS_EXISTS
+            elif key in seen:
+                status = STATUS_DUPLICATE
+            else:
+                status = STATUS_PENDING
+            seen.add(key)
+            items.append(dict(feed, job_id=job_id, status=status, error=None))
+        if items:
+            self.items.insert_many(items)
+        return str(job_id)
+
+    def _probe_pending(self, job_id):
+        """并发探测所有待处理的 feed，每个结果立即保存，便于中断后继续"""
+        pending = list(self.items.find({"job_id": job_id, "status": STATUS_PENDING}))
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(pending)), thread_name_prefix="opml-probe") as executor:
+            futures = {executor.submit(probe_feed, item["url"]): item for item in pending}
+            for future in as_completed(futures):
+                item = futures[future]
+                try:
+                    probe = future.result()
+                except Exception as e:
+                    probe = {"ok": False, "error": str(e)}
+                update = {
+                    "status": STATUS_VALID if probe.get("ok") else STATUS_INVALID,
+                    "error": probe.get("error"),
+                    "title": probe.get("title"),
+                    "entry_count": probe.get("entry_count"),
+                }
+                self.items.update_one({"_id": item["_id"]}, {"$set": update})
+
+    def _insert_valid(self, job_id):
+        """将探测通过的 feed 一次性写入 rss_sources"""
+        valid = list(self.items.find({"job_id": job_id, "status": STATUS_VALID}))
+        if not valid:
+            return
+        # 继续导入时再确认一次，避免上次中断前已写入的订阅源重复插入
+        existing = {normalize_link(url) for url in self.mongo_storage.get_rss_source_urls()}
+        to_insert = [item for item in valid if normalize_link(item["url"]) not in existing]
+        inserted_ids = {item["_id"] for item in to_insert}
+        self.mongo_storage.bulk_add_rss_sources([
+            {"url": item["url"], "name": item.get("name") or item.get("title") or f"Feed from {item['url']}"}
+            for item in to_insert
+        ])
+        self.items.bulk_write([
+            UpdateOne({"_id": item["_id"]}, {"$set": {"status": STATUS_ADDED if item["_id"] in inserted_ids else STATUS_EXISTS}})
+            for item in valid
+        ], ordered=False)
+
+    def run(self, job_id):
+        """
+        执行或继续导入任务
+        返回: 导入报告
+        """
+        job_id = ObjectId(job_id)
+        self._probe_pending(job_id)
+        self._insert_valid(job_id)
+        self.jobs.update_one({"_id": job_id}, {"$set": {"status": "completed", "updated_at": datetime.now()}})
+        return self.report(job_id)
+
+    def report(self, job_id):
+        """
+        获取导入报告
+        返回: {"job_id", "status", "summary": {状态: 数量}, "feeds": [...]}
+        """
+        job_id = ObjectId(job_id)
+        job = self.jobs.find_one({"_id": job_id})
+        if not job:
+            return None
+        feeds = list(self.items.find({"job_id": job_id}, {"job_id": 0}))
+        summary = {}
+        for feed in feeds:
+            summary[feed["status"]] = summary.get(feed["status"], 0) + 1
+        return {
+            "job_id": str(job_id),
+            "status": job.get("status"),
+            "summary": summary,
+            "feeds": self.mongo_storage._convert_objectid(feeds),
+        }
+
+    def _safe_run(self, job_id):
+        try:
+            self.run(job_id)
+        except Exception as e:
+            logger.error(f"OPML 导入失败: job_id={job_id}, {e}", exc_info=True)
+            self.jobs.update_one(
+                {"_id": ObjectId(job_id)},
+                {"$set": {"status": "failed", "error": str(e), "updated_at": datetime.now()}}
+            )
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+
+    def start_import(self, content=None, job_id=None):
+        """
+        在后台线程中导入 OPML，提供 job_id 时继续之前中断的任务
+        OPML 解析失败时直接抛出异常，不创建任务
+        返回: job_id，任务不存在时返回 None
+        """
+        if job_id:
+            job_id = str(ObjectId(job_id))
+            if not self.jobs.find_one({"_id": ObjectId(job_id)}, {"_id": 1}):
+                return None
+        else:
+            job_id = self.create_job(content)
+
+        with self._lock:
+            if job_id in self._running:
+                return job_id
+            self._running.add(job_id)
+        logger.info(f"开始导入 OPML: job_id={job_id}")
+        self.jobs.update_one({"_id": ObjectId(job_id)}, {"$set": {"status": "running", "updated_at": datetime.now()}})
+        thread = threading.Thread(target=self._safe_run, args=(job_id,), name=f"opml-import-{job_id}")
+        thread.daemon = True
+        thread.start()
+        return job_id
+
+    def import_opml(self, content=None, job_id=None):
+        """
+        导入 OPML，提供 job_id 时继续之前中断的任务
+        返回: 导入报告
+        """
+        if not job_id:
+            job_id = self.create_job(content)
+        logger.info(f"开始导入 OPML: job_id={job_id}")
+        return self.run(job_id)
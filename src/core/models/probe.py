@@ -0,0 +1,90 @@
+"""
+RSS 源探测
+
+添加或修改订阅源时只抓取并解析 feed，返回标题、条目数、格式和 ETag 等元数据，
+不做去重、AI 摘要和存储，新订阅源的摘要交给后台抓取流程处理。
+探测使用严格的超时和字节上限，结果短时间缓存，避免重复提交时反复请求。
+"""
+import threading
+import time
+import feedparser
+from src.core.utils.config import get_env_variable
+from src.core.utils.feed_fetcher import feed_fetcher
+
+# 连接和读取超时（秒）
+PROBE_CONNECT_TIMEOUT = float(get_env_variable("RSS_PROBE_CONNECT_TIMEOUT", "5"))
+PROBE_READ_TIMEOUT = float(get_env_variable("RSS_PROBE_READ_TIMEOUT", "10"))
+# 最多读取的字节数
+PROBE_MAX_BYTES = int(get_env_variable("RSS_PROBE_MAX_BYTES", str(5 * 1024 * 1024)))
+# 探测结果缓存时间（秒）
+PROBE_CACHE_TTL = int(get_env_variable("RSS_PROBE_CACHE_TTL", "300"))
+
+_probe_cache = {}
+_probe_cache_lock = threading.Lock()
+
+
+def _fetch(url):
+    """通过共享抓取客户端在超时和字节上限内下载 feed"""
+    fetched = feed_fetcher.fetch(
+        url,
+        max_bytes=PROBE_MAX_BYTES,
+        timeout=(PROBE_CONNECT_TIMEOUT, PROBE_READ_TIMEOUT),
+    )
+    if fetched["truncated"]:
+        raise ValueError(f"feed 超过 {PROBE_MAX_BYTES} 字节上限")
+    return fetched["status"], fetched["headers"], fetched["content"]
+
+
+def probe_feed(url, use_cache=True):
+    """
+    探测RSS源
+    url: RSS源的URL
+    use_cache: 是否使用短期缓存
+    返回: {"url", "ok", "status", "title", "entry_count", "format", "etag", "modified", "elapsed", "error"}
+    """
+    now = time.time()
+    if use_cache:
+        with _probe_cache_lock:
+            cached = _probe_cache.get(url)
+        if cached and cached[0] > now:
+            return cached[1]
+
+    result = {
+        "url": url,
+        "ok": False,
+        "status": None,
+        "title": None,
+        "entry_count": 0,
+        "format": None,
+        "etag": None,
+        "modified": None,
+        "elapsed": None,
+        "error": None,
+    }
+    start_time = time.perf_counter()
+    try:
+        status, headers, content = _fetch(url)
+        result["status"] = status
+        result["etag"] = headers.get("etag")
+        result["modified"] = headers.get("last-modified")
+        if status >= 400:
+            result["error"] = f"HTTP {status}"
+        else:
+            feed = feedparser.parse(content, response_headers=headers)
+            result["title"] = feed.get("feed", {}).get("title")
+            result["entry_count"] = len(feed.entries)
+            result["format"] = feed.get("version") or None
+            if feed.entries:
+                result["ok"] = True
+            else:
+                result["error"] = str(feed.get("bozo_exception") or "no entries found")
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed"] = round(time.perf_counter() - start_time, 3)
+
+    with _probe_cache_lock:
+        # 顺便清理过期的缓存
+        for key in [key for key, (expires_at, _) in _probe_cache.items() if expires_at <= now]:
+            del _probe_cache[key]
+        _probe_cache[url] = (now + PROBE_CACHE_TTL, result)
+    return result
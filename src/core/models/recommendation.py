@@ -4,7 +4,6 @@ from datetime import datetime
 from collections import defaultdict
 import numpy as np
 from src.core.storage.rss_storage import RSSStorage
-from src.core.storage.mongodb_storage import MongoDBStorage
 from src.core.utils.config import get_env_variable
 import logging
 
@@ -16,7 +15,7 @@ class RSSRecommender:
     def __init__(self):
         """初始化RSS推荐系统"""
         self.rss_storage = RSSStorage()
-        self.mongo_storage = MongoDBStorage()
+        self.mongo_storage = self.rss_storage.mongo_storage
         
         # 使用OpenAI的embedding函数
         self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
@@ -197,8 +196,8 @@ class RSSRecommender:
         if not self.user_preference_model:
             self._initialize_user_preference_model()
         
-        # 获取所有用户喜好
-        preferences = {pref["feed_id"]: pref for pref in self.mongo_storage.get_all_preferences()}
+        # 获取结果条目的用户喜好
+        preferences = self.mongo_storage.get_preferences(results['ids'][0])
         
         # 处理结果
         items = []
@@ -3,118 +3,514 @@ from venv import logger
 import feedparser
 from flask import json
 from src.core.models.chat import AIChat
+from src.core.models.llm_gateway import llm_gateway, BATCH
+from src.core.models.model_router import model_router
 from src.core.utils.config import RSS_SYSTEM_PROMPT
 from src.core.storage.rss_storage import RSSStorage
+from src.core.storage.connections import connections
+from src.core.models.ingest import ingest_engine
+from src.core.models.source_health import SourceHealthTracker
+from src.core.models.summary_planner import plan_summary_batches, estimate_entry_tokens, SUMMARY_CONCURRENCY
+from src.core.storage.summary_cache import SummaryCache
+from src.core.utils.json_stream import JSONArrayStreamParser
+from src.core.utils.config import get_env_variable
+from src.core.utils.dates import normalize_published
+from src.core.utils.feed_fetcher import feed_fetcher
+from src.core.utils.fast_feed import FastFeedParser, UnsupportedFeedError
+from src.core.utils.content_reducer import reduce_entry
+from src.core.models.extractive import summarize_extractive
 import logging
-import ssl
-from datetime import datetime
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-ssl._create_default_https_context = ssl._create_unverified_context
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # 初始化 RSS 存储
 rss_storage = RSSStorage()
-aiChat = AIChat(modelType="deepseek", system_prompt=RSS_SYSTEM_PROMPT)
+aiChat = AIChat(modelType="deepseek", system_prompt=RSS_SYSTEM_PROMPT, lane=BATCH)
+summary_cache = SummaryCache(rss_storage.mongo_storage.db, RSS_SYSTEM_PROMPT)
+source_health = SourceHealthTracker(rss_storage.mongo_storage)
+# 流式摘要模式：边接收模型输出边解析存储
+SUMMARY_STREAMING = get_env_variable("RSS_SUMMARY_STREAMING", "False") == "True"
+# 流式摘要每解析出多少条写入一次存储，条目已去重，直接批量写入
+SUMMARY_STREAM_STORE_SIZE = int(get_env_variable("RSS_SUMMARY_STREAM_STORE_SIZE", "5"))
+_streaming_stats = {"batches": 0, "stored": 0, "interrupted": 0, "first_item_seconds_total": 0.0}
+_streaming_stats_lock = threading.Lock()
+# 快速解析模式：规范的 RSS 2.0/Atom 使用增量解析，其他格式回退到 feedparser
+FAST_PARSE = get_env_variable("RSS_FAST_PARSE", "True") == "True"
+# 连续遇到多少条已存储的条目后停止解析
+FAST_PARSE_STOP_AFTER_KNOWN = int(get_env_variable("RSS_FAST_PARSE_STOP_AFTER_KNOWN", "3"))
+_parser_stats = {"fast": 0, "fallback": 0, "stopped_early": 0}
+_parser_stats_lock = threading.Lock()
+# 发送给模型前内容精简的 token 估算
+_reduction_stats = {"entries": 0, "tokens_before": 0, "tokens_after": 0}
+_reduction_stats_lock = threading.Lock()
+# 摘要模式：llm 调用模型，失败时用抽取式摘要兜底；fast 只使用本地抽取式摘要
+SUMMARY_MODE = get_env_variable("RSS_SUMMARY_MODE", "llm")
+# 后台重新摘要每次处理的条目数
+RESUMMARY_BATCH_SIZE = int(get_env_variable("RSS_RESUMMARY_BATCH_SIZE", "40"))
+# 后台重新摘要的最小间隔（秒）
+RESUMMARY_INTERVAL = int(get_env_variable("RSS_RESUMMARY_INTERVAL", "1800"))
+_extractive_stats = {"extractive": 0, "resummarized": 0}
+_extractive_stats_lock = threading.Lock()
+# 启动时在后台预热去重索引
+rss_storage.dedup_index.warm_in_background()
+# 条目目录为空时（旧数据只在 Chroma 中），在后台补齐
+if rss_storage.feed_catalog.is_empty():
+    threading.Thread(target=rss_storage.sync_feed_catalog, name="rss-catalog-sync", daemon=True).start()
+
+def collect_new_entries(url, source=None, fetch_info=None):
+    """
+    抓取RSS源并返回尚未存储的条目
+    url: RSS源的URL
+    source: 可选，rss_sources 中的订阅源文档，提供时使用 ETag/Last-Modified 发起条件请求
+    fetch_info: 可选字典，会写入本次抓取的 status、ttl、retry_after 等信息，供调度器使用，
+        etag/modified 需要在条目存储成功后通过 save_fetch_validators 保存
+    """
+    # 通过共享连接池抓取，条件请求和字节上限都在抓取客户端中处理
+    fetched = feed_fetcher.fetch(
+        url,
+        etag=source.get('etag') if source else None,
+        modified=source.get('modified') if source else None,
+    )
+    status = fetched['status']
+    headers = fetched['headers']
+    if fetch_info is not None:
+        fetch_info['status'] = status
+        fetch_info['elapsed'] = fetched['elapsed']
+        fetch_info['ttfb'] = fetched['ttfb']
+        fetch_info['bytes'] = fetched['wire_bytes']
+        fetch_info['retry_after'] = headers.get('retry-after')
+        # 条件请求标识等条目存储成功后再保存
+        fetch_info['etag'] = fetched['etag'] if status == 200 else None
+        fetch_info['modified'] = fetched['modified'] if status == 200 else None
+    if source and source.get('_id'):
+        rss_storage.mongo_storage.record_rss_fetch(
+            source,
+            status,
+            fetched['elapsed'],
+            content_length=fetched['wire_bytes'] if status == 200 else None,
+        )
+
+    # 源内容未变化，跳过解析、去重和 AI 处理
+    if status == 304:
+        logger.info(f"RSS源未更新(304): {url}")
+        return []
+
+    # HTTP错误视为抓取失败，网络错误会直接抛出
+    if status >= 400:
+        raise ValueError(f"RSS源抓取失败: status={status}")
+
+    feed_entries, ttl = _parse_entries(url, fetched['content'], headers, source)
+    if fetch_info is not None:
+        fetch_info['ttl'] = ttl
+
+    entries = []
+    for entry in feed_entries:
+        # 发布时间在抓取时统一规范化一次
+        published = normalize_published(entry['published'])
+
+        entry_data = {
+            'title': entry['title'],
+            'link': entry['link'],
+            'summary': entry['summary'],
+            'content': entry['content'],
+            'published': published['published'],
+            'published_ts': published['published_ts'],
+            'published_day': published['published_day'],
+            'source': url,
+        }
+        entries.append(entry_data)
+
+    # 整个feed一次性去重
+    return rss_storage.filter_new_feeds(entries)
+
+def _parse_entries(url, content, headers, source=None):
+    """
+    解析 feed 内容
+    优先使用快速解析器，feed 按从新到旧排列且遇到比已存储的最新条目更早的已知条目时提前停止；
+    不支持的格式回退到 feedparser
+    source: 可选，订阅源文档，用于查询该源已存储的最新发布时间
+    返回: (条目列表, ttl)，条目包含 title, link, summary, content, published
+    """
+    if FAST_PARSE:
+        newest_known_ts = None
+        if source and source.get('_id'):
+            newest_known_ts = rss_storage.feed_catalog.newest_published_ts(str(source['_id']))
+        parser = FastFeedParser(
+            content,
+            stop_when=lambda entry: rss_storage.dedup_index.contains({**entry, 'source': url}),
+            stop_after=FAST_PARSE_STOP_AFTER_KNOWN,
+            newest_known_ts=newest_known_ts,
+        )
+        try:
+            entries = list(parser.entries())
+            with _parser_stats_lock:
+                _parser_stats["fast"] += 1
+                _parser_stats["stopped_early"] += int(parser.stopped_early)
+            return entries, parser.feed['ttl']
+        except UnsupportedFeedError as e:
+            logger.info(f"快速解析不支持，回退到 feedparser: {url} {e}")
+
+    with _parser_stats_lock:
+        _parser_stats["fallback"] += 1
+    feed = feedparser.parse(content, response_headers=headers)
+    if feed.get('bozo') and not feed.entries:
+        raise ValueError(f"RSS源解析失败: error={feed.get('bozo_exception')}")
 
-def parse_rss(url):
-    feed = feedparser.parse(url)
     if len(feed.entries)  == 0:
         logger.warning(url)
         logger.warning(feed)
-        
-    entries = []
-    for entry in feed.entries:
-        # 处理日期格式，统一转换为ISO格式
-        published_date = entry.published
-        try:
-            # 尝试解析不同格式的日期
-            dt = None
-            try:
-                # RFC 822 格式，如 'Fri, 16 May 2025 17:07:00 +0800'
-                dt = datetime.strptime(published_date, '%a, %d %b %Y %H:%M:%S %z')
-            except ValueError:
-                try:
-                    # 尝试ISO格式，如 '2025-05-16T00:05:44Z'
-                    dt = datetime.strptime(published_date, '%Y-%m-%dT%H:%M:%SZ')
-                except ValueError:
-                    try:
-                        # 尝试其他常见格式
-                        dt = datetime.strptime(published_date, '%Y-%m-%d %H:%M:%S')
-                    except ValueError:
-                        dt = datetime.strptime(published_date, '%Y-%m-%d')
-            
-            # 统一转换为ISO格式
-            if dt:
-                published_date = dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-        except (ValueError, TypeError, AttributeError):
-            # 如果解析失败，保留原始格式
-            pass
-            
-        entry_data = {
+
+    entries = [
+        {
             'title': entry.title,
             'link': entry.link,
             'summary': entry.summary,
             'content': entry.content,
-            'published': published_date,
-            'source': url,
+            'published': entry.get('published') or entry.get('updated'),
         }
-        if not rss_storage.check_has_feed(entry_data):
-            entries.append(entry_data)
-    
-    # 如果没有新条目，直接返回
-    if not entries:
-        return []
-    
-    aiResponse = aiChat.get_response(json.dumps(entries))
-    
-    processed_entries = []
+        for entry in feed.entries
+    ]
+    return entries, feed.get('feed', {}).get('ttl')
+
+def _summarize_batch(batch):
+    """
+    调用 AI 处理一个批次
+    返回: AI 生成的条目列表，失败时返回空列表，不影响其他批次
+    """
+    aiResponse = aiChat.get_response(json.dumps(batch, ensure_ascii=False))
     try:
         # 解析 AI 返回的 JSON 数据
         ai_data = json.loads(aiResponse)
-        
-        # 处理每个 AI 生成的条目
-        for ai_entry in ai_data:
-            # 在原始 entries 中查找匹配的条目
-            original_entry =  [item for item in entries if item["link"] == ai_entry.get('link')][0]
-           
-            if original_entry:
-                # 创建包含 AI 生成内容和原始发布信息的新条目
-                processed_entry = {
-                    'title': ai_entry.get('AITitle'),
-                    'link': ai_entry.get('link'),
-                    'summary': ai_entry.get('AISummary'),
-                    'source': url,
-                    'published': original_entry.get('published'),  # 包含原始条目的所有信息
-                }
-                processed_entries.append(processed_entry)
-                
-                # 存储到 RSS 存储中
-                rss_storage.store_feed(processed_entry)
-    
+        return [ai_data] if isinstance(ai_data, dict) else ai_data
     except Exception as e:
         print(f"处理 JSON 时出错: {e}")
         print(f"原始响应: {aiResponse}")
-    
+        return []
+
+def _to_processed_entry(original_entry, ai_entry):
+    """创建包含 AI 生成内容和原始发布信息的新条目"""
+    return {
+        'title': ai_entry.get('AITitle'),
+        'link': original_entry['link'],
+        'summary': ai_entry.get('AISummary'),
+        'source': original_entry['source'],
+        'published': original_entry.get('published'),  # 包含原始条目的所有信息
+        'published_ts': original_entry.get('published_ts'),
+        'published_day': original_entry.get('published_day'),
+        'simhash': original_entry.get('simhash'),
+        'summary_mode': ai_entry.get('summary_mode', 'llm'),
+    }
+
+def _summarize_batch_streaming(batch, originals):
+    """
+    以流式方式调用 AI 处理一个批次，边解析边分组存储
+    流中断时已解析的对象仍会保留；未完成的条目由 summarize_entries 使用抽取式摘要兜底并立即存储，
+    之后由后台任务重新摘要
+    batch: 精简后发送给模型的条目
+    originals: {link: 原始条目}，用于存储发布时间和来源
+    返回: AI 生成的条目列表
+    """
+    parser = JSONArrayStreamParser()
+    ai_data = []
+    pending = []
+    start_time = time.perf_counter()
+    first_item_seconds = None
+    interrupted = False
+
+    def flush():
+        # 条目在抓取时已经去重，直接批量写入，不再逐条检查
+        nonlocal pending
+        if pending:
+            rss_storage.store_feeds(pending)
+            pending = []
+
+    def parsed_entries():
+        # 只有模型输出中断时视为中断，存储出错直接抛出，不会把未存储的条目当作已存储
+        nonlocal interrupted
+        try:
+            for chunk in aiChat.stream_response(json.dumps(batch, ensure_ascii=False)):
+                yield from parser.feed(chunk)
+        except Exception as e:
+            interrupted = True
+            logger.warning(f"流式摘要中断: {e}，已解析 {len(ai_data)} 条")
+            if parser.pending_text:
+                logger.warning(f"未完成的输出: {parser.pending_text[:200]}")
+
+    for ai_entry in parsed_entries():
+        original_entry = originals.get(ai_entry.get('link')) if isinstance(ai_entry, dict) else None
+        if not original_entry:
+            continue
+        pending.append(_to_processed_entry(original_entry, ai_entry))
+        ai_data.append(ai_entry)
+        if first_item_seconds is None:
+            first_item_seconds = time.perf_counter() - start_time
+        if len(pending) >= SUMMARY_STREAM_STORE_SIZE:
+            flush()
+    flush()
+
+    if parser.error_count:
+        logger.warning(f"流式摘要中有 {parser.error_count} 个对象格式错误，已跳过")
+
+    with _streaming_stats_lock:
+        _streaming_stats["batches"] += 1
+        _streaming_stats["stored"] += len(ai_data)
+        _streaming_stats["interrupted"] += int(interrupted)
+        if first_item_seconds is not None:
+            _streaming_stats["first_item_seconds_total"] += first_item_seconds
+    return ai_data
+
+def _record_reduction(batches, originals):
+    """记录每个批次精简前后的输入 token 估算"""
+    for index, batch in enumerate(batches, 1):
+        before = sum(estimate_entry_tokens(originals[entry['link']])[0] for entry in batch)
+        after = sum(estimate_entry_tokens(entry)[0] for entry in batch)
+        logger.info(f"批次 {index}: {len(batch)} 条，输入 token 估算 {before} -> {after}")
+        with _reduction_stats_lock:
+            _reduction_stats["entries"] += len(batch)
+            _reduction_stats["tokens_before"] += before
+            _reduction_stats["tokens_after"] += after
+
+def summarize_entries(entries):
+    """
+    按 token 预算分批调用 AI 生成标题和摘要，并发执行后按 link 合并结果并存储
+    entries: 待处理的条目列表，可以来自多个订阅源
+    返回: 处理后的条目列表
+    """
+    if not entries:
+        return []
+
+    # 命中缓存的条目不再发送给模型
+    ai_by_link, misses = summary_cache.lookup(entries)
+    # 只把精简后的标题、链接和正文发送给模型
+    originals = {entry['link']: entry for entry in misses}
+    payloads = [reduce_entry(entry) for entry in misses]
+    batches = plan_summary_batches(payloads) if SUMMARY_MODE != "fast" else []
+    logger.info(f"待摘要条目 {len(entries)} 条，缓存命中 {len(ai_by_link)} 条，分为 {len(batches)} 个批次")
+    _record_reduction(batches, originals)
+
+    generated = {}
+    stored_links = set()
+    if batches:
+        with ThreadPoolExecutor(max_workers=min(SUMMARY_CONCURRENCY, len(batches))) as executor:
+            if SUMMARY_STREAMING:
+                futures = [executor.submit(_summarize_batch_streaming, batch, originals) for batch in batches]
+            else:
+                futures = [executor.submit(_summarize_batch, batch) for batch in batches]
+            for future in as_completed(futures):
+                try:
+                    ai_data = future.result()
+                except Exception as e:
+                    logger.error(f"AI 摘要批次出错: {e}")
+                    continue
+                for ai_entry in ai_data:
+                    if isinstance(ai_entry, dict) and ai_entry.get('link') in originals:
+                        generated[ai_entry['link']] = ai_entry
+
+        summary_cache.store([(entry, generated[entry['link']]) for entry in misses if entry['link'] in generated])
+        # 流式模式下生成的条目已经分组存储
+        if SUMMARY_STREAMING:
+            stored_links = set(generated)
+    ai_by_link.update(generated)
+
+    # 模型失败或遗漏的条目用抽取式摘要兜底，之后由后台任务重新摘要
+    fallback = [payload for payload in payloads if payload['link'] not in generated]
+    if fallback:
+        if SUMMARY_MODE != "fast":
+            logger.warning(f"{len(fallback)} 条条目未能由模型摘要，使用抽取式摘要")
+        for payload in fallback:
+            ai_by_link[payload['link']] = summarize_extractive(payload)
+        with _extractive_stats_lock:
+            _extractive_stats["extractive"] += len(fallback)
+
+    processed_entries = []
+    for original_entry in entries:
+        ai_entry = ai_by_link.get(original_entry['link'])
+        if not ai_entry:
+            continue
+        processed_entries.append(_to_processed_entry(original_entry, ai_entry))
+
+    # 其余结果一次性写入 RSS 存储
+    rss_storage.store_feeds([entry for entry in processed_entries if entry['link'] not in stored_links])
+    if fallback:
+        rss_storage.mongo_storage.enqueue_resummary([
+            {"feed_id": rss_storage.feed_id(payload['link']), "link": payload['link'], "payload": payload}
+            for payload in fallback
+        ])
     return processed_entries
 
+def resummarize_extractive(limit=RESUMMARY_BATCH_SIZE):
+    """
+    低优先级后台任务：用模型重新摘要之前以抽取式摘要存储的条目
+    limit: 本次最多处理的条目数
+    返回: 重新摘要成功的条目数
+    """
+    items = rss_storage.mongo_storage.get_resummary_items(limit)
+    if not items:
+        return 0
+
+    payloads = {item['link']: item['payload'] for item in items}
+    generated = {}
+    for batch in plan_summary_batches(list(payloads.values())):
+        for ai_entry in _summarize_batch(batch):
+            if isinstance(ai_entry, dict) and ai_entry.get('link') in payloads:
+                generated[ai_entry['link']] = ai_entry
+
+    rss_storage.update_summaries([
+        {'link': link, 'title': ai_entry.get('AITitle'), 'summary': ai_entry.get('AISummary')}
+        for link, ai_entry in generated.items()
+    ])
+    rss_storage.mongo_storage.complete_resummary(
+        [item['_id'] for item in items if item['link'] in generated],
+        [item['_id'] for item in items if item['link'] not in generated],
+    )
+    with _extractive_stats_lock:
+        _extractive_stats["resummarized"] += len(generated)
+    logger.info(f"重新摘要 {len(generated)}/{len(items)} 条抽取式摘要条目")
+    return len(generated)
+
+def parse_rss(url, source=None):
+    """
+    抓取并处理RSS源
+    url: RSS源的URL
+    source: 可选，rss_sources 中的订阅源文档，提供时使用 ETag/Last-Modified 发起条件请求
+    """
+    fetch_info = {}
+    entries = collect_new_entries(url, source, fetch_info)
+    processed_entries = summarize_entries(entries) if entries else []
+    save_fetch_validators(source, fetch_info)
+    return processed_entries
+
+def save_fetch_validators(source, fetch_info):
+    """
+    条目存储成功后保存 ETag/Last-Modified
+    抓取之后的任何步骤失败时都不保存，下次仍然完整抓取，未存储的条目不会因 304 丢失
+    """
+    if source and source.get('_id') and (fetch_info.get('etag') or fetch_info.get('modified')):
+        rss_storage.mongo_storage.save_rss_validators(source['_id'], fetch_info.get('etag'), fetch_info.get('modified'))
+
+def ingest_sources(sources):
+    """
+    并发抓取一组订阅源，并将所有新条目统一分批摘要和存储
+    sources: rss_sources 中的订阅源文档列表
+    返回: (entries, fetch_infos, errors)
+        entries 为 {url: 处理后的条目列表}
+        fetch_infos 为 {url: 抓取信息}，包含抓取失败的订阅源，429/503 响应的 Retry-After 需要交给调度器
+        errors 为 {url: 错误信息}
+    """
+    # 抓取失败的订阅源的抓取信息，异常抛出后仍需保留
+    failed_fetch_infos = {}
+
+    def fetch(rss_source):
+        fetch_info = {}
+        start_time = time.perf_counter()
+        try:
+            feed_entries = collect_new_entries(rss_source["url"], rss_source, fetch_info)
+        except Exception as e:
+            failed_fetch_infos[rss_source["url"]] = fetch_info
+            source_health.record_failure(rss_source, e, time.perf_counter() - start_time)
+            raise
+        source_health.record_success(rss_source, time.perf_counter() - start_time)
+        fetch_info['new_count'] = len(feed_entries)
+        return feed_entries, fetch_info
+
+    # 熔断打开的订阅源在退避到期前直接跳过
+    allowed_sources = []
+    skipped = {}
+    for rss_source in sources:
+        if source_health.allow(rss_source):
+            allowed_sources.append(rss_source)
+        else:
+            skipped[rss_source["url"]] = "熔断中，已跳过"
+
+    # 并发抓取所有订阅源，单个源失败不影响其他源
+    results, errors = ingest_engine.run(allowed_sources, fetch)
+    for url, error in errors.items():
+        logger.error(f"获取RSS数据时出错: {url} {error}")
+    errors.update(skipped)
+
+    # 所有订阅源的新条目统一分批摘要，小feed会被打包到一起
+    all_entries = [entry for feed_entries, _ in results.values() for entry in feed_entries]
+    try:
+        processed_entries = summarize_entries(all_entries)
+    except Exception as e:
+        # 合并处理时的存储错误不能让所有订阅源的结果一起丢失，按订阅源逐个重试，
+        # 已生成的摘要在缓存中，重试不会重复调用模型
+        logger.error(f"批量摘要或存储出错，按订阅源重试: {e}")
+        processed_entries = []
+        for url, (feed_entries, _) in results.items():
+            if not feed_entries:
+                continue
+            try:
+                processed_entries.extend(summarize_entries(feed_entries))
+            except Exception as source_error:
+                errors[url] = f"摘要或存储失败: {source_error}"
+
+    # 只为存储成功的订阅源保存条件请求标识
+    for rss_source in allowed_sources:
+        url = rss_source["url"]
+        if url in results and url not in errors:
+            try:
+                save_fetch_validators(rss_source, results[url][1])
+            except Exception as e:
+                logger.error(f"保存条件请求标识出错: {url} {e}")
+
+    entries = {url: [] for url in results}
+    for entry in processed_entries:
+        entries.setdefault(entry['source'], []).append(entry)
+    fetch_infos = dict(failed_fetch_infos)
+    fetch_infos.update({url: fetch_info for url, (_, fetch_info) in results.items()})
+    return entries, fetch_infos, errors
+
 def output_rss():
     """
     根据已存储的RSS URL获取数据并存储
     返回: 包含每个URL获取到的数据的字典
     """
     rss_urls = rss_storage.get_all_rss_urls()
-    entries = {}
-    for rss_source in rss_urls:
-        url = rss_source["url"]
-        try:
-            feed_entries = parse_rss(url)
-            entries[url] = feed_entries
-        except Exception as e:
-            print(f"获取RSS数据时出错: {e}")
+    entries, _, _ = ingest_sources(rss_urls)
     return entries
 
+def get_ingest_stats():
+    """
+    获取抓取和摘要相关的统计信息
+    """
+    with _streaming_stats_lock:
+        streaming = dict(_streaming_stats)
+    with _parser_stats_lock:
+        parser_stats = dict(_parser_stats)
+    parser_stats["fast_enabled"] = FAST_PARSE
+    with _extractive_stats_lock:
+        extractive = dict(_extractive_stats)
+    extractive["mode"] = SUMMARY_MODE
+    with _reduction_stats_lock:
+        reduction = dict(_reduction_stats)
+    reduction["saved_ratio"] = (
+        round(1 - reduction["tokens_after"] / reduction["tokens_before"], 3) if reduction["tokens_before"] else None
+    )
+    streaming["enabled"] = SUMMARY_STREAMING
+    first_item_seconds_total = streaming.pop("first_item_seconds_total")
+    streaming["avg_first_item_seconds"] = (
+        round(first_item_seconds_total / streaming["batches"], 3) if streaming["batches"] else None
+    )
+    return {
+        "summary_cache": summary_cache.stats(),
+        "streaming": streaming,
+        "fetch": feed_fetcher.stats(),
+        "parser": parser_stats,
+        "reduction": reduction,
+        "dedup": rss_storage.dedup_index.stats(),
+        "preferences": rss_storage.mongo_storage.preference_cache.stats(),
+        "connections": connections.stats(),
+        "extractive": extractive,
+        "llm": llm_gateway.stats(),
+        "router": model_router.stats(),
+    }
+
 def search_rss_feeds(query, n_results=5):
     """
     搜索已存储的RSS feed
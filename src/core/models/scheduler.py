@@ -0,0 +1,299 @@
+"""
+RSS 订阅源自适应调度器
+
+用优先队列按 next_fetch_at 维护所有订阅源，只抓取到期的源：
+- 根据每个源观察到的发布频率自适应调整抓取间隔，活跃的源抓得勤，长期不更新的源逐渐放慢
+- 遵守 feed 中的 ttl 和响应头中的 Retry-After
+- 调度状态保存在 rss_sources 的 schedule 字段中，重启后按原计划继续，并对逾期的源随机打散，避免同时抓取
+同时负责每天定时发送 RSS 邮件，替代原来每 30 分钟轮询一次的 call_api_timed。
+"""
+import heapq
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from src.core.models.rss import rss_storage, ingest_sources
+from src.core.utils.config import get_env_variable
+
+logger = logging.getLogger(__name__)
+
+# 抓取间隔的上下限和默认值（秒）
+SCHEDULER_MIN_INTERVAL = int(get_env_variable("RSS_SCHEDULER_MIN_INTERVAL", "300"))
+SCHEDULER_MAX_INTERVAL = int(get_env_variable("RSS_SCHEDULER_MAX_INTERVAL", "86400"))
+SCHEDULER_DEFAULT_INTERVAL = int(get_env_variable("RSS_SCHEDULER_DEFAULT_INTERVAL", "1800"))
+# 期望每次抓取平均获得的新条目数，据此由发布频率推算间隔
+SCHEDULER_TARGET_ITEMS = float(get_env_variable("RSS_SCHEDULER_TARGET_ITEMS", "2"))
+# 每轮最多抓取的订阅源数量
+SCHEDULER_BATCH_SIZE = int(get_env_variable("RSS_SCHEDULER_BATCH_SIZE", "50"))
+# 重启后逾期订阅源的打散窗口（秒）
+SCHEDULER_STARTUP_SPREAD = int(get_env_variable("RSS_SCHEDULER_STARTUP_SPREAD", "300"))
+# 重新从 MongoDB 加载订阅源列表的间隔（秒）
+SCHEDULER_RELOAD_INTERVAL = int(get_env_variable("RSS_SCHEDULER_RELOAD_INTERVAL", "60"))
+# 每天发送 RSS 邮件的时间（小时）
+SCHEDULER_DIGEST_HOUR = int(get_env_variable("RSS_DIGEST_HOUR", "8"))
+
+# 发布频率指数移动平均的权重
+RATE_ALPHA = 0.3
+# 从未发现新条目时的退避倍数
+BACKOFF_FACTOR = 1.5
+# 调度循环的最长休眠时间（秒）
+MAX_SLEEP = 30
+
+
+def parse_retry_after(value, now):
+    """
+    解析 Retry-After 响应头，支持秒数和 HTTP 日期两种格式
+    返回: 需要等待的秒数，无法解析时返回 None
+    """
+    if not value:
+        return None
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - now)
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def compute_schedule(schedule, now, new_count=0, ttl=None, retry_after=None, failed=False):
+    """
+    根据本次抓取结果计算新的调度状态
+    schedule: 原调度状态，可能为空
+    now: 当前时间戳
+    new_count: 本次发现的新条目数
+    ttl: feed 声明的 ttl（分钟）
+    retry_after: 响应头中的 Retry-After
+    failed: 本次抓取是否失败
+    返回: 新的调度状态字典
+    """
+    schedule = dict(schedule or {})
+    interval = schedule.get('interval') or SCHEDULER_DEFAULT_INTERVAL
+    rate = schedule.get('rate')
+    last_fetch_at = schedule.get('last_fetch_at')
+
+    if failed:
+        interval *= BACKOFF_FACTOR
+    elif last_fetch_at:
+        # 首次抓取得到的是历史积压条目，不能反映发布频率，从第二次开始估算
+        observed = new_count / max(now - last_fetch_at.timestamp(), 1)
+        rate = observed if rate is None else RATE_ALPHA * observed + (1 - RATE_ALPHA) * rate
+        if rate > 0:
+            # 按发布频率推算平均获得目标数量新条目所需的时间
+            interval = SCHEDULER_TARGET_ITEMS / rate
+        else:
+            interval *= BACKOFF_FACTOR
+        schedule['rate'] = rate
+    if not failed:
+        schedule['last_fetch_at'] = datetime.fromtimestamp(now)
+
+    # ttl 是 feed 声明的最短缓存时间
+    try:
+        if ttl:
+            interval = max(interval, int(ttl) * 60)
+    except (TypeError, ValueError):
+        pass
+    interval = min(max(interval, SCHEDULER_MIN_INTERVAL), SCHEDULER_MAX_INTERVAL)
+
+    next_fetch_at = now + interval
+    wait = parse_retry_after(retry_after, now)
+    if wait is not None:
+        next_fetch_at = max(next_fetch_at, now + wait)
+
+    schedule['interval'] = interval
+    schedule['next_fetch_at'] = datetime.fromtimestamp(next_fetch_at)
+    return schedule
+
+
+class FeedScheduler:
+    def __init__(self, storage=rss_storage, ingest=ingest_sources):
+        self.storage = storage
+        self.ingest = ingest
+        self._heap = []
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._last_reload = 0
+        self._daily_jobs = []
+        self._idle_jobs = []
+        # 尚未加载到内存、需要立即抓取的订阅源
+        self._pending_now = set()
+        self.running = False
+
+    def _push(self, source):
+        """将订阅源按下次抓取时间放入队列"""
+        next_fetch_at = source['schedule']['next_fetch_at'].timestamp()
+        heapq.heappush(self._heap, (next_fetch_at, str(source['_id'])))
+
+    def reload(self):
+        """从 MongoDB 同步订阅源列表，新订阅源和逾期的订阅源在打散窗口内随机安排"""
+        now = time.time()
+        sources = self.storage.mongo_storage.get_all_rss_urls()
+        with self._lock:
+            current = {}
+            for source in sources:
+                source_id = str(source['_id'])
+                known = self._sources.get(source_id)
+                if known:
+                    # 保留内存中的调度状态，只更新URL等字段
+                    source['schedule'] = known['schedule']
+                else:
+                    schedule = dict(source.get('schedule') or {})
+                    next_fetch_at = schedule.get('next_fetch_at')
+                    if source_id in self._pending_now:
+                        schedule['next_fetch_at'] = datetime.fromtimestamp(now)
+                        self._pending_now.discard(source_id)
+                    elif not next_fetch_at or next_fetch_at.timestamp() < now:
+                        spread = min(SCHEDULER_STARTUP_SPREAD, schedule.get('interval') or SCHEDULER_DEFAULT_INTERVAL)
+                        schedule['next_fetch_at'] = datetime.fromtimestamp(now + random.uniform(0, spread))
+                    source['schedule'] = schedule
+                    current[source_id] = source
+                    self._push(source)
+                    continue
+                current[source_id] = source
+            self._sources = current
+        self._last_reload = now
+
+    def schedule_now(self, source_id):
+        """立即安排抓取指定订阅源，例如新添加的订阅源"""
+        source_id = str(source_id)
+        if not self.running:
+            # 调度器未运行（例如未通过 main.py 启动），直接在后台线程中抓取
+            source = self.storage.mongo_storage.rss_sources.find_one({"_id": ObjectId(source_id)})
+            if source:
+                thread = threading.Thread(target=self.ingest, args=([source],))
+                thread.daemon = True
+                thread.start()
+            return
+        with self._lock:
+            # 从 MongoDB 重新加载该订阅源，以便拿到最新的URL，队列中的旧项会被跳过
+            self._sources.pop(source_id, None)
+            self._pending_now.add(source_id)
+            self._last_reload = 0
+        self._wakeup.set()
+
+    def add_daily_job(self, hour, job):
+        """添加每天在指定小时执行一次的任务"""
+        self._daily_jobs.append({"hour": hour, "job": job, "next_run": self._next_daily_run(hour)})
+
+    @staticmethod
+    def _next_daily_run(hour):
+        now = datetime.now()
+        run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if run_at <= now:
+            run_at += timedelta(days=1)
+        return run_at
+
+    def _run_daily_jobs(self):
+        now = datetime.now()
+        for daily_job in self._daily_jobs:
+            if now >= daily_job["next_run"]:
+                daily_job["next_run"] = self._next_daily_run(daily_job["hour"])
+                thread = threading.Thread(target=daily_job["job"])
+                thread.daemon = True
+                thread.start()
+
+    def add_idle_job(self, interval, job):
+        """添加低优先级任务：只在没有到期订阅源时执行，两次执行至少间隔 interval 秒"""
+        self._idle_jobs.append({"interval": interval, "job": job, "last_run": 0, "thread": None})
+
+    def _run_idle_jobs(self):
+        now = time.time()
+        for idle_job in self._idle_jobs:
+            running = idle_job["thread"] is not None and idle_job["thread"].is_alive()
+            if running or now - idle_job["last_run"] < idle_job["interval"]:
+                continue
+            idle_job["last_run"] = now
+            thread = threading.Thread(target=idle_job["job"])
+            thread.daemon = True
+            thread.start()
+            idle_job["thread"] = thread
+
+    def _pop_due(self, now):
+        """取出到期的订阅源，跳过已删除或已重新安排的过期队列项"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(due) < SCHEDULER_BATCH_SIZE:
+                next_fetch_at, source_id = heapq.heappop(self._heap)
+                source = self._sources.get(source_id)
+                if not source or source['schedule']['next_fetch_at'].timestamp() != next_fetch_at:
+                    continue
+                due.append(source)
+        return due
+
+    def _seconds_until_next(self, now):
+        with self._lock:
+            if not self._heap:
+                return MAX_SLEEP
+            return min(max(self._heap[0][0] - now, 0), MAX_SLEEP)
+
+    def run_once(self):
+        """抓取所有到期的订阅源并更新调度状态"""
+        now = time.time()
+        if now - self._last_reload >= SCHEDULER_RELOAD_INTERVAL:
+            self.reload()
+
+        due = self._pop_due(now)
+        if not due:
+            return 0
+
+        logger.info(f"调度器开始抓取 {len(due)} 个到期的订阅源")
+        try:
+            _, fetch_infos, errors = self.ingest(due)
+        except Exception as e:
+            # 已从队列取出的订阅源必须重新入队，按失败退避，否则会一直不再抓取
+            logger.error(f"抓取到期订阅源出错: {e}", exc_info=True)
+            fetch_infos = {}
+            errors = {source['url']: str(e) for source in due}
+
+        finished_at = time.time()
+        operations = []
+        with self._lock:
+            for source in due:
+                url = source['url']
+                info = fetch_infos.get(url, {})
+                retry_after = info.get('retry_after')
+                open_until = (source.get('health') or {}).get('open_until')
+                if open_until and open_until.timestamp() > finished_at:
+                    # 熔断打开期间不再安排抓取，服务端要求的 Retry-After 更长时以它为准
+                    retry_after = int(max(
+                        open_until.timestamp() - finished_at,
+                        parse_retry_after(retry_after, finished_at) or 0
+                    ))
+                source['schedule'] = compute_schedule(
+                    source['schedule'],
+                    finished_at,
+                    new_count=info.get('new_count', 0),
+                    ttl=info.get('ttl'),
+                    retry_after=retry_after,
+                    failed=url in errors,
+                )
+                if str(source['_id']) in self._sources:
+                    self._push(source)
+                operations.append(UpdateOne({"_id": source['_id']}, {"$set": {"schedule": source['schedule']}}))
+
+        if operations:
+            self.storage.mongo_storage.rss_sources.bulk_write(operations, ordered=False)
+        return len(due)
+
+    def run_forever(self):
+        """调度循环"""
+        logger.info("RSS调度器启动")
+        self.running = True
+        while True:
+            try:
+                self._run_daily_jobs()
+                if not self.run_once():
+                    self._run_idle_jobs()
+            except Exception as e:
+                logger.error(f"RSS调度出错: {e}", exc_info=True)
+            self._wakeup.wait(self._seconds_until_next(time.time()))
+            self._wakeup.clear()
+
+
+# 创建单例实例
+feed_scheduler = FeedScheduler()
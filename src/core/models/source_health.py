@@ -0,0 +1,90 @@
+"""
+订阅源健康状态与熔断器
+
+每个订阅源在 rss_sources 的 health 字段中记录：
+连续失败次数、最近一次错误、最近一次耗时和熔断状态（closed/open/half_open）。
+连续失败达到阈值后熔断打开，在退避时间内直接跳过该源；
+退避到期后进入半开状态放行一次，成功则关闭熔断，失败则加倍退避。
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from src.core.utils.config import get_env_variable
+
+logger = logging.getLogger(__name__)
+
+# 连续失败多少次后打开熔断
+BREAKER_FAILURE_THRESHOLD = int(get_env_variable("RSS_BREAKER_FAILURE_THRESHOLD", "3"))
+# 熔断的初始退避时间和最长退避时间（秒）
+BREAKER_BASE_BACKOFF = int(get_env_variable("RSS_BREAKER_BASE_BACKOFF", "600"))
+BREAKER_MAX_BACKOFF = int(get_env_variable("RSS_BREAKER_MAX_BACKOFF", "86400"))
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class SourceHealthTracker:
+    def __init__(self, mongo_storage):
+        self.mongo_storage = mongo_storage
+        self._lock = threading.Lock()
+
+    def _save(self, source, health):
+        """更新内存中的订阅源文档并持久化"""
+        source['health'] = health
+        if source.get('_id'):
+            self.mongo_storage.update_rss_source_health(source['_id'], health)
+
+    def allow(self, source, now=None):
+        """
+        判断订阅源本次是否可以抓取
+        熔断打开且退避未到期时返回 False；到期后转为半开状态并放行
+        """
+        now = now or datetime.now()
+        with self._lock:
+            health = dict(source.get('health') or {})
+            if health.get('breaker_state') != STATE_OPEN:
+                return True
+            open_until = health.get('open_until')
+            if open_until and now < open_until:
+                return False
+            health['breaker_state'] = STATE_HALF_OPEN
+            self._save(source, health)
+        logger.info(f"订阅源熔断退避到期，尝试恢复: {source.get('url')}")
+        return True
+
+    def record_success(self, source, latency):
+        """记录抓取成功，关闭熔断"""
+        with self._lock:
+            health = dict(source.get('health') or {})
+            health.update({
+                'consecutive_failures': 0,
+                'last_latency': latency,
+                'last_success_at': datetime.now(),
+                'breaker_state': STATE_CLOSED,
+                'open_until': None,
+            })
+            self._save(source, health)
+
+    def record_failure(self, source, error, latency):
+        """记录抓取失败，达到阈值或半开试探失败时打开熔断"""
+        now = datetime.now()
+        with self._lock:
+            health = dict(source.get('health') or {})
+            failures = (health.get('consecutive_failures') or 0) + 1
+            health.update({
+                'consecutive_failures': failures,
+                'last_error': str(error),
+                'last_latency': latency,
+                'last_failure_at': now,
+            })
+            if failures >= BREAKER_FAILURE_THRESHOLD or health.get('breaker_state') == STATE_HALF_OPEN:
+                # 退避时间随连续失败次数指数增长
+                exponent = max(failures - BREAKER_FAILURE_THRESHOLD, 0)
+                backoff = min(BREAKER_BASE_BACKOFF * (2 ** exponent), BREAKER_MAX_BACKOFF)
+                health['breaker_state'] = STATE_OPEN
+                health['open_until'] = now + timedelta(seconds=backoff)
+                logger.warning(f"订阅源熔断打开 {backoff} 秒: {source.get('url')}，连续失败 {failures} 次")
+            else:
+                health['breaker_state'] = STATE_CLOSED
+            self._save(source, health)
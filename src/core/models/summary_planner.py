@@ -0,0 +1,71 @@
+"""
+LLM 摘要批次规划
+
+按 token 预算把待摘要的条目切分成大小合适的批次：
+大 feed 拆成多个批次，避免输出超过 max_tokens 被截断；
+来自不同订阅源的小 feed 打包到同一批次，减少 LLM 调用次数。
+"""
+import json
+from src.core.utils.config import get_env_variable
+from src.core.utils.tokens import estimate_tokens
+
+# 单个批次的输入 token 预算
+SUMMARY_INPUT_TOKEN_BUDGET = int(get_env_variable("RSS_SUMMARY_INPUT_TOKEN_BUDGET", "12000"))
+# 单个批次的输出 token 预算，需小于模型的 max_tokens
+SUMMARY_OUTPUT_TOKEN_BUDGET = int(get_env_variable("RSS_SUMMARY_OUTPUT_TOKEN_BUDGET", "3000"))
+# 单个批次的最大条目数
+SUMMARY_MAX_BATCH_ITEMS = int(get_env_variable("RSS_SUMMARY_MAX_BATCH_ITEMS", "20"))
+# 同时进行的摘要批次数
+SUMMARY_CONCURRENCY = int(get_env_variable("RSS_SUMMARY_CONCURRENCY", "4"))
+
+# 单条输出（AITitle + AISummary）的 token 上限估计
+OUTPUT_TOKENS_PER_ENTRY_CAP = 400
+# 单条输出中 JSON 键名和标点的开销
+OUTPUT_TOKENS_OVERHEAD = 20
+
+
+def estimate_entry_tokens(entry):
+    """
+    估算单个条目的输入和输出 token 数
+    返回: (input_tokens, output_tokens)
+    """
+    input_tokens = estimate_tokens(json.dumps(entry, ensure_ascii=False, default=str))
+    output_tokens = min(
+        estimate_tokens(entry.get('title') or '') + estimate_tokens(entry.get('summary') or ''),
+        OUTPUT_TOKENS_PER_ENTRY_CAP
+    )
+    output_tokens += estimate_tokens(entry.get('link') or '') + OUTPUT_TOKENS_OVERHEAD
+    return input_tokens, output_tokens
+
+
+def plan_summary_batches(entries,
+                         input_budget=SUMMARY_INPUT_TOKEN_BUDGET,
+                         output_budget=SUMMARY_OUTPUT_TOKEN_BUDGET,
+                         max_items=SUMMARY_MAX_BATCH_ITEMS):
+    """
+    将条目按 token 预算分批
+    entries: 待摘要的条目列表，可以来自多个订阅源
+    返回: 批次列表，每个批次是条目列表
+    超过预算的单个条目会单独成为一个批次
+    """
+    batches = []
+    current = []
+    current_input = 0
+    current_output = 0
+
+    for entry in entries:
+        input_tokens, output_tokens = estimate_entry_tokens(entry)
+        if current and (current_input + input_tokens > input_budget
+                        or current_output + output_tokens > output_budget
+                        or len(current) >= max_items):
+            batches.append(current)
+            current = []
+            current_input = 0
+            current_output = 0
+        current.append(entry)
+        current_input += input_tokens
+        current_output += output_tokens
+
+    if current:
+        batches.append(current)
+    return batches
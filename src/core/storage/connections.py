@@ -0,0 +1,184 @@
+"""
+Chroma 和 MongoDB 连接注册表
+
+RSSStorage、MongoDBStorage 可能在多个模块中、甚至每个请求中被创建。
+连接和集合句柄统一从这里获取：首次使用时创建，之后在进程内共享，
+不再为每个实例新建 Chroma 客户端、调用 get_or_create_collection 和启动新的 MongoClient 连接池。
+MongoDB 连接池大小可配置，并通过连接池事件统计连接数和等待空闲连接的时间。
+"""
+import threading
+import chromadb
+from chromadb.config import Settings
+from pymongo import MongoClient
+from pymongo import monitoring
+from src.core.utils.config import get_env_variable
+
+CHROMA_HOST = get_env_variable("CHROMA_HOST")
+CHROMA_PORT = get_env_variable("CHROMA_PORT")
+# 关闭 Chroma 客户端的匿名统计，避免每次操作额外上报
+CHROMA_ANONYMIZED_TELEMETRY = get_env_variable("CHROMA_ANONYMIZED_TELEMETRY", "False") == "True"
+
+MONGODB_URI = get_env_variable("MONGODB_URI")
+MONGODB_DB_NAME = get_env_variable("MONGODB_DB_NAME")
+# MongoDB 连接池大小，以及等待空闲连接的超时时间（毫秒）
+MONGODB_MAX_POOL_SIZE = int(get_env_variable("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(get_env_variable("MONGODB_MIN_POOL_SIZE", "0"))
+MONGODB_MAX_IDLE_TIME_MS = int(get_env_variable("MONGODB_MAX_IDLE_TIME_MS", "300000"))
+MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(get_env_variable("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    """统计连接的创建、关闭、借出以及借出前的等待时间"""
+
+    def __init__(self):
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "checked_out": 0,
+            "checked_in": 0,
+            "checkout_failures": 0,
+            "pool_cleared": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _record_wait(self, event):
+        # pymongo 4.9 起事件带有 duration（秒）
+        duration = getattr(event, "duration", None)
+        if duration is None:
+            return
+        with self._lock:
+            self._stats["wait_total"] += duration
+            self._stats["wait_max"] = max(self._stats["wait_max"], duration)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count("pool_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count("created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count("closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._count("checkout_failures")
+        self._record_wait(event)
+
+    def connection_checked_out(self, event):
+        self._count("checked_out")
+        self._record_wait(event)
+
+    def connection_checked_in(self, event):
+        self._count("checked_in")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        checkouts = stats["checked_out"] + stats["checkout_failures"]
+        return {
+            "open": stats["created"] - stats["closed"],
+            "in_use": stats["checked_out"] - stats["checked_in"],
+            "created": stats["created"],
+            "checkouts": stats["checked_out"],
+            "checkout_failures": stats["checkout_failures"],
+            "pool_cleared": stats["pool_cleared"],
+            "wait_avg_ms": round(stats["wait_total"] / checkouts * 1000, 3) if checkouts else 0,
+            "wait_max_ms": round(stats["wait_max"] * 1000, 3),
+        }
+
+
+class ConnectionRegistry:
+    def __init__(self):
+        self._chroma_clients = {}
+        self._collections = {}
+        self._mongo_clients = {}
+        self._pool_listener = MongoPoolListener()
+        self._lock = threading.Lock()
+
+    def chroma_client(self, host=CHROMA_HOST, port=CHROMA_PORT):
+        """获取共享的 Chroma 客户端"""
+        key = (host, str(port))
+        client = self._chroma_clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._chroma_clients.get(key)
+                if client is None:
+                    client = chromadb.HttpClient(
+                        host=host,
+                        port=port,
+                        settings=Settings(anonymized_telemetry=CHROMA_ANONYMIZED_TELEMETRY)
+                    )
+                    self._chroma_clients[key] = client
+        return client
+
+    def chroma_collection(self, name, host=CHROMA_HOST, port=CHROMA_PORT, metadata=None):
+        """获取共享的 Chroma 集合句柄，只在首次使用时调用 get_or_create_collection"""
+        key = (host, str(port), name)
+        collection = self._collections.get(key)
+        if collection is None:
+            client = self.chroma_client(host, port)
+            with self._lock:
+                collection = self._collections.get(key)
+                if collection is None:
+                    collection = client.get_or_create_collection(name=name, metadata=metadata)
+                    self._collections[key] = collection
+        return collection
+
+    def mongo_client(self, uri=MONGODB_URI):
+        """获取共享的 MongoClient，整个进程共用一个连接池"""
+        client = self._mongo_clients.get(uri)
+        if client is None:
+            with self._lock:
+                client = self._mongo_clients.get(uri)
+                if client is None:
+                    client = MongoClient(
+                        uri,
+                        maxPoolSize=MONGODB_MAX_POOL_SIZE,
+                        minPoolSize=MONGODB_MIN_POOL_SIZE,
+                        maxIdleTimeMS=MONGODB_MAX_IDLE_TIME_MS,
+                        waitQueueTimeoutMS=MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+                        event_listeners=[self._pool_listener]
+                    )
+                    self._mongo_clients[uri] = client
+        return client
+
+    def mongo_db(self, name=MONGODB_DB_NAME, uri=MONGODB_URI):
+        return self.mongo_client(uri)[name]
+
+    def stats(self):
+        with self._lock:
+            chroma_clients = len(self._chroma_clients)
+            collections = len(self._collections)
+            mongo_clients = len(self._mongo_clients)
+        return {
+            "chroma": {"clients": chroma_clients, "collections": collections},
+            "mongo": {
+                "clients": mongo_clients,
+                "max_pool_size": MONGODB_MAX_POOL_SIZE,
+                **self._pool_listener.stats(),
+            },
+        }
+
+
+# 创建单例实例
+connections = ConnectionRegistry()
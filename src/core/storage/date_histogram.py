@@ -0,0 +1,133 @@
+"""
+按日期统计的条目数量
+
+Mongo 的 feed_day_counts 集合以 published_day 为 _id，保存当天的条目总数和各订阅源的数量，
+存储新条目时增加、删除条目时减少，不再为 /rss/dates 扫描全部条目。
+进程内保留一份已排序的副本，超过 TTL 后重新读取以看到其他进程的写入，
+集合只有“天数”条记录，重新读取的开销很小。
+"""
+import threading
+import time
+from pymongo import UpdateOne
+from src.core.utils.config import get_env_variable
+
+# 内存副本的有效期（秒）
+DATE_HISTOGRAM_TTL = float(get_env_variable("RSS_DATE_HISTOGRAM_TTL", "60"))
+
+
+class DateHistogram:
+    # 每个集合共享一份内存副本
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, collection, ttl=DATE_HISTOGRAM_TTL):
+        self.collection = collection
+        self.ttl = ttl
+        # {日期: {"count": 总数, "sources": {订阅源ID: 数量}}}
+        self._days = {}
+        # 按日期从新到旧排序的结果，按订阅源分别缓存
+        self._sorted = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_collection(cls, collection):
+        """获取集合对应的共享实例"""
+        with cls._instances_lock:
+            histogram = cls._instances.get(collection.full_name)
+            if histogram is None:
+                histogram = cls(collection)
+                cls._instances[collection.full_name] = histogram
+        return histogram
+
+    def _load(self):
+        days = {
+            row["_id"]: {"count": row.get("count", 0), "sources": row.get("sources") or {}}
+            for row in self.collection.find({"count": {"$gt": 0}})
+        }
+        with self._lock:
+            self._days = days
+            self._sorted = {}
+            self._loaded_at = time.monotonic()
+
+    def _ensure_loaded(self):
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.ttl:
+            self._load()
+
+    def increment(self, entries, delta=1):
+        """
+        更新计数
+        entries: [(published_day, source_id)]，没有日期的条目不计数，source_id 可为 None
+        delta: 每个条目的增量，删除时为 -1
+        """
+        changes = {}
+        for day, source_id in entries:
+            if not day:
+                continue
+            change = changes.setdefault(day, {"count": 0, "sources": {}})
+            change["count"] += delta
+            if source_id:
+                change["sources"][source_id] = change["sources"].get(source_id, 0) + delta
+        if not changes:
+            return
+
+        operations = []
+        for day, change in changes.items():
+            inc = {"count": change["count"]}
+            inc.update({f"sources.{source_id}": count for source_id, count in change["sources"].items()})
+            operations.append(UpdateOne({"_id": day}, {"$inc": inc}, upsert=True))
+        self.collection.bulk_write(operations, ordered=False)
+        if delta < 0:
+            self.collection.delete_many({"count": {"$lte": 0}})
+
+        # 同步更新内存副本，本进程的写入立即可见
+        with self._lock:
+            for day, change in changes.items():
+                current = self._days.setdefault(day, {"count": 0, "sources": {}})
+                current["count"] += change["count"]
+                for source_id, count in change["sources"].items():
+                    current["sources"][source_id] = current["sources"].get(source_id, 0) + count
+                if current["count"] <= 0:
+                    del self._days[day]
+            self._sorted = {}
+
+    def dates(self, source_id=None):
+        """
+        获取有数据的日期列表，按日期从新到旧排序
+        source_id: 可选，只统计该订阅源的条目
+        返回: [{"date": "2024-03-20", "count": 10}, ...]
+        """
+        self._ensure_loaded()
+        with self._lock:
+            cached = self._sorted.get(source_id)
+            if cached is None:
+                cached = []
+                for day in sorted(self._days, reverse=True):
+                    counts = self._days[day]
+                    count = counts["count"] if source_id is None else counts["sources"].get(source_id, 0)
+                    if count > 0:
+                        cached.append({"date": day, "count": count})
+                self._sorted[source_id] = cached
+            return [dict(item) for item in cached]
+
+    def rebuild(self, counts):
+        """
+        按实际存储的条目重新统计，修正计数偏差
+        counts: [(published_day, source_id, 数量)]
+        返回: 有数据的天数
+        """
+        days = {}
+        for day, source_id, count in counts:
+            current = days.setdefault(day, {"count": 0, "sources": {}})
+            current["count"] += count
+            if source_id:
+                current["sources"][source_id] = count
+
+        self.collection.delete_many({"_id": {"$nin": list(days)}})
+        if days:
+            self.collection.bulk_write([
+                UpdateOne({"_id": day}, {"$set": day_counts}, upsert=True) for day, day_counts in days.items()
+            ], ordered=False)
+        self._load()
+        return len(days)
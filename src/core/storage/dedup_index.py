@@ -0,0 +1,196 @@
+"""
+RSS 去重索引
+
+在进程内维护已存储 feed 的 link 集合和 (title, source) 集合，
+启动时从 Chroma 预热，每次 store_feed 后同步更新。
+整个 feed 的去重只需一次内存查找，只有内存未命中的条目才会合并成一次批量查询确认。
+链接按去掉跟踪参数后的规范链接比较；标题和摘要的 SimHash 指纹用于发现
+其他订阅源转载的同一篇文章。
+"""
+import logging
+import threading
+from src.core.utils.config import get_env_variable
+from src.core.utils.content_reducer import html_to_text, clean_text
+from src.core.utils.simhash import SimHashIndex, simhash, to_hex, from_hex
+from src.core.utils.url import canonical_link
+
+logger = logging.getLogger(__name__)
+
+# 预热时每次从 Chroma 读取的条目数
+WARM_PAGE_SIZE = 5000
+# 判定为近似重复的最大汉明距离
+NEAR_DUP_MAX_DISTANCE = int(get_env_variable("RSS_NEAR_DUP_MAX_DISTANCE", "3"))
+# 参与指纹计算的摘要字符数，不同订阅源的摘录长度不同，只取开头部分
+FINGERPRINT_SUMMARY_CHARS = 500
+
+
+class FeedDedupIndex:
+    # 每个集合共享一个索引实例
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._links = set()
+        self._title_sources = set()
+        self._simhashes = SimHashIndex(NEAR_DUP_MAX_DISTANCE)
+        self._stats = {"near_duplicates": 0}
+        self._lock = threading.Lock()
+        self._warm_lock = threading.Lock()
+        self._warmed = False
+
+    @classmethod
+    def for_collection(cls, collection):
+        """获取集合对应的共享索引"""
+        with cls._instances_lock:
+            index = cls._instances.get(collection.name)
+            if index is None:
+                index = cls(collection)
+                cls._instances[collection.name] = index
+        return index
+
+    @staticmethod
+    def _title_key(feed_data):
+        return (feed_data.get('title'), feed_data.get('source') or '')
+
+    @staticmethod
+    def fingerprint(feed_data):
+        """计算标题和摘要开头部分的 SimHash，特征太少时返回 None"""
+        summary = clean_text(html_to_text(feed_data.get('summary') or ''))[:FINGERPRINT_SUMMARY_CHARS]
+        return simhash(f"{feed_data.get('title') or ''} {summary}")
+
+    def _add_metadata(self, metadata):
+        if not metadata:
+            return
+        if metadata.get('link'):
+            self._links.add(metadata['link'])
+            self._links.add(metadata.get('canonical_link') or canonical_link(metadata['link']))
+            fingerprint = from_hex(metadata.get('simhash'))
+            if fingerprint is not None:
+                self._simhashes.add(fingerprint, metadata['link'])
+        if metadata.get('title'):
+            self._title_sources.add(self._title_key(metadata))
+
+    def warm(self):
+        """从 Chroma 分页加载已存储 feed 的去重键"""
+        with self._warm_lock:
+            if self._warmed:
+                return
+            offset = 0
+            while True:
+                results = self.collection.get(include=["metadatas"], limit=WARM_PAGE_SIZE, offset=offset)
+                metadatas = results.get('metadatas') or []
+                with self._lock:
+                    for metadata in metadatas:
+                        self._add_metadata(metadata)
+                if len(metadatas) < WARM_PAGE_SIZE:
+                    break
+                offset += WARM_PAGE_SIZE
+            self._warmed = True
+            logger.info(f"去重索引预热完成: {len(self._links)} 个链接")
+
+    def warm_in_background(self):
+        """在后台线程中预热，不阻塞启动"""
+        thread = threading.Thread(target=self._safe_warm, name="rss-dedup-warm")
+        thread.daemon = True
+        thread.start()
+
+    def _safe_warm(self):
+        try:
+            self.warm()
+        except Exception as e:
+            logger.error(f"去重索引预热失败: {e}")
+
+    def add(self, feed_data):
+        """记录新存储的 feed"""
+        with self._lock:
+            self._add_metadata(feed_data)
+
+    def contains(self, feed_data):
+        """只查内存，判断 feed 是否已存在"""
+        with self._lock:
+            return (feed_data.get('link') in self._links
+                    or canonical_link(feed_data.get('link')) in self._links
+                    or self._title_key(feed_data) in self._title_sources)
+
+    def filter_new(self, entries):
+        """
+        过滤出尚未存储的条目
+        entries: 包含 title, link, source 的条目列表
+        返回: 新条目列表，保持原有顺序
+        """
+        self.warm()
+
+        # 先在内存中过滤，同时去掉同一批次内重复的条目
+        candidates = []
+        seen_links = set()
+        for entry in entries:
+            link = canonical_link(entry.get('link'))
+            if link in seen_links or self.contains(entry):
+                continue
+            seen_links.add(link)
+            candidates.append(entry)
+
+        if not candidates:
+            return []
+
+        # 内存未命中的条目合并成一次批量查询，确认其他进程是否已写入
+        links = list({entry['link'] for entry in candidates if entry.get('link')})
+        canonical_links = list({canonical_link(link) for link in links})
+        titles = list({entry['title'] for entry in candidates if entry.get('title')})
+        clauses = []
+        if links:
+            clauses.append({"link": {"$in": links}})
+            clauses.append({"canonical_link": {"$in": canonical_links}})
+        if titles:
+            clauses.append({"title": {"$in": titles}})
+        if not clauses:
+            return candidates
+
+        existing = self.collection.get(
+            where=clauses[0] if len(clauses) == 1 else {"$or": clauses},
+            include=["metadatas"]
+        )
+        with self._lock:
+            for metadata in existing.get('metadatas') or []:
+                self._add_metadata(metadata)
+
+        return [entry for entry in candidates if not self.contains(entry)]
+
+    def split_near_duplicates(self, entries):
+        """
+        找出与已存储文章或同批次更早条目近似重复的条目
+        未重复的条目会写入 simhash 字段，存储时一并保存
+        返回: (unique, duplicates)，duplicates 为 [(条目, 原文链接, 汉明距离)]
+        """
+        unique = []
+        duplicates = []
+        batch_index = SimHashIndex(NEAR_DUP_MAX_DISTANCE)
+        for entry in entries:
+            fingerprint = self.fingerprint(entry)
+            if fingerprint is None:
+                unique.append(entry)
+                continue
+
+            match, distance = self._simhashes.find(fingerprint)
+            if match is None:
+                match, distance = batch_index.find(fingerprint)
+            if match is not None and canonical_link(match) != canonical_link(entry.get('link')):
+                duplicates.append((entry, match, distance))
+                continue
+
+            entry['simhash'] = to_hex(fingerprint)
+            batch_index.add(fingerprint, entry.get('link'))
+            unique.append(entry)
+
+        if duplicates:
+            with self._lock:
+                self._stats["near_duplicates"] += len(duplicates)
+        return unique, duplicates
+
+    def stats(self):
+        with self._lock:
+            return {
+                "links": len(self._links),
+                "near_duplicates": self._stats["near_duplicates"],
+            }
@@ -0,0 +1,219 @@
+"""
+RSS 条目目录
+
+Mongo 的 feeds 集合保存每个已存储条目的列表字段（标题、链接、摘要、订阅源、发布时间、喜好状态），
+与 Chroma 在同一个入库步骤中写入。列表、过滤和计数都在这里通过复合索引完成，
+Chroma 只负责相似度查询。
+
+列表按 (published_ts, _id) 从新到旧排序，使用游标分页，游标格式为 "published_ts:id"：
+before 返回游标之后（更早）的条目，after 返回游标之前（更新）的条目，
+每一页都只读取索引上的一段，首页的开销与已存储的条目总数无关。
+"""
+import threading
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+# 目录中作为条目元数据返回的字段
+METADATA_FIELDS = (
+    "title", "link", "canonical_link", "published", "published_ts", "published_day",
+    "source", "source_id", "summary", "summary_mode", "needs_resummary", "simhash",
+)
+NEWEST_FIRST = [("published_ts", DESCENDING), ("_id", DESCENDING)]
+OLDEST_FIRST = [("published_ts", ASCENDING), ("_id", ASCENDING)]
+
+
+def encode_cursor(document):
+    """把目录条目转换为游标字符串"""
+    return f"{document.get('published_ts') or 0}:{document['_id']}"
+
+
+def decode_cursor(cursor):
+    """
+    解析游标字符串
+    返回: (published_ts, id)，格式不正确时抛出 ValueError
+    """
+    ts, sep, doc_id = (cursor or "").partition(":")
+    if not sep or not doc_id:
+        raise ValueError(f"无效的游标: {cursor}")
+    return int(ts), doc_id
+
+
+class FeedCatalog:
+    # 索引只需在每个进程中创建一次
+    _indexed = set()
+    _indexed_lock = threading.Lock()
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.ensure_indexes()
+
+    def ensure_indexes(self):
+        """创建列表和过滤用的复合索引，已存在时不重复创建"""
+        with self._indexed_lock:
+            if self.collection.full_name in self._indexed:
+                return
+            self.collection.create_index(NEWEST_FIRST)
+            self.collection.create_index([("source_id", ASCENDING)] + NEWEST_FIRST)
+            self.collection.create_index([("published_day", ASCENDING)])
+            self.collection.create_index([("is_liked", ASCENDING)] + NEWEST_FIRST)
+            self.collection.create_index([("created_at", DESCENDING)])
+            self._indexed.add(self.collection.full_name)
+
+    def upsert(self, ids, metadatas, source_ids=None, backfill=False):
+        """
+        写入或更新条目，与 Chroma 的 upsert 一一对应
+        ids: feed ID 列表
+        metadatas: 与 ids 对应的元数据列表
+        source_ids: 可选，{订阅源URL: 订阅源ID}
+        backfill: 从 Chroma 补齐旧条目时为 True，写入时间取发布时间，
+            这些条目不是新存储的，不能被邮件汇总当作新条目发送
+        返回: 新写入（之前不存在）的 ID 列表
+        """
+        if not ids:
+            return []
+        source_ids = source_ids or {}
+        now = datetime.now()
+        operations = []
+        for doc_id, metadata in zip(ids, metadatas):
+            document = {field: metadata.get(field) for field in METADATA_FIELDS if field in metadata}
+            document["source_id"] = source_ids.get(metadata.get("source"))
+            document["updated_at"] = now
+            created_at = datetime.fromtimestamp(metadata.get("published_ts") or 0) if backfill else now
+            operations.append(UpdateOne(
+                {"_id": doc_id},
+                {"$set": document, "$setOnInsert": {"created_at": created_at}},
+                upsert=True
+            ))
+        result = self.collection.bulk_write(operations, ordered=False)
+        return [ids[index] for index in result.upserted_ids]
+
+    def update_summaries(self, ids, metadatas):
+        """更新条目的标题和摘要"""
+        if not ids:
+            return
+        self.collection.bulk_write([
+            UpdateOne({"_id": doc_id}, {"$set": metadata})
+            for doc_id, metadata in zip(ids, metadatas)
+        ], ordered=False)
+
+    def set_preference(self, feed_id, is_liked):
+        """同步条目的喜好状态，用于按喜好过滤"""
+        self.collection.update_one({"_id": feed_id}, {"$set": {"is_liked": is_liked}})
+
+    @staticmethod
+    def build_filter(source_id=None, start_ts=None, end_ts=None, day=None, preference=None):
+        """
+        生成列表和计数共用的查询条件
+        preference: liked/disliked/unmarked，其他值不过滤
+        """
+        query = {}
+        if source_id:
+            query["source_id"] = source_id
+        if start_ts is not None or end_ts is not None:
+            query["published_ts"] = {}
+            if start_ts is not None:
+                query["published_ts"]["$gte"] = start_ts
+            if end_ts is not None:
+                query["published_ts"]["$lte"] = end_ts
+        if day:
+            query["published_day"] = day
+        if preference == "liked":
+            query["is_liked"] = True
+        elif preference == "disliked":
+            query["is_liked"] = False
+        elif preference == "unmarked":
+            # 匹配没有该字段的条目
+            query["is_liked"] = None
+        return query
+
+    def page(self, limit=20, before=None, after=None, **filters):
+        """
+        按发布时间从新到旧读取一页条目
+        before/after: 游标，before 向更早翻页，after 向更新翻页，同时提供时以 before 为准
+        filters: build_filter 的过滤条件
+        返回: (documents, next_cursor, prev_cursor)，没有更早或更新的页时对应游标为 None
+        """
+        query = self.build_filter(**filters)
+        newer = bool(after) and not before
+        cursor = before or after
+        if cursor:
+            ts, doc_id = decode_cursor(cursor)
+            op = "$gt" if newer else "$lt"
+            keyset = {"$or": [{"published_ts": {op: ts}}, {"published_ts": ts, "_id": {op: doc_id}}]}
+            query = {"$and": [query, keyset]} if query else keyset
+
+        # 向更新翻页时按升序从游标处读取，结果再反转为从新到旧
+        documents = list(
+            self.collection.find(query).sort(OLDEST_FIRST if newer else NEWEST_FIRST).limit(limit + 1)
+        )
+        has_more = len(documents) > limit
+        documents = documents[:limit]
+        if newer:
+            documents.reverse()
+        if not documents:
+            return [], None, None
+
+        if newer:
+            next_cursor = encode_cursor(documents[-1])
+            prev_cursor = encode_cursor(documents[0]) if has_more else None
+        else:
+            next_cursor = encode_cursor(documents[-1]) if has_more else None
+            prev_cursor = encode_cursor(documents[0]) if before else None
+        return documents, next_cursor, prev_cursor
+
+    def newest_published_ts(self, source_id):
+        """
+        获取订阅源已存储条目中最新的发布时间戳
+        返回: 时间戳，没有条目时返回 None
+        """
+        document = self.collection.find_one({"source_id": source_id}, {"published_ts": 1}, sort=NEWEST_FIRST)
+        return document.get("published_ts") if document else None
+
+    def stored_between(self, since, until, limit=1000):
+        """
+        按写入时间读取条目，用于汇总上次发送之后新存储的条目
+        since/until: 写入时间范围 (since, until]，since 为 None 时不限制起点
+        返回: 按写入时间从新到旧排序的条目列表
+        """
+        created_at = {"$lte": until}
+        if since is not None:
+            created_at["$gt"] = since
+        return list(self.collection.find({"created_at": created_at}).sort("created_at", DESCENDING).limit(limit))
+
+    def count(self, **filters):
+        """按过滤条件计数"""
+        return self.collection.count_documents(self.build_filter(**filters))
+
+    def count_by_day(self):
+        """
+        按 published_day 和订阅源分组计数
+        返回: [(published_day, source_id, 数量)]
+        """
+        pipeline = [
+            {"$match": {"published_day": {"$nin": [None, ""]}}},
+            {"$group": {"_id": {"day": "$published_day", "source_id": "$source_id"}, "count": {"$sum": 1}}},
+        ]
+        return [
+            (row["_id"]["day"], row["_id"].get("source_id"), row["count"])
+            for row in self.collection.aggregate(pipeline)
+        ]
+
+    def get_many(self, ids, fields=None):
+        """按 ID 批量读取条目"""
+        return list(self.collection.find({"_id": {"$in": list(ids)}}, fields))
+
+    def delete(self, ids):
+        """删除条目，返回删除的数量"""
+        return self.collection.delete_many({"_id": {"$in": list(ids)}}).deleted_count
+
+    def clear(self):
+        """删除全部条目"""
+        return self.collection.delete_many({}).deleted_count
+
+    def is_empty(self):
+        return self.collection.find_one({}, {"_id": 1}) is None
+
+    @staticmethod
+    def to_metadata(document):
+        """目录条目转换为与 Chroma 元数据相同的结构"""
+        return {field: document[field] for field in METADATA_FIELDS if document.get(field) is not None}
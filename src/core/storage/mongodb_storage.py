@@ -1,21 +1,54 @@
-from pymongo import MongoClient
+from pymongo import InsertOne, UpdateOne
 from bson import ObjectId
-from src.core.utils.config import get_env_variable
+from src.core.storage.connections import connections
+from src.core.storage.feed_catalog import FeedCatalog
+from src.core.storage.date_histogram import DateHistogram
+from src.core.storage.preference_cache import PreferenceCache
 from datetime import datetime
 
 class MongoDBStorage:
     def __init__(self, collection_name="user_preferences"):
-        # 从环境变量获取MongoDB连接信息
-        mongo_uri = get_env_variable("MONGODB_URI") 
-        db_name = get_env_variable("MONGODB_DB_NAME")
-
-        self.client = MongoClient(mongo_uri)
-        self.db = self.client[db_name]
+        # 共享进程内的MongoClient连接池，连接信息从环境变量读取
+        self.client = connections.mongo_client()
+        self.db = connections.mongo_db()
             
         self.collection = self.db[collection_name]
+        # 进程内共享的喜好缓存，通过 cache_versions 中的版本号感知其他进程的写入
+        self.preference_cache = PreferenceCache.for_collection(self.collection, self.db["cache_versions"])
         # RSS源存储集合
         self.rss_sources = self.db["rss_sources"]
+        # 近似重复文章与原文的关联
+        self.feed_duplicates = self.db["feed_duplicates"]
+        # 等待模型重新摘要的抽取式摘要条目
+        self.resummary_queue = self.db["resummary_queue"]
+        # 条目目录，列表、过滤和计数的数据来源
+        self.feed_catalog = FeedCatalog(self.db["feeds"])
+        # 按日期统计的条目数量
+        self.date_histogram = DateHistogram.for_collection(self.db["feed_day_counts"])
+        # 邮件汇总已发送到的位置
+        self.digest_state = self.db["digest_state"]
     
+    def get_digest_watermark(self, name="email"):
+        """
+        获取汇总上次发送时的时间，之后写入的条目是下次需要发送的内容
+        返回: datetime，从未发送过时返回 None
+        """
+        state = self.digest_state.find_one({"_id": name})
+        return state.get("sent_until") if state else None
+
+    def set_digest_watermark(self, sent_until, name="email"):
+        """汇总发送成功后记录本次包含的条目的写入时间上限"""
+        self.digest_state.update_one(
+            {"_id": name},
+            {"$set": {"sent_until": sent_until, "updated_at": datetime.now()}},
+            upsert=True
+        )
+
+    def clear_feed_records(self):
+        """清空由条目派生的记录：摘要缓存、重新摘要队列和近似重复记录"""
+        for collection in (self.db["summary_cache"], self.resummary_queue, self.feed_duplicates):
+            collection.delete_many({})
+
     def _convert_objectid(self, data):
         """将MongoDB文档中的ObjectId转换为字符串"""
         if isinstance(data, dict):
@@ -45,22 +78,29 @@ class MongoDBStorage:
             {"$set": data},
             upsert=True
         )
+        self.feed_catalog.set_preference(feed_id, is_liked)
+        self.preference_cache.record(feed_id)
         return data
     
     def get_preference(self, feed_id):
         """
         获取用户对特定RSS的喜好
         """
-        result = self.collection.find_one({"feed_id": feed_id})
-        return self._convert_objectid(result) if result else None
+        return self.preference_cache.get(feed_id)
     
     def get_all_preferences(self):
         """
         获取所有用户喜好
         """
-        results = list(self.collection.find())
-        return self._convert_objectid(results)
+        return self.preference_cache.all()
     
+    def get_preferences(self, feed_ids):
+        """
+        获取指定条目的用户喜好
+        返回: {feed_id: 喜好}，没有喜好的条目不包含在内
+        """
+        return self.preference_cache.get_many(feed_ids)
+
     def get_disliked_reasons(self):
         """
         获取所有不喜欢的原因
@@ -94,6 +134,113 @@ class MongoDBStorage:
         
         return self._convert_objectid(data)
     
+    def get_rss_source_urls(self):
+        """
+        获取所有RSS源的URL列表
+        """
+        return [source["url"] for source in self.rss_sources.find({}, {"url": 1})]
+
+    def get_rss_source_ids(self, urls):
+        """
+        按URL查找订阅源ID
+        返回: {url: 订阅源ID字符串}
+        """
+        sources = self.rss_sources.find({"url": {"$in": list(urls)}}, {"url": 1})
+        return {source["url"]: str(source["_id"]) for source in sources}
+
+    def bulk_add_rss_sources(self, sources):
+        """
+        批量添加RSS源，一次 bulk_write 写入
+        sources: [{"url": ..., "name": ...}, ...]
+        返回: 插入的数量
+        """
+        if not sources:
+            return 0
+        now = datetime.now()
+        result = self.rss_sources.bulk_write([
+            InsertOne({
+                "url": source["url"],
+                "name": source.get("name", ""),
+                "created_at": now,
+                "updated_at": now
+            })
+            for source in sources
+        ], ordered=False)
+        return result.inserted_count
+
+    def record_feed_duplicates(self, duplicates):
+        """
+        记录近似重复的文章，关联到已存储的原文
+        duplicates: [{"link", "title", "source", "canonical_link", "original_link", "original_feed_id", "distance"}, ...]
+        以规范链接为 _id，重复抓取到同一条目时只更新最后出现时间
+        """
+        if not duplicates:
+            return 0
+        now = datetime.now()
+        result = self.feed_duplicates.bulk_write([
+            UpdateOne(
+                {"_id": duplicate["canonical_link"]},
+                {
+                    "$set": {
+                        "link": duplicate["link"],
+                        "title": duplicate.get("title"),
+                        "source": duplicate.get("source"),
+                        "original_link": duplicate["original_link"],
+                        "original_feed_id": duplicate["original_feed_id"],
+                        "distance": duplicate["distance"],
+                        "last_seen_at": now,
+                    },
+                    "$setOnInsert": {"first_seen_at": now},
+                },
+                upsert=True
+            )
+            for duplicate in duplicates
+        ], ordered=False)
+        return result.upserted_count
+
+    def get_feed_duplicates(self, feed_id):
+        """
+        获取关联到某篇原文的近似重复文章
+        feed_id: 原文的 feed ID
+        """
+        return list(self.feed_duplicates.find({"original_feed_id": feed_id}).sort("first_seen_at", 1))
+
+    def enqueue_resummary(self, items):
+        """
+        将抽取式摘要的条目加入重新摘要队列
+        items: [{"feed_id", "link", "payload"}, ...]，payload 为发送给模型的精简条目
+        """
+        if not items:
+            return 0
+        now = datetime.now()
+        result = self.resummary_queue.bulk_write([
+            UpdateOne(
+                {"_id": item["feed_id"]},
+                {
+                    "$set": {"link": item["link"], "payload": item["payload"]},
+                    "$setOnInsert": {"attempts": 0, "created_at": now},
+                },
+                upsert=True
+            )
+            for item in items
+        ], ordered=False)
+        return result.upserted_count
+
+    def get_resummary_items(self, limit):
+        """获取待重新摘要的条目，尝试次数少、加入早的优先"""
+        return list(self.resummary_queue.find().sort([("attempts", 1), ("created_at", 1)]).limit(limit))
+
+    def complete_resummary(self, done_ids, failed_ids):
+        """
+        更新重新摘要队列
+        done_ids: 已完成的条目，从队列中删除
+        failed_ids: 本次未完成的条目，增加尝试次数
+        """
+        if done_ids:
+            self.resummary_queue.delete_many({"_id": {"$in": done_ids}})
+        if failed_ids:
+            self.resummary_queue.update_many({"_id": {"$in": failed_ids}}, {"$inc": {"attempts": 1}})
+
     def get_all_rss_sources(self):
         """
         获取所有RSS源
@@ -126,15 +273,18 @@ class MongoDBStorage:
             
             # 构建更新数据
             update_data = {"updated_at": datetime.now()}
+            update = {"$set": update_data}
             if url:
                 update_data["url"] = url
+                # URL变化后旧的条件请求标识不再有效
+                update["$unset"] = {"etag": "", "modified": ""}
             if name:
                 update_data["name"] = name
             
             # 更新记录
             result = self.rss_sources.update_one(
                 {"_id": source_id},
-                {"$set": update_data}
+                update
             )
             
             # 如果记录存在并已更新
@@ -148,6 +298,91 @@ class MongoDBStorage:
             print(f"更新RSS源出错: {e}")
             return None
     
+    def record_rss_fetch(self, source, status, elapsed, content_length=None):
+        """
+        记录RSS源的抓取结果并累计统计数据
+        条件请求标识在条目存储成功后由 save_rss_validators 保存
+        source: rss_sources 中的订阅源文档
+        status: HTTP状态码
+        elapsed: 本次抓取耗时（秒）
+        content_length: 本次响应的字节数，可选
+        """
+        now = datetime.now()
+        stats = source.get("fetch_stats") or {}
+        update_data = {
+            "fetch_stats.last_status": status,
+            "fetch_stats.last_fetched_at": now,
+        }
+        increments = {}
+
+        if status == 304:
+            # 未变化时按上一次完整抓取的大小和耗时估算节省量
+            increments["fetch_stats.not_modified_count"] = 1
+            increments["fetch_stats.bytes_saved"] = stats.get("last_content_length") or 0
+            increments["fetch_stats.time_saved"] = max(0.0, (stats.get("last_fetch_seconds") or 0) - elapsed)
+        else:
+            increments["fetch_stats.full_fetch_count"] = 1
+            update_data["fetch_stats.last_fetch_seconds"] = elapsed
+            if content_length is not None:
+                update_data["fetch_stats.last_content_length"] = content_length
+
+        self.rss_sources.update_one(
+            {"_id": source["_id"]},
+            {"$set": update_data, "$inc": increments}
+        )
+
+    def save_rss_validators(self, source_id, etag=None, modified=None):
+        """
+        保存 ETag/Last-Modified，下次抓取时发起条件请求
+        只能在本次抓取的条目全部存储成功后调用，否则下次得到 304，未存储的条目不会再被抓取
+        """
+        update_data = {}
+        if etag:
+            update_data["etag"] = etag
+        if modified:
+            update_data["modified"] = modified
+        if update_data:
+            self.rss_sources.update_one({"_id": source_id}, {"$set": update_data})
+
+    def get_rss_fetch_stats(self):
+        """
+        获取每个RSS源的条件请求统计
+        返回格式: {"sources": [...], "total": {...}}
+        """
+        sources = list(self.rss_sources.find(
+            {},
+            {"url": 1, "name": 1, "etag": 1, "modified": 1, "fetch_stats": 1}
+        ).sort("created_at", -1))
+
+        total = {"full_fetch_count": 0, "not_modified_count": 0, "bytes_saved": 0, "time_saved": 0.0}
+        for source in sources:
+            stats = source.get("fetch_stats") or {}
+            for key in total:
+                total[key] += stats.get(key) or 0
+
+        return {"sources": self._convert_objectid(sources), "total": total}
+
+    def update_rss_source_health(self, source_id, health):
+        """
+        更新RSS源的健康状态
+        source_id: RSS源ID
+        health: 健康状态字典
+        """
+        self.rss_sources.update_one(
+            {"_id": ObjectId(source_id)},
+            {"$set": {"health": health}}
+        )
+
+    def get_rss_sources_health(self):
+        """
+        获取所有RSS源的健康状态，按最近一次耗时从慢到快排序
+        """
+        sources = list(self.rss_sources.find(
+            {},
+            {"url": 1, "name": 1, "health": 1}
+        ).sort("health.last_latency", -1))
+        return self._convert_objectid(sources)
+
     def store_rss_url(self, url, name=None):
         """
         存储RSS URL
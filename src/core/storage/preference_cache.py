@@ -0,0 +1,124 @@
+"""
+用户喜好缓存
+
+进程内以 feed_id 为键保存全部用户喜好，首次使用时从 Mongo 加载一次，
+store_preference 写入后直接更新本地副本，请求路径上的查询只是字典读取。
+每次写入都会递增 cache_versions 集合中的版本号，其他进程定期比较这个版本号，
+发现落后时重新加载，只读取一个很小的文档，不用每次请求都读取整个集合。
+"""
+import threading
+import time
+from pymongo import ReturnDocument
+from src.core.utils.config import get_env_variable
+
+# 检查其他进程是否有写入的最小间隔（秒）
+PREFERENCE_VERSION_CHECK_INTERVAL = float(get_env_variable("PREFERENCE_VERSION_CHECK_INTERVAL", "2"))
+
+
+def _to_preference(document):
+    return {**document, "_id": str(document["_id"])}
+
+
+class PreferenceCache:
+    # 每个集合共享一份缓存
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, collection, versions, check_interval=PREFERENCE_VERSION_CHECK_INTERVAL):
+        self.collection = collection
+        self.versions = versions
+        self.version_key = collection.name
+        self.check_interval = check_interval
+        # {feed_id: 喜好}
+        self._preferences = {}
+        self._version = None
+        self._checked_at = 0
+        self._stats = {"reloads": 0, "version_checks": 0}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @classmethod
+    def for_collection(cls, collection, versions):
+        """获取集合对应的共享缓存"""
+        with cls._instances_lock:
+            cache = cls._instances.get(collection.full_name)
+            if cache is None:
+                cache = cls(collection, versions)
+                cls._instances[collection.full_name] = cache
+        return cache
+
+    def _remote_version(self):
+        document = self.versions.find_one({"_id": self.version_key})
+        return document.get("version", 0) if document else 0
+
+    def _reload(self):
+        with self._load_lock:
+            # 先读版本号再读数据，加载期间的写入会在下次检查时再触发加载
+            version = self._remote_version()
+            preferences = {pref["feed_id"]: _to_preference(pref) for pref in self.collection.find()}
+            with self._lock:
+                self._preferences = preferences
+                self._version = version
+                self._checked_at = time.monotonic()
+                self._stats["reloads"] += 1
+
+    def _refresh(self):
+        """首次使用时加载，之后按间隔比较版本号"""
+        if self._version is None:
+            self._reload()
+            return
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self._stats["version_checks"] += 1
+        if self._remote_version() != self._version:
+            self._reload()
+
+    def get(self, feed_id):
+        self._refresh()
+        with self._lock:
+            pref = self._preferences.get(feed_id)
+        return dict(pref) if pref else None
+
+    def get_many(self, feed_ids):
+        """
+        获取多个条目的喜好
+        返回: {feed_id: 喜好}，没有喜好的条目不包含在内
+        """
+        self._refresh()
+        with self._lock:
+            return {
+                feed_id: dict(self._preferences[feed_id])
+                for feed_id in feed_ids if feed_id in self._preferences
+            }
+
+    def all(self):
+        self._refresh()
+        with self._lock:
+            return [dict(pref) for pref in self._preferences.values()]
+
+    def record(self, feed_id):
+        """写入喜好后调用：更新本地副本并递增版本号，通知其他进程"""
+        document = self.collection.find_one({"feed_id": feed_id})
+        version = self.versions.find_one_and_update(
+            {"_id": self.version_key},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )["version"]
+        with self._lock:
+            # 本地副本未加载或落后于其他进程时，下次读取重新加载
+            if self._version is None or version != self._version + 1:
+                self._version = -1
+                self._checked_at = 0
+                return
+            if document:
+                self._preferences[feed_id] = _to_preference(document)
+            else:
+                self._preferences.pop(feed_id, None)
+            self._version = version
+
+    def stats(self):
+        with self._lock:
+            return {"preferences": len(self._preferences), "version": self._version, **self._stats}
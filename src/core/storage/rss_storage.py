@@ -1,8 +1,10 @@
-import chromadb
-from chromadb.config import Settings
-from datetime import datetime
+import hashlib
 from src.core.utils.config import get_env_variable
+from src.core.storage.connections import connections
 from src.core.storage.mongodb_storage import MongoDBStorage
+from src.core.storage.dedup_index import FeedDedupIndex
+from src.core.utils.url import normalize_link, canonical_link
+from src.core.utils.dates import normalize_published, published_from_timestamp, day_range_to_ts
 
 CHROMA_COLLECTION_NAME = get_env_variable("CHROMA_COLLECTION_NAME")
 CHROMA_HOST = get_env_variable("CHROMA_HOST")
@@ -10,37 +12,63 @@ CHROMA_PORT = get_env_variable("CHROMA_PORT")
 
 class RSSStorage:
     def __init__(self, collection_name=CHROMA_COLLECTION_NAME, host=CHROMA_HOST, port=CHROMA_PORT):
-        # 连接到Chroma服务
-        self.client = chromadb.HttpClient(
-            host=host,
-            port=port
-        )
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
+        # 连接到Chroma服务，客户端和集合句柄在进程内共享
+        self.client = connections.chroma_client(host, port)
+        self.collection = connections.chroma_collection(
+            collection_name, host, port,
             metadata={"description": "RSS feed storage"}
         )
         # 初始化MongoDB存储
         self.mongo_storage = MongoDBStorage()
+        # 进程内共享的去重索引
+        self.dedup_index = FeedDedupIndex.for_collection(self.collection)
+        # 列表、过滤和计数使用 Mongo 中的条目目录，Chroma 只用于相似度查询
+        self.feed_catalog = self.mongo_storage.feed_catalog
+        self.date_histogram = self.mongo_storage.date_histogram
     
     def check_has_feed(self, feed_data):
         # 检查是否已经存在相同的feed（通过link或title+source判断）
-        existing_feeds = self.collection.get(
-            where={
-                "$or": [
-                    {"link": feed_data['link']}, 
-                    {"$and": [
-                        {"title": feed_data['title']},
-                        {"source": feed_data.get('source', '')}
-                    ]}
-                ]
-            }
-        )
-        # 如果找到匹配的结果，不再添加
-        if existing_feeds and 'ids' in existing_feeds and existing_feeds['ids']:
-            # 已经存在，不添加
-            return True
-        return False
+        return not self.dedup_index.filter_new([feed_data])
+
+    def filter_new_feeds(self, feeds):
+        """
+        批量去重，返回尚未存储的feed
+        与已存储文章近似重复的条目不再返回，只在 feed_duplicates 中关联到原文
+        feeds: 包含title, link, source, summary的字典列表
+        """
+        unique, duplicates = self.dedup_index.split_near_duplicates(self.dedup_index.filter_new(feeds))
+        if duplicates:
+            self.mongo_storage.record_feed_duplicates([
+                {
+                    "link": feed_data['link'],
+                    "title": feed_data.get('title'),
+                    "source": feed_data.get('source'),
+                    "canonical_link": canonical_link(feed_data['link']),
+                    "original_link": original_link,
+                    "original_feed_id": self.feed_id(original_link),
+                    "distance": distance,
+                }
+                for feed_data, original_link, distance in duplicates
+            ])
+            # 近似重复的条目也加入去重索引，之后再抓取到时直接按链接过滤
+            for feed_data, _, _ in duplicates:
+                self.dedup_index.add({
+                    "link": feed_data['link'],
+                    "canonical_link": canonical_link(feed_data['link']),
+                    "title": feed_data.get('title'),
+                    "source": feed_data.get('source'),
+                })
+        return unique
         
+    @staticmethod
+    def feed_id(link):
+        """
+        根据规范化后的链接生成确定性的feed ID
+        不使用去掉跟踪参数的规范链接，避免误删的参数让不同文章共用一个ID；
+        带跟踪参数的同一篇文章在去重时按规范链接识别
+        """
+        return "feed_" + hashlib.sha1(normalize_link(link).encode("utf-8")).hexdigest()
+
     def store_feed(self, feed_data):
         """
         存储RSS feed数据
@@ -50,27 +78,95 @@ class RSSStorage:
         if self.check_has_feed(feed_data):
             return None
         
-        # 生成唯一ID
-        doc_id = f"feed_{datetime.now().timestamp()}"
-        
-        # 准备存储数据
-        documents = [f"{feed_data['title']}"]
-        metadatas = [{
-            "title": feed_data['title'],
-            "link": feed_data['link'],
-            "published": feed_data['published'],
-            "source": feed_data.get('source'),
-            "summary": feed_data.get('summary')
-        }]
-        
+        return self.store_feeds([feed_data])[0]
+
+    def store_feeds(self, feeds):
+        """
+        批量存储RSS feed数据，整批只调用一次 upsert
+        ID 由链接哈希得到，重复写入同一条目是幂等的
+        feeds: 包含title, link, published 等信息的字典列表
+        返回: 存储的ID列表
+        """
+        ids = []
+        documents = []
+        metadatas = []
+        for feed_data in feeds:
+            doc_id = self.feed_id(feed_data['link'])
+            # 同一批次内的重复链接只保留第一条
+            if doc_id in ids:
+                continue
+            ids.append(doc_id)
+            documents.append(f"{feed_data['title']}")
+            # 抓取时已规范化的发布时间直接使用，否则在这里补算
+            if feed_data.get('published_ts') is None:
+                published = normalize_published(feed_data['published'])
+            else:
+                published = feed_data
+            metadata = {
+                "title": feed_data['title'],
+                "link": feed_data['link'],
+                "canonical_link": canonical_link(feed_data['link']),
+                "published": published['published'],
+                "published_ts": published['published_ts'],
+                "published_day": published['published_day'],
+                "source": feed_data.get('source'),
+                "summary": feed_data.get('summary')
+            }
+            # 抽取式摘要的条目等待模型重新摘要
+            metadata["summary_mode"] = feed_data.get('summary_mode') or 'llm'
+            metadata["needs_resummary"] = metadata["summary_mode"] == 'extractive'
+            # Chroma 元数据不能为 None，没有指纹时不写入
+            if feed_data.get('simhash'):
+                metadata["simhash"] = feed_data['simhash']
+            metadatas.append(metadata)
+
+        if not ids:
+            return []
+
         # 存储到Chroma
-        self.collection.add(
+        self.collection.upsert(
             documents=documents,
             metadatas=metadatas,
-            ids=[doc_id]
+            ids=ids
+        )
+        # 同一步骤写入条目目录
+        source_ids = self.mongo_storage.get_rss_source_ids(
+            {metadata['source'] for metadata in metadatas if metadata.get('source')}
         )
-        return doc_id
+        new_ids = set(self.feed_catalog.upsert(ids, metadatas, source_ids))
+        # 只有新条目计入日期统计，重复写入不会重复计数
+        self.date_histogram.increment([
+            (metadata['published_day'], source_ids.get(metadata.get('source')))
+            for doc_id, metadata in zip(ids, metadatas) if doc_id in new_ids
+        ])
+        for metadata in metadatas:
+            self.dedup_index.add(metadata)
+        return ids
     
+    def update_summaries(self, feeds):
+        """
+        用模型生成的标题和摘要替换已存储条目的抽取式摘要
+        feeds: 包含 link, title, summary 的字典列表
+        """
+        if not feeds:
+            return
+        ids = [self.feed_id(feed_data['link']) for feed_data in feeds]
+        metadatas = [
+            {
+                "title": feed_data['title'],
+                "summary": feed_data['summary'],
+                "summary_mode": "llm",
+                "needs_resummary": False,
+            }
+            for feed_data in feeds
+        ]
+        self.collection.update(
+            ids=ids,
+            documents=[f"{feed_data['title']}" for feed_data in feeds],
+            metadatas=metadatas
+        )
+        self.feed_catalog.update_summaries(ids, metadatas)
+
     def search_feeds(self, query, n_results=5):
         """
         搜索RSS feed
@@ -90,8 +186,8 @@ class RSSStorage:
                 
                 # 如果成功导入，使用推荐系统对结果进行排序
                 if recommender and hasattr(recommender, '_compute_preference_score'):
-                    # 获取所有用户喜好
-                    preferences = {pref["feed_id"]: pref for pref in self.mongo_storage.get_all_preferences()}
+                    # 获取结果条目的用户喜好
+                    preferences = self.mongo_storage.get_preferences(results['ids'][0] if results.get('ids') else [])
                     
                     # 处理结果
                     if 'ids' in results and results['ids'] and len(results['ids'][0]) > 0:
@@ -160,125 +256,45 @@ class RSSStorage:
             print(f"搜索出错: {e}")
             return {'ids': [[]], 'documents': [[]], 'metadatas': [[]]}
     
-    def get_all_feeds(self, limit=20, date=None):
+    def get_all_feeds(self, limit=20, date=None, start_date=None, end_date=None, source_id=None, preference=None, before=None, after=None):
         """
-        获取所有RSS feed
-        limit: 限制返回结果数量
+        获取RSS feed，按发布时间从新到旧排序，从条目目录分页读取
+        limit: 每页返回结果数量
         date: 可选，按日期过滤，格式为 YYYY-MM-DD
+        start_date/end_date: 可选，按日期范围过滤，格式为 YYYY-MM-DD
+        source_id: 可选，按订阅源ID过滤
+        preference: 可选，按喜好状态过滤：liked/disliked/unmarked
+        before/after: 可选，上一页结果中的 next_cursor/prev_cursor
+        返回: ids/documents/metadatas 结构的结果，附带 next_cursor 和 prev_cursor
         """
-        # 获取所有数据
-        results = self.collection.get()
-        
-        # 如果结果为空或格式不符合预期，返回空结果
-        if not results or 'ids' not in results or not results['ids']:
-            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]]}
-        
-        # 如果指定了日期，进行过滤
-        if date:
-            filtered_ids = []
-            filtered_documents = []
-            filtered_metadatas = []
-            
-            for i, metadata in enumerate(results.get('metadatas', [])):
-                if 'published' in metadata:
-                    try:
-                        # 尝试多种日期格式
-                        try:
-                            published = datetime.strptime(metadata['published'], '%a, %d %b %Y %H:%M:%S %z')
-                        except ValueError:
-                            try:
-                                published = datetime.strptime(metadata['published'], '%Y-%m-%d %H:%M:%S')
-                            except ValueError:
-                                try:
-                                    published = datetime.strptime(metadata['published'], '%Y-%m-%d')
-                                except ValueError:
-                                    # 添加对ISO格式的支持
-                                    published = datetime.strptime(metadata['published'], '%Y-%m-%dT%H:%M:%SZ')
-                        
-                        if published.strftime('%Y-%m-%d') == date:
-                            filtered_ids.append(results['ids'][i])
-                            filtered_documents.append(results['documents'][i])
-                            filtered_metadatas.append(metadata)
-                    except (ValueError, TypeError):
-                        continue
-            
-            results = {
-                'ids': [filtered_ids],
-                'documents': [filtered_documents],
-                'metadatas': [filtered_metadatas]
-            }
-        
-        # 为结果添加喜好信息，但不排序
-        preferences = {pref["feed_id"]: pref for pref in self.mongo_storage.get_all_preferences()}
-        
-        # 确保数据结构正确
-        if 'ids' in results and results['ids'] and len(results['ids']) > 0:
-            if isinstance(results['ids'][0], list):
-                # 添加用户偏好信息
-                for i, doc_id in enumerate(results['ids'][0]):
-                    pref = preferences.get(doc_id, None)
-                    if 'metadatas' in results and results['metadatas'] and i < len(results['metadatas'][0]):
-                        results['metadatas'][0][i]['user_preference'] = pref
-                        
-                # 按日期排序（从新到旧）
-                if 'metadatas' in results and results['metadatas'] and len(results['metadatas'][0]) > 0:
-                    items = []
-                    for i in range(len(results['ids'][0])):
-                        item = {
-                            'id': results['ids'][0][i],
-                            'document': results['documents'][0][i] if 'documents' in results and results['documents'] else None,
-                            'metadata': results['metadatas'][0][i] if 'metadatas' in results and results['metadatas'] else {}
-                        }
-                        items.append(item)
-                    
-                    # 按发布日期排序
-                    def sort_key(item):
-                        try:
-                            metadata = item['metadata']
-                            if 'published' in metadata:
-                                try:
-                                    return datetime.strptime(metadata['published'], '%a, %d %b %Y %H:%M:%S %z')
-                                except ValueError:
-                                    try:
-                                        return datetime.strptime(metadata['published'], '%Y-%m-%d %H:%M:%S')
-                                    except ValueError:
-                                        try:
-                                            return datetime.strptime(metadata['published'], '%Y-%m-%d')
-                                        except ValueError:
-                                            # 添加对ISO格式的支持
-                                            return datetime.strptime(metadata['published'], '%Y-%m-%dT%H:%M:%SZ')
-                        except (ValueError, TypeError):
-                            pass
-                        return datetime(1970, 1, 1)  # 默认日期为早期时间
-                    
-                    # 按日期从新到旧排序
-                    items.sort(key=sort_key, reverse=True)
-                    
-                    # 限制结果数量
-                    items = items[:limit]
-                    
-                    # 重构结果
-                    results = {
-                        'ids': [[item['id'] for item in items]],
-                        'documents': [[item['document'] for item in items]] if 'documents' in results else None,
-                        'metadatas': [[item['metadata'] for item in items]] if 'metadatas' in results else None
-                    }
-            else:
-                # 数据是平面结构，需要转为嵌套结构
-                results['ids'] = [results['ids']]
-                if 'documents' in results and results['documents']:
-                    results['documents'] = [results['documents']]
-                if 'metadatas' in results and results['metadatas']:
-                    results['metadatas'] = [results['metadatas']]
-        
-        return results
+        start_ts, end_ts = day_range_to_ts(start_date, end_date)
+        documents, next_cursor, prev_cursor = self.feed_catalog.page(
+            limit, before=before, after=after, source_id=source_id,
+            start_ts=start_ts, end_ts=end_ts, day=date, preference=preference
+        )
+
+        # 为结果添加喜好信息
+        preferences = self.mongo_storage.get_preferences([document['_id'] for document in documents])
+        metadatas = []
+        for document in documents:
+            metadata = self.feed_catalog.to_metadata(document)
+            metadata['user_preference'] = preferences.get(document['_id'], None)
+            metadatas.append(metadata)
+
+        return {
+            'ids': [[document['_id'] for document in documents]],
+            'documents': [[document.get('title') for document in documents]],
+            'metadatas': [metadatas],
+            'next_cursor': next_cursor,
+            'prev_cursor': prev_cursor
+        }
     
     def _rank_results_by_preference(self, results):
         """
         根据用户喜好对结果进行排序
         """
-        # 获取所有用户喜好
-        preferences = {pref["feed_id"]: pref for pref in self.mongo_storage.get_all_preferences()}
+        # 获取结果条目的用户喜好
+        preferences = self.mongo_storage.get_preferences(results.get('ids', [[]])[0])
         
         # 为结果添加喜好信息
         for i, doc_id in enumerate(results.get('ids', [[]])[0]):
@@ -330,51 +346,149 @@ class RSSStorage:
         """
         return self.mongo_storage.store_preference(feed_id, is_liked, reason)
     
-    def get_dates_with_data(self):
+    def get_feeds_stored_between(self, since, until, limit=1000):
+        """
+        获取在 (since, until] 期间新存储的RSS feed
+        since: 上次汇总的时间，为 None 时不限制起点
+        返回: 元数据列表，按存储时间从新到旧排序
+        """
+        return [
+            self.feed_catalog.to_metadata(document)
+            for document in self.feed_catalog.stored_between(since, until, limit)
+        ]
+
+    def get_dates_with_data(self, source_id=None):
         """
         获取所有有RSS数据的日期列表
+        source_id: 可选，只统计该订阅源的条目
         返回格式: [{"date": "2024-03-20", "count": 10}, ...]
         """
-        # 获取所有数据
-        results = self.collection.get()
-        # 统计每个日期的数据量
-        date_counts = {}
-        for metadata in results.get('metadatas', []):
-            if 'published' in metadata:
-                try:
-                    # 解析日期
-                    dt = None
-                    try:
-                        published = datetime.strptime(metadata['published'], '%a, %d %b %Y %H:%M:%S %z')
-                        dt = published
-                    except ValueError:
-                        try:
-                            published = datetime.strptime(metadata['published'], '%Y-%m-%d %H:%M:%S')
-                            dt = published
-                        except ValueError:
-                            try:
-                                published = datetime.strptime(metadata['published'], '%Y-%m-%d')
-                                dt = published
-                            except ValueError:
-                                # ISO格式
-                                published = datetime.strptime(metadata['published'], '%Y-%m-%dT%H:%M:%SZ')
-                                dt = published
-                    
-                    # 使用本地时区的日期，确保与前端日期格式匹配
-                    date_str = dt.strftime('%Y-%m-%d')
-                    
-                    # 更新计数
-                    date_counts[date_str] = date_counts.get(date_str, 0) + 1
-                except (ValueError, TypeError):
+        return self.date_histogram.dates(source_id)
+
+    def rebuild_date_histogram(self):
+        """
+        按条目目录重新统计日期数量
+        返回: 有数据的天数
+        """
+        return self.date_histogram.rebuild(self.feed_catalog.count_by_day())
+
+    def delete_feeds(self, ids):
+        """
+        删除RSS feed，同时从条目目录和日期统计中移除
+        ids: feed ID 列表
+        返回: 删除的条目数
+        """
+        ids = list(ids)
+        if not ids:
+            return 0
+        documents = self.feed_catalog.get_many(ids, {"published_day": 1, "source_id": 1})
+        self.collection.delete(ids=ids)
+        deleted = self.feed_catalog.delete(ids)
+        self.date_histogram.increment(
+            [(document.get('published_day'), document.get('source_id')) for document in documents], delta=-1
+        )
+        return deleted
+
+    def clear_feeds(self, batch_size=500):
+        """
+        清空全部已存储的RSS feed，以及由条目派生的目录、日期统计、摘要缓存、重新摘要队列和近似重复记录
+        订阅源和用户喜好保留
+        返回: 删除的条目数
+        """
+        deleted = 0
+        while True:
+            ids = self.collection.get(include=[], limit=batch_size).get('ids') or []
+            if not ids:
+                break
+            self.delete_feeds(ids)
+            deleted += len(ids)
+        # 只在目录中存在的条目一并清除，再按空目录重建日期统计
+        self.feed_catalog.clear()
+        self.rebuild_date_histogram()
+        self.mongo_storage.clear_feed_records()
+        return deleted
+
+    def migrate_published_metadata(self, batch_size=500):
+        """
+        一次性迁移：为旧数据补充 published_ts 和 published_day，
+        并把按订阅源时区保存的 published 和 published_day 按时间戳改为 UTC
+        返回: 更新的条目数
+        """
+        updated = 0
+        offset = 0
+        while True:
+            results = self.collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            ids = results.get('ids') or []
+            if not ids:
+                break
+
+            update_ids = []
+            update_metadatas = []
+            for doc_id, metadata in zip(ids, results.get('metadatas') or []):
+                if metadata.get('published_ts') is None or metadata.get('published_day') is None:
+                    metadata.update(normalize_published(metadata.get('published')))
+                elif metadata['published_ts']:
+                    utc = published_from_timestamp(metadata['published_ts'])
+                    if utc['published'] == metadata.get('published') and utc['published_day'] == metadata['published_day']:
+                        continue
+                    metadata.update(utc)
+                else:
                     continue
-        
-        # 转换为列表格式并按日期排序
-        date_list = [{"date": date, "count": count} 
-                    for date, count in date_counts.items()]
-        date_list.sort(key=lambda x: x['date'], reverse=True)
-        
-        return date_list
+                update_ids.append(doc_id)
+                update_metadatas.append(metadata)
+
+            if update_ids:
+                self.collection.update(ids=update_ids, metadatas=update_metadatas)
+                source_ids = self.mongo_storage.get_rss_source_ids(
+                    {metadata['source'] for metadata in update_metadatas if metadata.get('source')}
+                )
+                self.feed_catalog.upsert(update_ids, update_metadatas, source_ids, backfill=True)
+                updated += len(update_ids)
+
+            if len(ids) < batch_size:
+                break
+            offset += batch_size
+
+        # 日期变化后按条目目录重新统计
+        if updated:
+            self.rebuild_date_histogram()
+        return updated
     
+    def sync_feed_catalog(self, batch_size=500):
+        """
+        从 Chroma 补齐条目目录，并同步已有的喜好状态
+        重复执行是幂等的
+        返回: 同步的条目数
+        """
+        synced = 0
+        offset = 0
+        while True:
+            results = self.collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            ids = results.get('ids') or []
+            if not ids:
+                break
+
+            metadatas = []
+            for metadata in results.get('metadatas') or []:
+                if metadata.get('published_ts') is None:
+                    metadata.update(normalize_published(metadata.get('published')))
+                metadatas.append(metadata)
+            source_ids = self.mongo_storage.get_rss_source_ids(
+                {metadata['source'] for metadata in metadatas if metadata.get('source')}
+            )
+            self.feed_catalog.upsert(ids, metadatas, source_ids, backfill=True)
+            synced += len(ids)
+
+            if len(ids) < batch_size:
+                break
+            offset += batch_size
+
+        for pref in self.mongo_storage.get_all_preferences():
+            self.feed_catalog.set_preference(pref['feed_id'], pref['is_liked'])
+        # 补齐的条目没有经过增量计数，重新统计
+        self.rebuild_date_histogram()
+        return synced
+
     def store_rss_url(self, url, name=None):
         """
         存储RSS URL
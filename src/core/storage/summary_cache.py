@@ -0,0 +1,118 @@
+"""
+LLM 摘要缓存
+
+按 (title, link, summary, 提示词版本) 的哈希缓存 AI 生成的 AITitle/AISummary，
+MongoDB 持久化，前面加一层进程内 LRU。
+同一篇文章出现在多个 feed 或批次失败后重发时，不再重复调用模型。
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pymongo import UpdateOne
+from src.core.utils.config import get_env_variable
+from src.core.models.summary_planner import estimate_entry_tokens
+
+# 进程内 LRU 的最大条目数
+SUMMARY_CACHE_SIZE = int(get_env_variable("RSS_SUMMARY_CACHE_SIZE", "10000"))
+
+
+class SummaryCache:
+    def __init__(self, db, prompt, max_size=SUMMARY_CACHE_SIZE, collection_name="summary_cache"):
+        self.collection = db[collection_name]
+        # 提示词变化后旧缓存自动失效
+        self.prompt_version = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+        self.max_size = max_size
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "mongo_hits": 0,
+            "misses": 0,
+            "saved_tokens": 0,
+        }
+
+    def key(self, entry):
+        """计算条目的缓存键"""
+        raw = json.dumps(
+            [entry.get('title'), entry.get('link'), entry.get('summary'), self.prompt_version],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._lru[key] = value
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def _record_hit(self, entry, source):
+        input_tokens, output_tokens = estimate_entry_tokens(entry)
+        with self._lock:
+            self._stats[source] += 1
+            self._stats["saved_tokens"] += input_tokens + output_tokens
+
+    def lookup(self, entries):
+        """
+        批量查询缓存
+        entries: 待摘要的条目列表
+        返回: (hits, misses)，hits 为 {link: {"AITitle", "AISummary", "link"}}，misses 为未命中的条目列表
+        """
+        hits = {}
+        pending = {}
+        for entry in entries:
+            key = self.key(entry)
+            with self._lock:
+                value = self._lru.get(key)
+                if value is not None:
+                    self._lru.move_to_end(key)
+            if value is not None:
+                hits[entry['link']] = dict(value, link=entry['link'])
+                self._record_hit(entry, "memory_hits")
+            else:
+                pending[key] = entry
+
+        # 内存未命中的条目一次性查询 MongoDB
+        if pending:
+            for doc in self.collection.find({"_id": {"$in": list(pending.keys())}}):
+                entry = pending.pop(doc["_id"])
+                value = {"AITitle": doc.get("AITitle"), "AISummary": doc.get("AISummary")}
+                self._remember(doc["_id"], value)
+                hits[entry['link']] = dict(value, link=entry['link'])
+                self._record_hit(entry, "mongo_hits")
+
+        misses = list(pending.values())
+        with self._lock:
+            self._stats["misses"] += len(misses)
+        return hits, misses
+
+    def store(self, pairs):
+        """
+        写入缓存
+        pairs: [(原始条目, AI 生成的条目), ...]
+        """
+        operations = []
+        now = datetime.now()
+        for entry, ai_entry in pairs:
+            key = self.key(entry)
+            value = {"AITitle": ai_entry.get('AITitle'), "AISummary": ai_entry.get('AISummary')}
+            self._remember(key, value)
+            operations.append(UpdateOne(
+                {"_id": key},
+                {"$set": dict(value, link=entry.get('link'), created_at=now)},
+                upsert=True
+            ))
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def stats(self):
+        """返回命中率和节省的 token 数"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._lru)
+        hits = stats["memory_hits"] + stats["mongo_hits"]
+        total = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / total, 4) if total else 0.0
+        return stats
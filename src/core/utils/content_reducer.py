@@ -0,0 +1,136 @@
+"""
+发送给 LLM 前的条目内容精简
+
+RSS 条目的 summary/content 往往是带标签、脚本和样式的完整 HTML 正文，
+而摘要只需要其中的文字。这里把条目转成纯文本，合并空白，
+去掉“阅读全文”“The post ... appeared first on ...”之类的模板文字，
+再按 token 预算截断，只保留 title、link 和精简后的正文。
+"""
+import re
+from html.parser import HTMLParser
+from src.core.utils.config import get_env_variable
+from src.core.utils.tokens import CJK_PATTERN
+
+# 单个条目正文的 token 预算
+SUMMARY_ENTRY_TOKEN_BUDGET = int(get_env_variable("RSS_SUMMARY_ENTRY_TOKEN_BUDGET", "800"))
+
+# 内容不参与摘要的标签
+SKIP_TAGS = {"script", "style", "noscript", "iframe", "svg", "template", "head"}
+# 块级标签，转换时在前后断行
+BLOCK_TAGS = {
+    "p", "div", "br", "li", "ul", "ol", "h1", "h2", "h3", "h4", "h5", "h6",
+    "blockquote", "pre", "table", "tr", "section", "article", "figure", "figcaption", "hr",
+}
+
+# 整行匹配的模板文字
+BOILERPLATE_PATTERNS = [
+    re.compile(r"^the post .+ appeared first on .+$", re.I),
+    re.compile(r"^(continue reading|read more|read the full (story|article|post)|click here)\b.*$", re.I),
+    re.compile(r"^(share this|follow us|subscribe)\b.*$", re.I),
+    re.compile(r"^\d+\s+comments?$", re.I),
+    re.compile(r"^(阅读全文|阅读原文|继续阅读|查看原文|点击查看|原文链接|本文首发于|转载请注明|分享到|关注我们).*$"),
+]
+# 结尾的省略标记
+TRAILING_ELLIPSIS = re.compile(r"\s*\[(…|\.\.\.|&#8230;)\]\s*$")
+WHITESPACE = re.compile(r"\s+")
+# 截断时回退查找断点的最大字符数
+BREAK_SEARCH_CHARS = 40
+BREAK_CHARS = " 。！？；，.!?;,"
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    """去掉 HTML 标签、脚本和样式，返回按块断行的文本"""
+    if not html:
+        return ""
+    if "<" not in html and "&" not in html:
+        return html
+    extractor = _TextExtractor()
+    extractor.feed(html)
+    extractor.close()
+    return "".join(extractor.parts)
+
+
+def clean_text(text):
+    """去掉模板文字并合并空白"""
+    lines = []
+    for line in text.splitlines():
+        line = WHITESPACE.sub(" ", line).strip()
+        if line and not any(pattern.match(line) for pattern in BOILERPLATE_PATTERNS):
+            lines.append(line)
+    return TRAILING_ELLIPSIS.sub("", " ".join(lines))
+
+
+def truncate_to_tokens(text, max_tokens):
+    """
+    按估算的 token 数截断文本，尽量在空白或标点处断开
+    估算方式与 estimate_tokens 一致：中日韩字符每字 1 个 token，其余每 4 个字符 1 个 token
+    """
+    if max_tokens <= 0:
+        return text
+    budget = max_tokens * 4
+    for index, char in enumerate(text):
+        budget -= 4 if CJK_PATTERN.match(char) else 1
+        if budget < 0:
+            break
+    else:
+        return text
+
+    cut = index
+    for offset in range(cut, max(0, cut - BREAK_SEARCH_CHARS), -1):
+        if text[offset - 1] in BREAK_CHARS:
+            cut = offset
+            break
+    return text[:cut].rstrip() + "…"
+
+
+def _content_html(content):
+    """合并 feedparser 格式的 content 列表"""
+    if not content:
+        return ""
+    if isinstance(content, str):
+        return content
+    return "\n".join(part.get("value") or "" for part in content if isinstance(part, dict))
+
+
+def reduce_entry(entry, max_tokens=SUMMARY_ENTRY_TOKEN_BUDGET):
+    """
+    生成发送给 LLM 的精简条目
+    entry: 包含 title, link, summary, content 的条目
+    返回: {"title", "link", "summary"}，summary 为正文和摘要中较完整的一份纯文本
+    """
+    summary = clean_text(html_to_text(entry.get("summary") or ""))
+    content = clean_text(html_to_text(_content_html(entry.get("content"))))
+    # summary 通常是正文的节选，正文更完整时只保留正文
+    body = content if len(content) > len(summary) else summary
+    return {
+        "title": clean_text(html_to_text(entry.get("title") or "")),
+        "link": entry.get("link"),
+        "summary": truncate_to_tokens(body, max_tokens),
+    }
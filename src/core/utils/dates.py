@@ -0,0 +1,98 @@
+"""
+发布时间规范化
+
+抓取时把各种格式的发布时间统一解析一次，存储为：
+- published: UTC 时间的 ISO 格式字符串，以 Z 结尾
+- published_ts: 整数时间戳，用于排序和范围过滤
+- published_day: UTC 日期 YYYY-MM-DD，用于按日期过滤和统计，与 day_range_to_ts 的日期范围一致
+读取时直接使用这些字段，不再逐条尝试多种格式解析。
+"""
+import calendar
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+ISO_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+DAY_FORMAT = '%Y-%m-%d'
+
+# 兼容旧数据的日期格式
+LEGACY_FORMATS = (
+    '%a, %d %b %Y %H:%M:%S %z',  # RFC 822 格式，如 'Fri, 16 May 2025 17:07:00 +0800'
+    '%Y-%m-%dT%H:%M:%SZ',        # ISO格式，如 '2025-05-16T00:05:44Z'
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d',
+)
+
+
+def parse_published(value):
+    """
+    解析发布时间字符串
+    返回: datetime，无法解析时返回 None
+    """
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+
+    # ISO 8601，兼容末尾的 Z
+    try:
+        return datetime.fromisoformat(value[:-1] + '+00:00' if value.endswith('Z') else value)
+    except ValueError:
+        pass
+
+    # RFC 822，RSS 2.0 的标准格式
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        pass
+
+    for fmt in LEGACY_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def to_timestamp(dt):
+    """转换为整数时间戳，无时区信息的时间按 UTC 处理"""
+    if dt.tzinfo is None:
+        return calendar.timegm(dt.timetuple())
+    return int(dt.timestamp())
+
+
+def published_from_timestamp(ts):
+    """
+    由时间戳生成 UTC 的发布时间字段
+    返回: {'published': ..., 'published_ts': ..., 'published_day': ...}
+    """
+    dt = datetime.fromtimestamp(ts, timezone.utc)
+    return {
+        'published': dt.strftime(ISO_FORMAT),
+        'published_ts': ts,
+        'published_day': dt.strftime(DAY_FORMAT),
+    }
+
+
+def normalize_published(value):
+    """
+    规范化发布时间，带时区的时间先转换为 UTC
+    返回: {'published': ..., 'published_ts': ..., 'published_day': ...}
+    无法解析时保留原始字符串，published_ts 为 0，published_day 为空字符串
+    """
+    dt = parse_published(value)
+    if dt is None:
+        return {'published': value or '', 'published_ts': 0, 'published_day': ''}
+    return published_from_timestamp(to_timestamp(dt))
+
+
+def day_range_to_ts(start_day=None, end_day=None):
+    """
+    将日期范围转换为时间戳范围（按 UTC 计算，end_day 当天包含在内）
+    返回: (start_ts, end_ts)，未提供的一端为 None
+    """
+    start_ts = None
+    end_ts = None
+    if start_day:
+        start_ts = calendar.timegm(datetime.strptime(start_day, DAY_FORMAT).timetuple())
+    if end_day:
+        end_ts = calendar.timegm(datetime.strptime(end_day, DAY_FORMAT).timetuple()) + 86400 - 1
+    return start_ts, end_ts
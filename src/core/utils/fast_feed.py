@@ -0,0 +1,195 @@
+"""
+RSS 2.0 / Atom 快速解析
+
+基于 ElementTree.iterparse 增量解析格式规范的 RSS 2.0 和 Atom feed，
+逐条返回条目，不做 feedparser 的 HTML 清洗和相对链接处理。
+feed 按发布时间从新到旧排列时，遇到连续的已知条目可以提前停止，剩余的 XML 不再解析；
+无法确认顺序的 feed（从旧到新排列、缺少发布时间）会完整解析，跳过已知条目，避免漏掉后面的新条目。
+RSS 1.0、带 DOCTYPE、XHTML 内容、缺少标题或绝对链接等非常规情况抛出 UnsupportedFeedError，
+由调用方回退到 feedparser。
+"""
+import re
+from functools import lru_cache
+from io import BytesIO
+from xml.etree.ElementTree import iterparse, ParseError, XMLParser
+from src.core.utils.dates import parse_published, to_timestamp
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+DC_DATE = "{http://purl.org/dc/elements/1.1/}date"
+
+# 只检查文档开头是否声明了 DOCTYPE
+DOCTYPE_SNIFF_BYTES = 1024
+# XML 声明中的编码
+XML_ENCODING_PATTERN = re.compile(rb"""^\s*<\?xml[^>]*?encoding\s*=\s*["']([A-Za-z0-9._-]+)["']""")
+
+
+class UnsupportedFeedError(ValueError):
+    """快速解析器无法处理的 feed，需要回退到 feedparser"""
+
+
+@lru_cache(maxsize=64)
+def _expat_supports(encoding):
+    """expat 不支持 GB2312、GBK、Big5、Shift_JIS 等多字节编码，用一段最小的文档试解析"""
+    try:
+        XMLParser().feed(f'<?xml version="1.0" encoding="{encoding}"?><a/>'.encode("ascii"))
+        return True
+    except (ValueError, LookupError, ParseError):
+        return False
+
+
+def _check_encoding(content):
+    """XML 声明了 expat 无法解析的编码时交给 feedparser 处理"""
+    match = XML_ENCODING_PATTERN.match(content[:DOCTYPE_SNIFF_BYTES])
+    if match and not _expat_supports(match.group(1).decode("ascii").lower()):
+        raise UnsupportedFeedError(f"不支持的编码: {match.group(1).decode('ascii')}")
+
+
+def _published_ts(entry):
+    dt = parse_published(entry.get("published"))
+    return to_timestamp(dt) if dt else None
+
+
+def _text(elem):
+    return (elem.text or "").strip() if elem is not None else ""
+
+
+class FastFeedParser:
+    def __init__(self, content, stop_when=None, stop_after=1, newest_known_ts=None):
+        """
+        content: feed 的原始字节
+        stop_when: 可选，判断条目是否已知的函数，参数为条目字典
+        stop_after: 连续遇到多少条已知条目后停止解析
+        newest_known_ts: 该订阅源已存储条目中最新的发布时间戳，为 None 时不提前停止
+        只有发布时间不晚于上一条目、也不晚于 newest_known_ts 的已知条目才计入连续数，
+        保证停止位置之后都是更早的条目
+        """
+        self.content = content
+        self.stop_when = stop_when
+        self.stop_after = max(1, stop_after)
+        self.newest_known_ts = newest_known_ts
+        # 频道级信息，解析过程中填充
+        self.feed = {"title": None, "ttl": None, "version": None}
+        self.stopped_early = False
+
+    def entries(self):
+        """
+        逐条解析条目
+        返回: 生成器，每项为 {"title", "link", "summary", "content", "published"}
+        """
+        if b"<!DOCTYPE" in self.content[:DOCTYPE_SNIFF_BYTES]:
+            raise UnsupportedFeedError("feed 声明了 DOCTYPE")
+        _check_encoding(self.content)
+
+        known_streak = 0
+        previous_ts = None
+        parents = []
+        try:
+            for event, elem in iterparse(BytesIO(self.content), events=("start", "end")):
+                if event == "start":
+                    if self.feed["version"] is None:
+                        self._detect_version(elem)
+                    parents.append(elem)
+                    continue
+
+                parents.pop()
+                parent = parents[-1] if parents else None
+                if self.feed["version"] == "rss20":
+                    entry = self._handle_rss(elem, parent)
+                else:
+                    entry = self._handle_atom(elem, parent)
+                if entry is None:
+                    continue
+
+                # 条目处理完后立即从父节点移除，避免整棵树驻留内存
+                parent.remove(elem)
+
+                published_ts = _published_ts(entry) if self.stop_when else None
+                falling = (published_ts is not None and previous_ts is not None
+                           and published_ts <= previous_ts)
+                previous_ts = published_ts
+
+                if self.stop_when and self.stop_when(entry):
+                    # 已知条目不返回；只有确认按从新到旧排列时才计入连续数
+                    if (falling and self.newest_known_ts is not None
+                            and published_ts <= self.newest_known_ts):
+                        known_streak += 1
+                        if known_streak >= self.stop_after:
+                            self.stopped_early = True
+                            return
+                    else:
+                        known_streak = 0
+                    continue
+                known_streak = 0
+                yield entry
+        except UnsupportedFeedError:
+            raise
+        except ParseError as e:
+            raise UnsupportedFeedError(f"XML 解析失败: {e}")
+        except (ValueError, LookupError) as e:
+            # 声明检查未覆盖的编码问题，例如 expat 不支持的多字节编码
+            raise UnsupportedFeedError(f"XML 编码不支持: {e}")
+
+    def _detect_version(self, root):
+        if root.tag == "rss" and root.get("version", "2.0").startswith("2"):
+            self.feed["version"] = "rss20"
+        elif root.tag == ATOM_NS + "feed":
+            self.feed["version"] = "atom10"
+        else:
+            raise UnsupportedFeedError(f"不支持的根节点: {root.tag}")
+
+    def _handle_rss(self, elem, parent):
+        if parent is not None and parent.tag == "channel" and elem.tag == "title":
+            self.feed["title"] = _text(elem) or None
+            return None
+        if elem.tag == "ttl":
+            self.feed["ttl"] = _text(elem) or None
+            return None
+        if elem.tag != "item":
+            return None
+
+        title = _text(elem.find("title"))
+        link = _text(elem.find("link"))
+        guid = elem.find("guid")
+        if not link and guid is not None and guid.get("isPermaLink", "true") == "true":
+            link = _text(guid)
+        summary = _text(elem.find("description"))
+        content = _text(elem.find(CONTENT_ENCODED))
+        published = _text(elem.find("pubDate")) or _text(elem.find(DC_DATE))
+        return self._make_entry(title, link, summary, content, published, "text/html")
+
+    def _handle_atom(self, elem, parent):
+        if parent is not None and parent.tag == ATOM_NS + "feed" and elem.tag == ATOM_NS + "title":
+            self.feed["title"] = _text(elem) or None
+            return None
+        if elem.tag != ATOM_NS + "entry":
+            return None
+
+        title = _text(elem.find(ATOM_NS + "title"))
+        link = ""
+        for link_elem in elem.findall(ATOM_NS + "link"):
+            if link_elem.get("rel", "alternate") == "alternate":
+                link = (link_elem.get("href") or "").strip()
+                break
+
+        summary_elem = elem.find(ATOM_NS + "summary")
+        content_elem = elem.find(ATOM_NS + "content")
+        for text_elem in (summary_elem, content_elem):
+            if text_elem is not None and (text_elem.get("type") == "xhtml" or len(text_elem)):
+                raise UnsupportedFeedError("不支持 XHTML 内容")
+        content_type = "text/html" if content_elem is not None and content_elem.get("type") == "html" else "text/plain"
+        published = _text(elem.find(ATOM_NS + "published")) or _text(elem.find(ATOM_NS + "updated"))
+        return self._make_entry(title, link, _text(summary_elem), _text(content_elem), published, content_type)
+
+    @staticmethod
+    def _make_entry(title, link, summary, content, published, content_type):
+        if not title or not link.startswith(("http://", "https://")):
+            raise UnsupportedFeedError("条目缺少标题或绝对链接")
+        return {
+            "title": title,
+            "link": link,
+            "summary": summary or content,
+            # 与 feedparser 的 content 结构保持一致
+            "content": [{"type": content_type, "value": content}] if content else [],
+            "published": published or None,
+        }
@@ -0,0 +1,151 @@
+"""
+RSS feed 抓取客户端
+
+所有 feed 请求共用一个带连接池的 requests.Session：
+- 每个域名保持长连接，支持 gzip/deflate（安装 brotli 时支持 br）压缩
+- 连接和读取超时可配置
+- 流式读取响应体，超过字节上限时截断
+- 返回每次抓取的耗时和大小，读取到的字节交给解析器处理
+"""
+import logging
+import threading
+import time
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from src.core.utils.config import get_env_variable
+
+logger = logging.getLogger(__name__)
+
+# 连接和读取超时（秒）
+FETCH_CONNECT_TIMEOUT = float(get_env_variable("RSS_FETCH_CONNECT_TIMEOUT", "5"))
+FETCH_READ_TIMEOUT = float(get_env_variable("RSS_FETCH_READ_TIMEOUT", "20"))
+# 单个 feed 最多读取的字节数（解压后）
+FETCH_MAX_BYTES = int(get_env_variable("RSS_FETCH_MAX_BYTES", str(10 * 1024 * 1024)))
+# 连接池：缓存的域名连接池数量和每个域名的最大连接数
+FETCH_POOL_CONNECTIONS = int(get_env_variable("RSS_FETCH_POOL_CONNECTIONS", "64"))
+FETCH_POOL_MAXSIZE = int(get_env_variable("RSS_FETCH_POOL_MAXSIZE", "4"))
+# 是否校验证书，默认校验；只有使用自签名证书的订阅源需要设置为 False
+FETCH_VERIFY_SSL = get_env_variable("RSS_FETCH_VERIFY_SSL", "True") == "True"
+FETCH_USER_AGENT = get_env_variable("RSS_FETCH_USER_AGENT", "Mozilla/5.0 (compatible; RSS-AI/0.1)")
+
+try:
+    import brotli  # noqa: F401  安装后 urllib3 可以自动解压 br
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+if not FETCH_VERIFY_SSL:
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+class FeedFetcher:
+    def __init__(self,
+                 connect_timeout=FETCH_CONNECT_TIMEOUT,
+                 read_timeout=FETCH_READ_TIMEOUT,
+                 max_bytes=FETCH_MAX_BYTES):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_bytes = max_bytes
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=FETCH_POOL_CONNECTIONS, pool_maxsize=FETCH_POOL_MAXSIZE, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.verify = FETCH_VERIFY_SSL
+        self.session.headers.update({
+            "User-Agent": FETCH_USER_AGENT,
+            "Accept-Encoding": ACCEPT_ENCODING,
+            "Accept": "application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.8, */*;q=0.5",
+        })
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "fetches": 0,
+            "errors": 0,
+            "not_modified": 0,
+            "truncated": 0,
+            "wire_bytes": 0,
+            "body_bytes": 0,
+            "seconds": 0.0,
+        }
+
+    def fetch(self, url, etag=None, modified=None, max_bytes=None, timeout=None):
+        """
+        抓取 feed
+        url: feed 的URL
+        etag/modified: 上次响应的 ETag 和 Last-Modified，用于条件请求
+        max_bytes: 可选，覆盖默认的字节上限
+        timeout: 可选，覆盖默认的 (连接超时, 读取超时)
+        返回: {"url", "status", "headers", "content", "etag", "modified",
+               "elapsed", "ttfb", "wire_bytes", "bytes", "truncated"}
+        """
+        max_bytes = max_bytes or self.max_bytes
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+
+        start_time = time.perf_counter()
+        try:
+            with self.session.get(url, headers=headers, timeout=timeout or self.timeout, stream=True) as response:
+                ttfb = time.perf_counter() - start_time
+                chunks = []
+                size = 0
+                truncated = False
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunks.append(chunk)
+                    size += len(chunk)
+                    if size > max_bytes:
+                        truncated = True
+                        break
+                content = b"".join(chunks)[:max_bytes]
+                # 实际从网络读取的（压缩后）字节数
+                wire_bytes = response.raw.tell() or len(content)
+                response_headers = {key.lower(): value for key, value in response.headers.items()}
+                response_headers.setdefault("content-location", response.url)
+                status = response.status_code
+        except Exception:
+            with self._lock:
+                self._stats["fetches"] += 1
+                self._stats["errors"] += 1
+            raise
+
+        elapsed = time.perf_counter() - start_time
+        result = {
+            "url": url,
+            "status": status,
+            "headers": response_headers,
+            "content": content,
+            "etag": response_headers.get("etag"),
+            "modified": response_headers.get("last-modified"),
+            "elapsed": elapsed,
+            "ttfb": ttfb,
+            "wire_bytes": wire_bytes,
+            "bytes": len(content),
+            "truncated": truncated,
+        }
+
+        with self._lock:
+            self._stats["fetches"] += 1
+            self._stats["not_modified"] += int(status == 304)
+            self._stats["truncated"] += int(truncated)
+            self._stats["wire_bytes"] += wire_bytes
+            self._stats["body_bytes"] += len(content)
+            self._stats["seconds"] += elapsed
+
+        if truncated:
+            logger.warning(f"feed 超过 {max_bytes} 字节上限，已截断: {url}")
+        logger.info(f"抓取 {url}: status={status}, 大小={wire_bytes}字节, 首字节={ttfb:.2f}秒, 总耗时={elapsed:.2f}秒")
+        return result
+
+    def stats(self):
+        """返回累计的抓取次数、字节数和耗时"""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_seconds"] = round(stats["seconds"] / stats["fetches"], 3) if stats["fetches"] else None
+        return stats
+
+
+# 创建单例实例
+feed_fetcher = FeedFetcher()
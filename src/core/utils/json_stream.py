@@ -0,0 +1,71 @@
+"""
+增量 JSON 数组解析
+
+模型以流式方式输出 JSON 数组时，逐段喂入文本，
+每当数组中的一个对象闭合就立即解析返回，不需要等待完整输出。
+开头的 ```json 代码块标记等数组外的文本会被忽略，单个对象格式错误只丢弃该对象。
+"""
+import json
+
+
+class JSONArrayStreamParser:
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # 已解析的对象数和格式错误的对象数
+        self.parsed_count = 0
+        self.error_count = 0
+
+    def feed(self, chunk):
+        """
+        喂入一段文本
+        返回: 本段文本中闭合的对象列表
+        """
+        objects = []
+        for char in chunk:
+            if self._depth == 0:
+                # 数组外或对象之间的字符（[ , ] 空白、代码块标记）直接跳过
+                if char == '{':
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    obj = self._parse_buffer()
+                    if obj is not None:
+                        objects.append(obj)
+        return objects
+
+    def _parse_buffer(self):
+        text = ''.join(self._buffer)
+        self._buffer = []
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            self.error_count += 1
+            return None
+        self.parsed_count += 1
+        return obj
+
+    @property
+    def pending_text(self):
+        """流中断时尚未闭合的对象文本"""
+        return ''.join(self._buffer)
@@ -0,0 +1,92 @@
+"""
+SimHash 近似重复检测
+
+对标题和摘要计算 64 位 SimHash 指纹，内容相近的文章指纹的汉明距离很小。
+索引把指纹切成若干段分桶：距离不超过 max_distance 时，至少有一段完全相同（抽屉原理），
+只需和同桶的指纹比较，不用扫描全部条目。
+"""
+import hashlib
+import threading
+from src.core.utils.tokens import text_features
+
+SIMHASH_BITS = 64
+# 特征数少于该值的文本指纹不可靠，不参与近似重复检测
+MIN_FEATURES = 8
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text):
+    """
+    计算文本的 64 位 SimHash
+    返回: 整数指纹，特征太少时返回 None
+    """
+    features = text_features(text or "")
+    if len(features) < MIN_FEATURES:
+        return None
+
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = _feature_hash(feature)
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def to_hex(fingerprint):
+    """Chroma 元数据不支持无符号 64 位整数，以十六进制字符串存储"""
+    return format(fingerprint, "016x")
+
+
+def from_hex(value):
+    try:
+        return int(value, 16) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class SimHashIndex:
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        # 分段数比最大距离多一段，保证距离内的指纹至少有一段相同
+        self.bands = max_distance + 1
+        self.band_bits = SIMHASH_BITS // self.bands
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _band_keys(self, fingerprint):
+        mask = (1 << self.band_bits) - 1
+        return [(band, fingerprint >> (band * self.band_bits) & mask) for band in range(self.bands)]
+
+    def add(self, fingerprint, item):
+        """登记指纹，item 为指纹对应的条目标识"""
+        with self._lock:
+            for key in self._band_keys(fingerprint):
+                self._buckets.setdefault(key, {})[fingerprint] = item
+
+    def find(self, fingerprint):
+        """
+        查找最相近的已登记指纹
+        返回: (item, distance)，没有距离内的指纹时返回 (None, None)
+        """
+        best_item = None
+        best_distance = None
+        with self._lock:
+            for key in self._band_keys(fingerprint):
+                for candidate, item in self._buckets.get(key, {}).items():
+                    distance = hamming_distance(fingerprint, candidate)
+                    if distance <= self.max_distance and (best_distance is None or distance < best_distance):
+                        best_item = item
+                        best_distance = distance
+        return best_item, best_distance
@@ -0,0 +1,32 @@
+"""
+Token 估算工具
+"""
+import math
+import re
+
+# 中日韩字符及全角符号
+CJK_PATTERN = re.compile(r'[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def estimate_tokens(text):
+    """
+    粗略估算文本的 token 数
+    中日韩字符按每字 1 个 token 计算，其余字符按每 4 个字符 1 个 token 计算
+    """
+    if not text:
+        return 0
+    cjk_count = len(CJK_PATTERN.findall(text))
+    return cjk_count + math.ceil((len(text) - cjk_count) / 4)
+
+
+def text_features(text):
+    """
+    把文本切分成用于相似度计算的特征
+    英文等按单词，中日韩文字按相邻两字切分
+    """
+    text = text.lower()
+    features = WORD_PATTERN.findall(text)
+    cjk = CJK_PATTERN.findall(text)
+    features.extend(cjk[i] + cjk[i + 1] for i in range(len(cjk) - 1))
+    return features
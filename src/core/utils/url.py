@@ -0,0 +1,64 @@
+"""
+URL 相关工具函数
+"""
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 各协议的默认端口，规范化时去掉
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# 广告点击和营销活动的跟踪参数，规范化文章链接时去掉
+# 只列出确定与内容无关的参数，ref、source、from 等通用名称可能是文章地址的一部分，保留不动
+TRACKING_PARAM_PREFIXES = ("utm_",)
+TRACKING_PARAMS = {
+    # 广告平台的点击 ID
+    "fbclid", "gclid", "gbraid", "wbraid", "dclid", "msclkid", "yclid", "twclid", "igshid", "ttclid",
+    # 邮件营销
+    "mc_cid", "mc_eid", "mkt_tok", "_hsenc", "_hsmi",
+    # Matomo/Piwik 营销活动
+    "pk_campaign", "pk_kwd", "pk_source", "pk_medium", "pk_content",
+    # 百度统计
+    "hmsr", "hmpl", "hmcu", "hmkw", "hmci",
+}
+
+
+def normalize_link(link):
+    """
+    规范化链接，使同一篇文章的不同写法得到相同结果
+    - scheme 和 host 转小写
+    - 去掉默认端口和 fragment
+    - 去掉路径末尾的斜杠
+    """
+    if not link:
+        return ""
+    link = link.strip()
+    try:
+        parts = urlsplit(link)
+    except ValueError:
+        return link
+
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if parts.port and DEFAULT_PORTS.get(scheme) == parts.port:
+        netloc = netloc.rsplit(":", 1)[0]
+    path = parts.path.rstrip("/") or ""
+    return urlunsplit((scheme, netloc, path, parts.query, ""))
+
+
+def canonical_link(link):
+    """
+    生成文章的规范链接，用于跨订阅源识别同一篇文章
+    在 normalize_link 的基础上去掉 utm_* 等点击和营销跟踪参数，其余参数按名称排序
+    """
+    link = normalize_link(link)
+    try:
+        parts = urlsplit(link)
+    except ValueError:
+        return link
+    if not parts.query:
+        return link
+
+    params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(sorted(params)), ""))
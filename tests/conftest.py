@@ -0,0 +1,54 @@
+import importlib
+import sys
+import types
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def rss_module():
+    """
+    导入 RSS 抓取模块，存储层替换为 Mock
+    模块导入时会创建 RSSStorage 并连接 Chroma 和 MongoDB，测试中不需要真实连接
+    """
+    storage_module = types.ModuleType("src.core.storage.rss_storage")
+    storage_module.RSSStorage = mock.MagicMock
+    connections_module = types.ModuleType("src.core.storage.connections")
+    connections_module.connections = mock.MagicMock()
+    fakes = {
+        "src.core.storage.rss_storage": storage_module,
+        "src.core.storage.connections": connections_module,
+    }
+    originals = {name: sys.modules.get(name) for name in list(fakes) + ["src.core.models.rss"]}
+    sys.modules.update(fakes)
+    sys.modules.pop("src.core.models.rss", None)
+    try:
+        yield importlib.import_module("src.core.models.rss")
+    finally:
+        for name, module in originals.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+@pytest.fixture(scope="session")
+def rss_storage_module():
+    """
+    导入存储模块，连接注册表替换为 Mock，不连接 Chroma 和 MongoDB
+    """
+    connections_module = types.ModuleType("src.core.storage.connections")
+    connections_module.connections = mock.MagicMock()
+    names = ["src.core.storage.connections", "src.core.storage.rss_storage"]
+    originals = {name: sys.modules.get(name) for name in names}
+    sys.modules["src.core.storage.connections"] = connections_module
+    sys.modules.pop("src.core.storage.rss_storage", None)
+    try:
+        yield importlib.import_module("src.core.storage.rss_storage")
+    finally:
+        for name, module in originals.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
@@ -0,0 +1,48 @@
+import pytest
+
+from src.core.utils.dates import normalize_published, published_from_timestamp, day_range_to_ts, parse_published
+
+
+def test_offset_time_is_converted_to_utc():
+    # 北京时间 5 月 17 日凌晨，UTC 仍是 5 月 16 日
+    assert normalize_published("Sat, 17 May 2025 01:30:00 +0800") == {
+        "published": "2025-05-16T17:30:00Z",
+        "published_ts": 1747416600,
+        "published_day": "2025-05-16",
+    }
+
+
+def test_iso_with_offset_and_z_suffix():
+    assert normalize_published("2025-05-16T23:30:00-05:00")["published"] == "2025-05-17T04:30:00Z"
+    assert normalize_published("2025-05-16T00:05:44Z") == {
+        "published": "2025-05-16T00:05:44Z",
+        "published_ts": 1747353944,
+        "published_day": "2025-05-16",
+    }
+
+
+def test_naive_time_is_treated_as_utc():
+    assert normalize_published("2025-05-16 08:00:00")["published"] == "2025-05-16T08:00:00Z"
+    assert normalize_published("2025-05-16")["published_day"] == "2025-05-16"
+
+
+@pytest.mark.parametrize("value", [None, "", "not a date"])
+def test_unparseable_values(value):
+    assert normalize_published(value) == {"published": value or "", "published_ts": 0, "published_day": ""}
+
+
+def test_published_day_matches_day_range():
+    published = normalize_published("Sat, 17 May 2025 07:59:59 +0800")
+    start_ts, end_ts = day_range_to_ts(published["published_day"], published["published_day"])
+    assert start_ts <= published["published_ts"] <= end_ts
+
+
+def test_day_range_to_ts():
+    assert day_range_to_ts("2025-05-16", "2025-05-16") == (1747353600, 1747439999)
+    assert day_range_to_ts() == (None, None)
+
+
+def test_published_from_timestamp_round_trip():
+    fields = published_from_timestamp(1747416600)
+    assert fields["published_day"] == "2025-05-16"
+    assert parse_published(fields["published"]).timestamp() == 1747416600
@@ -0,0 +1,67 @@
+from unittest import mock
+
+from src.core.storage.dedup_index import FeedDedupIndex
+from src.core.utils.simhash import simhash, to_hex
+
+SUMMARY = (
+    "The project released a new version with vector search, faster replication, "
+    "a rewritten query planner and better tooling for analytical workloads on large clusters."
+)
+
+
+class FakeCollection:
+    name = "feeds"
+
+    def get(self, **kwargs):
+        return {"metadatas": []}
+
+
+def make_storage(rss_storage_module):
+    storage = rss_storage_module.RSSStorage.__new__(rss_storage_module.RSSStorage)
+    storage.dedup_index = FeedDedupIndex(FakeCollection())
+    storage.dedup_index._warmed = True
+    storage.mongo_storage = mock.MagicMock()
+    title = "Database release adds vector search"
+    storage.dedup_index.add({
+        "title": title,
+        "link": "https://a.example.com/release",
+        "source": "https://a.example.com/feed",
+        "simhash": to_hex(simhash(f"{title} {SUMMARY}")),
+    })
+    return storage
+
+
+def test_feed_id_keeps_query_params(rss_storage_module):
+    feed_id = rss_storage_module.RSSStorage.feed_id
+    assert feed_id("https://example.com/p?id=1") != feed_id("https://example.com/p?id=2")
+    assert feed_id("https://Example.com/p/") == feed_id("https://example.com/p")
+    # 主键不使用去掉跟踪参数的规范链接
+    assert feed_id("https://example.com/p?utm_source=x") != feed_id("https://example.com/p")
+
+
+def test_tracking_variant_is_filtered(rss_storage_module):
+    storage = make_storage(rss_storage_module)
+    variant = {
+        "title": "Another title",
+        "link": "https://a.example.com/release?utm_source=rss",
+        "source": "https://b.example.com/feed",
+    }
+    assert storage.filter_new_feeds([variant]) == []
+
+
+def test_near_duplicate_is_recorded_once(rss_storage_module):
+    storage = make_storage(rss_storage_module)
+    repost = {
+        "title": "Database release adds vector search",
+        "link": "https://b.example.com/2024/release",
+        "source": "https://b.example.com/feed",
+        "summary": SUMMARY,
+    }
+    assert storage.filter_new_feeds([dict(repost)]) == []
+    storage.mongo_storage.record_feed_duplicates.assert_called_once()
+
+    # 再次抓取到同一条目时按链接直接过滤，不会重新计算指纹和记录
+    storage.mongo_storage.record_feed_duplicates.reset_mock()
+    assert storage.filter_new_feeds([dict(repost, link=repost["link"] + "?utm_medium=feed")]) == []
+    storage.mongo_storage.record_feed_duplicates.assert_not_called()
+    assert storage.dedup_index.stats()["near_duplicates"] == 1
@@ -0,0 +1,145 @@
+from pathlib import Path
+
+import feedparser
+import pytest
+
+from src.core.utils.fast_feed import FastFeedParser, UnsupportedFeedError
+
+FIXTURES = Path(__file__).resolve().parent.parent / "tools" / "fixtures" / "feeds"
+
+GB2312_FEED = """<?xml version="1.0" encoding="gb2312"?>
+<rss version="2.0">
+  <channel>
+    <title>中文新闻</title>
+    <item>
+      <title>国内新闻标题</title>
+      <link>https://news.example.cn/1.html</link>
+      <description>这是一条使用 GB2312 编码的新闻摘要</description>
+      <pubDate>Fri, 16 May 2025 17:07:00 +0800</pubDate>
+    </item>
+  </channel>
+</rss>
+""".encode("gb2312")
+
+
+def read_fixture(name):
+    return (FIXTURES / name).read_bytes()
+
+
+def test_parses_rss2_entries_and_channel_info():
+    parser = FastFeedParser(read_fixture("rss2.xml"))
+    entries = list(parser.entries())
+
+    assert len(entries) == 3
+    assert parser.feed["version"] == "rss20"
+    assert parser.feed["title"] == "示例博客"
+    assert parser.feed["ttl"] == "60"
+    assert all(entry["link"].startswith("https://") for entry in entries)
+
+
+def test_parses_atom_entries():
+    parser = FastFeedParser(read_fixture("atom.xml"))
+    entries = list(parser.entries())
+
+    assert len(entries) == 2
+    assert parser.feed["version"] == "atom10"
+
+
+def test_rss1_is_unsupported():
+    with pytest.raises(UnsupportedFeedError):
+        list(FastFeedParser(read_fixture("rss1.rdf")).entries())
+
+
+def make_feed(items):
+    """items: [(链接序号, 发布时间)]，按给定顺序生成 RSS 2.0"""
+    body = "".join(
+        f"<item><title>第 {index} 篇</title><link>https://example.com/posts/{index}</link>"
+        f"<pubDate>{published}</pubDate></item>"
+        for index, published in items
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>t</title>{body}</channel></rss>'.encode("utf-8")
+
+
+def day(n):
+    return f"Mon, {n:02d} Sep 2024 10:00:00 GMT"
+
+
+NEWEST_KNOWN_TS = 1725962400  # 2024-09-10 10:00:00 UTC
+
+
+def known_links(*indexes):
+    links = {f"https://example.com/posts/{index}" for index in indexes}
+    return lambda entry: entry["link"] in links
+
+
+def test_stops_after_known_entries():
+    known = {entry["link"] for entry in FastFeedParser(read_fixture("rss2.xml")).entries()}
+    parser = FastFeedParser(
+        read_fixture("rss2.xml"), stop_when=lambda entry: entry["link"] in known, stop_after=1,
+        newest_known_ts=NEWEST_KNOWN_TS * 2,
+    )
+
+    assert list(parser.entries()) == []
+    assert parser.stopped_early
+
+
+def test_newest_first_feed_stops_at_known_entries():
+    # 新条目在前，已知条目按时间递减
+    content = make_feed([(6, day(12)), (5, day(11)), (3, day(10)), (2, day(9)), (1, day(8)), (0, day(7))])
+    parser = FastFeedParser(content, stop_when=known_links(3, 2, 1, 0), stop_after=3, newest_known_ts=NEWEST_KNOWN_TS)
+
+    assert [entry["link"] for entry in parser.entries()] == ["https://example.com/posts/6", "https://example.com/posts/5"]
+    assert parser.stopped_early
+
+
+def test_oldest_first_feed_is_parsed_to_the_end():
+    # 旧条目在前，前三条已存储，后面三条是新条目
+    content = make_feed([(0, day(7)), (1, day(8)), (2, day(9)), (3, day(11)), (4, day(12)), (5, day(13))])
+    parser = FastFeedParser(content, stop_when=known_links(0, 1, 2), stop_after=3, newest_known_ts=NEWEST_KNOWN_TS)
+
+    assert [entry["link"] for entry in parser.entries()] == [f"https://example.com/posts/{index}" for index in (3, 4, 5)]
+    assert not parser.stopped_early
+
+
+def test_no_early_stop_without_stored_entries_or_dates():
+    content = make_feed([(2, day(9)), (1, day(8)), (0, day(7)), (9, day(1))])
+    parser = FastFeedParser(content, stop_when=known_links(2, 1, 0), stop_after=2)
+    assert [entry["link"] for entry in parser.entries()] == ["https://example.com/posts/9"]
+    assert not parser.stopped_early
+
+    undated = make_feed([(2, ""), (1, ""), (0, ""), (9, "")])
+    parser = FastFeedParser(undated, stop_when=known_links(2, 1, 0), stop_after=2, newest_known_ts=NEWEST_KNOWN_TS)
+    assert [entry["link"] for entry in parser.entries()] == ["https://example.com/posts/9"]
+    assert not parser.stopped_early
+
+
+def test_known_entries_newer_than_stored_do_not_stop():
+    # 已知条目的发布时间晚于该源已存储的最新条目，说明来自其他订阅源，不能据此判断位置
+    content = make_feed([(3, day(14)), (2, day(13)), (1, day(12)), (9, day(11))])
+    parser = FastFeedParser(content, stop_when=known_links(3, 2, 1), stop_after=2, newest_known_ts=NEWEST_KNOWN_TS)
+    assert [entry["link"] for entry in parser.entries()] == ["https://example.com/posts/9"]
+
+
+def test_multibyte_encoding_is_unsupported_and_feedparser_can_parse_it():
+    with pytest.raises(UnsupportedFeedError):
+        list(FastFeedParser(GB2312_FEED).entries())
+
+    # 回退路径：feedparser 能正确解析同一份内容
+    feed = feedparser.parse(GB2312_FEED)
+    assert feed.entries[0].title == "国内新闻标题"
+
+
+@pytest.mark.parametrize("encoding", ["gbk", "big5", "shift_jis"])
+def test_other_multibyte_encodings_are_unsupported(encoding):
+    content = f'<?xml version="1.0" encoding="{encoding}"?><rss version="2.0"><channel></channel></rss>'.encode("ascii")
+    with pytest.raises(UnsupportedFeedError):
+        list(FastFeedParser(content).entries())
+
+
+def test_single_byte_declared_encoding_is_parsed():
+    content = (
+        '<?xml version="1.0" encoding="windows-1252"?><rss version="2.0"><channel>'
+        '<item><title>Caf\xe9</title><link>https://example.com/a</link></item></channel></rss>'
+    ).encode("cp1252")
+    entries = list(FastFeedParser(content).entries())
+    assert entries[0]["title"] == "Café"
@@ -0,0 +1,144 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from bson import ObjectId
+
+
+def make_source(url):
+    return {"_id": ObjectId(), "url": url}
+
+
+def entry(url, index):
+    return {"title": f"{url} {index}", "link": f"{url}/{index}", "source": url}
+
+
+@pytest.fixture
+def two_sources(rss_module, monkeypatch):
+    sources = [make_source("https://a.example.com"), make_source("https://b.example.com")]
+    fetched = {source["url"]: [entry(source["url"], i) for i in range(2)] for source in sources}
+
+    def fake_collect(url, source=None, fetch_info=None):
+        fetch_info.update({"status": 200, "etag": f'"{url}"', "modified": None})
+        return fetched[url]
+
+    monkeypatch.setattr(rss_module, "collect_new_entries", fake_collect)
+    monkeypatch.setattr(rss_module.source_health, "allow", lambda source: True)
+    monkeypatch.setattr(rss_module.source_health, "record_success", lambda *args: None)
+    monkeypatch.setattr(rss_module.source_health, "record_failure", lambda *args: None)
+    rss_module.rss_storage.mongo_storage.save_rss_validators.reset_mock()
+    return sources
+
+
+def test_storage_failure_only_affects_failing_source(rss_module, monkeypatch, two_sources):
+    def fake_summarize(entries):
+        if any(item["source"] == "https://b.example.com" for item in entries):
+            raise RuntimeError("chroma upsert failed")
+        return entries
+
+    monkeypatch.setattr(rss_module, "summarize_entries", fake_summarize)
+
+    entries, fetch_infos, errors = rss_module.ingest_sources(two_sources)
+
+    assert len(entries["https://a.example.com"]) == 2
+    assert "https://a.example.com" not in errors
+    assert "chroma upsert failed" in errors["https://b.example.com"]
+    assert set(fetch_infos) == {"https://a.example.com", "https://b.example.com"}
+
+
+def test_all_sources_summarized_together(rss_module, monkeypatch, two_sources):
+    calls = []
+
+    def fake_summarize(entries):
+        calls.append(len(entries))
+        return entries
+
+    monkeypatch.setattr(rss_module, "summarize_entries", fake_summarize)
+
+    entries, _, errors = rss_module.ingest_sources(two_sources)
+
+    assert calls == [4]
+    assert errors == {}
+    assert all(len(items) == 2 for items in entries.values())
+
+
+def test_validators_saved_only_for_stored_sources(rss_module, monkeypatch, two_sources):
+    def fake_summarize(entries):
+        if any(item["source"] == "https://b.example.com" for item in entries):
+            raise RuntimeError("mongo write failed")
+        return entries
+
+    monkeypatch.setattr(rss_module, "summarize_entries", fake_summarize)
+
+    rss_module.ingest_sources(two_sources)
+
+    save = rss_module.rss_storage.mongo_storage.save_rss_validators
+    save.assert_called_once_with(two_sources[0]["_id"], '"https://a.example.com"', None)
+
+
+def test_validators_not_saved_when_summarization_raises(rss_module, monkeypatch):
+    source = make_source("https://c.example.com")
+    rss_module.rss_storage.mongo_storage.save_rss_validators.reset_mock()
+
+    def fake_collect(url, source=None, fetch_info=None):
+        fetch_info.update({"status": 200, "etag": '"v2"', "modified": None})
+        return [entry(url, 0)]
+
+    def failing_summarize(entries):
+        raise RuntimeError("model unavailable")
+
+    monkeypatch.setattr(rss_module, "collect_new_entries", fake_collect)
+    monkeypatch.setattr(rss_module, "summarize_entries", failing_summarize)
+
+    with pytest.raises(RuntimeError):
+        rss_module.parse_rss(source["url"], source)
+    rss_module.rss_storage.mongo_storage.save_rss_validators.assert_not_called()
+
+
+def test_failed_fetch_keeps_retry_after(rss_module, monkeypatch, two_sources):
+    def fake_collect(url, source=None, fetch_info=None):
+        if url == "https://b.example.com":
+            fetch_info.update({"status": 503, "retry_after": "7200"})
+            raise ValueError("RSS源抓取失败: status=503")
+        fetch_info.update({"status": 200})
+        return [entry(url, 0)]
+
+    monkeypatch.setattr(rss_module, "collect_new_entries", fake_collect)
+    monkeypatch.setattr(rss_module, "summarize_entries", lambda entries: entries)
+
+    _, fetch_infos, errors = rss_module.ingest_sources(two_sources)
+
+    assert "https://b.example.com" in errors
+    assert fetch_infos["https://b.example.com"]["retry_after"] == "7200"
+    assert fetch_infos["https://a.example.com"]["new_count"] == 1
+
+
+def streamed(entries):
+    text = json.dumps([{"link": e["link"], "AITitle": e["title"], "AISummary": "摘要"} for e in entries])
+    return [text[i:i + 40] for i in range(0, len(text), 40)]
+
+
+def test_streamed_summaries_stored_in_groups(rss_module, monkeypatch):
+    entries = [entry("https://a.example.com", index) for index in range(5)]
+    monkeypatch.setattr(rss_module.aiChat, "stream_response", lambda prompt: iter(streamed(entries)))
+    monkeypatch.setattr(rss_module, "SUMMARY_STREAM_STORE_SIZE", 2)
+    storage = rss_module.rss_storage
+    storage.store_feeds.reset_mock()
+    storage.store_feed.reset_mock()
+    storage.check_has_feed.reset_mock()
+
+    ai_data = rss_module._summarize_batch_streaming(entries, {e["link"]: e for e in entries})
+
+    assert len(ai_data) == 5
+    assert [len(call.args[0]) for call in storage.store_feeds.call_args_list] == [2, 2, 1]
+    storage.store_feed.assert_not_called()
+    storage.check_has_feed.assert_not_called()
+
+
+def test_streamed_storage_failure_is_not_swallowed(rss_module, monkeypatch):
+    entries = [entry("https://a.example.com", index) for index in range(2)]
+    monkeypatch.setattr(rss_module.aiChat, "stream_response", lambda prompt: iter(streamed(entries)))
+    monkeypatch.setattr(rss_module.rss_storage, "store_feeds", MagicMock(side_effect=RuntimeError("chroma down")))
+
+    with pytest.raises(RuntimeError):
+        rss_module._summarize_batch_streaming(entries, {e["link"]: e for e in entries})
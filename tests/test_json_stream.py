@@ -0,0 +1,37 @@
+from src.core.utils.json_stream import JSONArrayStreamParser
+
+
+def feed_all(parser, chunks):
+    objects = []
+    for chunk in chunks:
+        objects.extend(parser.feed(chunk))
+    return objects
+
+
+def test_objects_are_returned_as_soon_as_they_close():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('```json\n[{"a": 1}, {"b"') == [{"a": 1}]
+    assert parser.feed(': [2, {"c": 3}]}') == [{"b": [2, {"c": 3}]}]
+    assert parser.feed(']\n```') == []
+    assert parser.parsed_count == 2
+
+
+def test_braces_and_escapes_inside_strings():
+    parser = JSONArrayStreamParser()
+    text = '[{"AITitle": "a } b { c", "AISummary": "quote \\" and ] bracket"}]'
+    # 逐字符喂入，模拟最细粒度的流式输出
+    assert feed_all(parser, text) == [{"AITitle": "a } b { c", "AISummary": 'quote " and ] bracket'}]
+
+
+def test_malformed_object_is_dropped():
+    parser = JSONArrayStreamParser()
+    objects = parser.feed('[{"a": 1,}, {"b": 2}]')
+    assert objects == [{"b": 2}]
+    assert parser.error_count == 1
+    assert parser.parsed_count == 1
+
+
+def test_pending_text_after_interrupted_stream():
+    parser = JSONArrayStreamParser()
+    parser.feed('[{"a": 1}, {"b": "unfinish')
+    assert parser.pending_text == '{"b": "unfinish'
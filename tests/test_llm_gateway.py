@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import types
+
+import pytest
+
+from src.core.models import llm_gateway as gateway_module
+from src.core.models.llm_gateway import TokenBucket, LaneScheduler, INTERACTIVE, BATCH
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # 只替换网关模块里的 time，asyncio 仍使用真实时钟
+    monkeypatch.setattr(gateway_module, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_token_bucket_reserve_allows_debt(clock):
+    bucket = TokenBucket(60)
+    assert bucket.reserve(60) == 0.0
+    # 每秒补充 1 个令牌，预支 3 个需要等待 3 秒
+    assert bucket.reserve(3) == pytest.approx(3.0)
+    clock[0] += 3
+    assert bucket.reserve(1) == pytest.approx(1.0)
+
+
+def test_token_bucket_take_keeps_floor(clock):
+    bucket = TokenBucket(60)
+    assert bucket.take(50, floor=10) == 0.0
+    # 余额 10，扣减后会低于 floor，不取并返回等待时间
+    assert bucket.take(5, floor=10) == pytest.approx(5.0)
+    clock[0] += 5
+    assert bucket.take(5, floor=10) == 0.0
+
+
+def test_token_bucket_refund_is_capped(clock):
+    bucket = TokenBucket(60)
+    bucket.reserve(10)
+    bucket.refund(100)
+    assert bucket.take(60) == 0.0
+
+
+def test_batch_leaves_reserved_slots_for_interactive(clock):
+    scheduler = LaneScheduler(total=3, reserved=1, idle_seconds=60)
+    scheduler.acquire(BATCH)
+    scheduler.acquire(BATCH)
+    assert not scheduler._can_run(BATCH)
+    assert scheduler._can_run(INTERACTIVE)
+    scheduler.acquire(INTERACTIVE)
+    assert not scheduler._can_run(INTERACTIVE)
+
+
+def test_batch_borrows_reserved_slots_when_interactive_is_idle(clock):
+    scheduler = LaneScheduler(total=4, reserved=2, idle_seconds=60)
+    scheduler.acquire(BATCH)
+    scheduler.acquire(BATCH)
+    assert not scheduler._can_run(BATCH)
+    clock[0] += 60
+    scheduler.acquire(BATCH)
+    # 始终为交互通道留出一个名额
+    assert not scheduler._can_run(BATCH)
+    assert scheduler._can_run(INTERACTIVE)
+
+
+def test_queued_interactive_blocks_batch(clock):
+    scheduler = LaneScheduler(total=2, reserved=0, idle_seconds=60)
+    scheduler.acquire(BATCH)
+    scheduler.acquire(BATCH)
+
+    interactive_started = threading.Event()
+
+    def wait_interactive():
+        scheduler.acquire(INTERACTIVE)
+        interactive_started.set()
+
+    thread = threading.Thread(target=wait_interactive)
+    thread.start()
+    for _ in range(100):
+        if scheduler.stats()[INTERACTIVE]["queued"]:
+            break
+        threading.Event().wait(0.01)
+
+    scheduler.release(BATCH)
+    # 释放的名额先给排队的交互请求，批处理让行
+    assert interactive_started.wait(5)
+    assert not scheduler._can_run(BATCH)
+    thread.join()
+
+
+def test_acquire_async(clock):
+    scheduler = LaneScheduler(total=1, reserved=0, idle_seconds=60)
+
+    async def run():
+        await scheduler.acquire_async(BATCH)
+        waiter = asyncio.ensure_future(scheduler.acquire_async(INTERACTIVE))
+        await asyncio.sleep(0.1)
+        assert not waiter.done()
+        scheduler.release(BATCH)
+        await asyncio.wait_for(waiter, 5)
+
+    asyncio.run(run())
+    assert scheduler.stats()[INTERACTIVE]["active"] == 1
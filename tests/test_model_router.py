@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from src.core.models import model_router as router_module
+
+
+def provider(delay, chunks=("a", "b"), error=None):
+    async def stream(messages):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        for chunk in chunks:
+            yield chunk
+
+    return {"stream": stream, "api_key": None}
+
+
+@pytest.fixture
+def make_router(monkeypatch):
+    monkeypatch.setattr(router_module, "LLM_HEDGE_DELAY", 0.1)
+    monkeypatch.setattr(router_module, "LLM_HEDGE_MIN_DELAY", 0.01)
+
+    def make(providers, hedge_providers):
+        monkeypatch.setattr(router_module, "PROVIDERS", providers)
+        return router_module.ModelRouter(hedge_providers=hedge_providers, hedge_enabled=True)
+
+    return make
+
+
+def collect(router, provider_name):
+    async def run():
+        return [chunk async for chunk in router.stream(provider_name, [])]
+
+    return asyncio.run(run())
+
+
+def test_fast_primary_is_not_hedged(make_router):
+    router = make_router({"slow": provider(0.01, ("x",)), "backup": provider(0.01)}, ["backup"])
+    assert collect(router, "slow") == ["x"]
+    stats = router.stats()
+    assert stats["slow"]["wins"] == 1
+    assert stats["backup"]["started"] == 0
+
+
+def test_slow_primary_is_hedged_and_records_lower_bound(make_router):
+    router = make_router({"slow": provider(1, ("x",)), "backup": provider(0.01, ("y", "z"))}, ["backup"])
+    assert collect(router, "slow") == ["y", "z"]
+
+    stats = router.stats()
+    assert stats["backup"]["hedges"] == 1
+    assert stats["backup"]["wins"] == 1
+    assert stats["slow"]["cancelled"] == 1
+    # 取消时已等待的时间作为下限样本，至少是对冲阈值
+    assert stats["slow"]["ttft_p50"] >= 0.1
+
+
+def test_backup_cancelled_right_after_start_is_not_sampled(make_router):
+    router = make_router({"slow": provider(0.13, ("x",)), "backup": provider(1)}, ["backup"])
+    assert collect(router, "slow") == ["x"]
+    stats = router.stats()
+    assert stats["backup"]["started"] == 1
+    assert stats["backup"]["cancelled"] == 0
+    assert stats["backup"]["ttft_p50"] is None
+
+
+def test_failed_primary_falls_back(make_router):
+    router = make_router(
+        {"broken": provider(0, error=RuntimeError("boom")), "backup": provider(0.01, ("y",))}, ["backup"]
+    )
+    assert collect(router, "broken") == ["y"]
+    assert router.stats()["broken"]["failures"] == 1
+
+
+def test_all_failures_raise_last_error(make_router):
+    router = make_router({"broken": provider(0, error=RuntimeError("boom"))}, [])
+    with pytest.raises(RuntimeError, match="boom"):
+        collect(router, "broken")
+
+
+def test_threshold_adapts_to_samples(make_router, monkeypatch):
+    monkeypatch.setattr(router_module, "LLM_HEDGE_FACTOR", 2)
+    router = make_router({"slow": provider(0)}, [])
+    assert router.threshold("slow") == 0.1
+    for ttft in [0.1, 0.2, 0.3, 0.4, 0.5]:
+        router._record("slow", "wins", ttft=ttft)
+    assert router.threshold("slow") == pytest.approx(1.0)
@@ -0,0 +1,75 @@
+import threading
+from unittest import mock
+
+from bson import ObjectId
+
+from src.core.models.opml import OPMLImporter, parse_opml
+
+OPML = b"""<?xml version="1.0"?>
+<opml version="2.0"><body>
+  <outline text="Tech">
+    <outline type="rss" text="A" xmlUrl="https://a.example.com/feed"/>
+    <outline type="rss" title="B" xmlUrl=" https://b.example.com/rss "/>
+  </outline>
+  <outline text="no feed url"/>
+</body></opml>"""
+
+
+def test_parse_opml():
+    assert parse_opml(OPML) == [
+        {"url": "https://a.example.com/feed", "name": "A"},
+        {"url": "https://b.example.com/rss", "name": "B"},
+    ]
+
+
+def make_importer(monkeypatch, run):
+    importer = OPMLImporter(mock.MagicMock())
+    job_id = str(ObjectId())
+    monkeypatch.setattr(importer, "create_job", lambda content: job_id)
+    monkeypatch.setattr(importer, "run", run)
+    return importer, job_id
+
+
+def test_start_import_returns_before_run_finishes(monkeypatch):
+    release = threading.Event()
+    finished = threading.Event()
+
+    def slow_run(job_id):
+        release.wait(5)
+        finished.set()
+
+    importer, job_id = make_importer(monkeypatch, slow_run)
+
+    assert importer.start_import(OPML) == job_id
+    assert not finished.is_set()
+    # 同一任务正在执行时不会再启动一个线程
+    assert importer.start_import(job_id=job_id) == job_id
+
+    release.set()
+    assert finished.wait(5)
+
+
+def test_failed_import_marks_job_failed(monkeypatch):
+    done = threading.Event()
+
+    def failing_run(job_id):
+        done.set()
+        raise RuntimeError("probe crashed")
+
+    importer, job_id = make_importer(monkeypatch, failing_run)
+    importer.start_import(OPML)
+    assert done.wait(5)
+
+    for _ in range(100):
+        if job_id not in importer._running:
+            break
+        threading.Event().wait(0.01)
+    update = importer.jobs.update_one.call_args[0][1]["$set"]
+    assert update["status"] == "failed"
+    assert update["error"] == "probe crashed"
+
+
+def test_resume_unknown_job(monkeypatch):
+    importer, _ = make_importer(monkeypatch, lambda job_id: None)
+    importer.jobs.find_one.return_value = None
+    assert importer.start_import(job_id=str(ObjectId())) is None
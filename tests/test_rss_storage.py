@@ -0,0 +1,133 @@
+from datetime import datetime
+from unittest import mock
+
+from src.core.storage.date_histogram import DateHistogram
+from src.core.storage.feed_catalog import FeedCatalog
+
+
+class FakeChroma:
+    def __init__(self, ids):
+        self.ids = list(ids)
+
+    def get(self, include=None, limit=None, offset=0, **kwargs):
+        return {"ids": self.ids[offset:offset + limit]}
+
+    def delete(self, ids):
+        self.ids = [doc_id for doc_id in self.ids if doc_id not in ids]
+
+
+def make_storage(rss_storage_module, ids):
+    storage = rss_storage_module.RSSStorage.__new__(rss_storage_module.RSSStorage)
+    storage.collection = FakeChroma(ids)
+    storage.mongo_storage = mock.MagicMock()
+    storage.feed_catalog = mock.MagicMock()
+    storage.feed_catalog.get_many.return_value = []
+    storage.feed_catalog.count_by_day.return_value = []
+    storage.date_histogram = mock.MagicMock()
+    return storage
+
+
+def test_clear_feeds_removes_derived_data(rss_storage_module):
+    storage = make_storage(rss_storage_module, [f"feed_{index}" for index in range(5)])
+
+    assert storage.clear_feeds(batch_size=2) == 5
+
+    assert storage.collection.ids == []
+    assert storage.feed_catalog.delete.call_count == 3
+    storage.feed_catalog.clear.assert_called_once()
+    storage.date_histogram.rebuild.assert_called_once_with([])
+    storage.mongo_storage.clear_feed_records.assert_called_once()
+
+
+def make_histogram(rows):
+    collection = mock.MagicMock()
+    collection.find.return_value = rows
+    histogram = DateHistogram(collection, ttl=3600)
+    histogram._load()
+    return histogram
+
+
+def test_delete_feeds_decrements_histogram(rss_storage_module):
+    storage = make_storage(rss_storage_module, ["feed_1", "feed_2"])
+    storage.date_histogram = make_histogram([{"_id": "2024-03-20", "count": 2, "sources": {"s1": 2}}])
+    storage.feed_catalog.delete.return_value = 1
+    storage.feed_catalog.get_many.return_value = [{"published_day": "2024-03-20", "source_id": "s1"}]
+
+    assert storage.delete_feeds(["feed_1"]) == 1
+
+    operation = storage.date_histogram.collection.bulk_write.call_args[0][0][0]
+    assert operation._doc == {"$inc": {"count": -1, "sources.s1": -1}}
+    assert storage.date_histogram.dates() == [{"date": "2024-03-20", "count": 1}]
+    assert storage.date_histogram.dates("s1") == [{"date": "2024-03-20", "count": 1}]
+    assert storage.collection.ids == ["feed_2"]
+
+    storage.delete_feeds(["feed_2"])
+
+    assert storage.date_histogram.dates() == []
+    storage.date_histogram.collection.delete_many.assert_called_with({"count": {"$lte": 0}})
+
+
+def test_delete_feeds_ignores_empty_ids(rss_storage_module):
+    storage = make_storage(rss_storage_module, ["feed_1"])
+    assert storage.delete_feeds([]) == 0
+    storage.feed_catalog.delete.assert_not_called()
+
+
+def test_feeds_stored_between_reads_catalog_by_write_time(rss_storage_module):
+    storage = make_storage(rss_storage_module, [])
+    storage.feed_catalog = FeedCatalog.__new__(FeedCatalog)
+    storage.feed_catalog.collection = mock.MagicMock()
+    cursor = storage.feed_catalog.collection.find.return_value.sort.return_value.limit
+    cursor.return_value = [{"_id": "feed_1", "title": "t", "link": "l", "source": "s", "created_at": 1}]
+    since, until = datetime(2024, 3, 20, 8), datetime(2024, 3, 21, 8)
+
+    feeds = storage.get_feeds_stored_between(since, until)
+
+    assert feeds == [{"title": "t", "link": "l", "source": "s"}]
+    storage.feed_catalog.collection.find.assert_called_once_with({"created_at": {"$gt": since, "$lte": until}})
+    cursor.assert_called_once_with(1000)
+
+    storage.get_feeds_stored_between(None, until, limit=10)
+    storage.feed_catalog.collection.find.assert_called_with({"created_at": {"$lte": until}})
+
+
+def test_migrate_published_metadata_moves_local_days_to_utc(rss_storage_module):
+    storage = make_storage(rss_storage_module, [])
+    metadatas = [
+        # 旧版本按 +08:00 保存的本地时间和日期
+        {"published": "2025-05-17T01:30:00Z", "published_ts": 1747416600, "published_day": "2025-05-17", "source": "s"},
+        {"published": "2025-05-16T17:30:00Z", "published_ts": 1747416600, "published_day": "2025-05-16", "source": "s"},
+        {"published": "Fri, 16 May 2025 17:07:00 +0800", "source": "s"},
+    ]
+    storage.collection = mock.MagicMock()
+    storage.collection.get.return_value = {"ids": ["feed_1", "feed_2", "feed_3"], "metadatas": metadatas}
+    storage.mongo_storage.get_rss_source_ids.return_value = {"s": "source_1"}
+
+    assert storage.migrate_published_metadata() == 2
+
+    update = storage.collection.update.call_args.kwargs
+    assert update["ids"] == ["feed_1", "feed_3"]
+    assert [(m["published"], m["published_day"]) for m in update["metadatas"]] == [
+        ("2025-05-16T17:30:00Z", "2025-05-16"),
+        ("2025-05-16T09:07:00Z", "2025-05-16"),
+    ]
+    storage.feed_catalog.upsert.assert_called_once_with(
+        ["feed_1", "feed_3"], update["metadatas"], {"s": "source_1"}, backfill=True
+    )
+    storage.date_histogram.rebuild.assert_called_once()
+
+
+def test_backfilled_catalog_entries_keep_their_publish_time():
+    catalog = FeedCatalog.__new__(FeedCatalog)
+    catalog.collection = mock.MagicMock()
+    catalog.collection.bulk_write.return_value.upserted_ids = {}
+    metadata = {"title": "t", "link": "l", "published_ts": 1747416600}
+
+    catalog.upsert(["feed_1"], [metadata], backfill=True)
+    backfilled = catalog.collection.bulk_write.call_args[0][0][0]._doc["$setOnInsert"]["created_at"]
+    assert backfilled == datetime.fromtimestamp(1747416600)
+
+    before = datetime.now()
+    catalog.upsert(["feed_2"], [metadata])
+    stored = catalog.collection.bulk_write.call_args[0][0][0]._doc["$setOnInsert"]["created_at"]
+    assert stored >= before
@@ -0,0 +1,129 @@
+import sys
+import types
+from datetime import datetime
+from unittest import mock
+
+from bson import ObjectId
+
+# 调度器模块在导入时引用 RSS 抓取模块的单例，测试中用空模块代替，避免连接 Chroma 和 MongoDB
+with mock.patch.dict(sys.modules, {
+    "src.core.models.rss": types.SimpleNamespace(rss_storage=None, ingest_sources=None),
+}):
+    from src.core.models import scheduler
+    from src.core.models.scheduler import FeedScheduler, compute_schedule, parse_retry_after
+
+
+class FakeMongoStorage:
+    def __init__(self, sources):
+        self.sources = sources
+        self.rss_sources = mock.Mock()
+
+    def get_all_rss_urls(self):
+        return [dict(source) for source in self.sources]
+
+
+def make_sources(count, now):
+    return [
+        {
+            "_id": ObjectId(),
+            "url": f"https://feed{i}.example.com/rss",
+            "schedule": {"next_fetch_at": datetime.fromtimestamp(now - 10), "interval": 1000},
+        }
+        for i in range(count)
+    ]
+
+
+def make_scheduler(sources, ingest):
+    storage = types.SimpleNamespace(mongo_storage=FakeMongoStorage(sources))
+    return FeedScheduler(storage=storage, ingest=ingest)
+
+
+def test_failed_fetch_backs_off():
+    schedule = compute_schedule({"interval": 1000}, 10_000, failed=True)
+    assert schedule["interval"] == 1000 * scheduler.BACKOFF_FACTOR
+    assert "last_fetch_at" not in schedule
+
+
+def test_interval_follows_publish_rate_and_ttl():
+    last = {"interval": 1000, "last_fetch_at": datetime.fromtimestamp(10_000)}
+    schedule = compute_schedule(last, 10_000 + 3600, new_count=4)
+    # 每小时 4 条，目标每次 2 条，约半小时抓一次
+    assert abs(schedule["interval"] - 1800) < 1
+
+    schedule = compute_schedule(last, 10_000 + 3600, new_count=4, ttl="120")
+    assert schedule["interval"] == 7200
+
+
+def test_retry_after_delays_next_fetch():
+    assert parse_retry_after("120", 0) == 120
+    assert parse_retry_after("invalid", 0) is None
+    schedule = compute_schedule({}, 10_000, retry_after="99999")
+    assert schedule["next_fetch_at"].timestamp() == 10_000 + 99999
+
+
+def test_sources_are_rescheduled_when_ingest_raises(monkeypatch):
+    now = 1_700_000_000
+    monkeypatch.setattr(scheduler.time, "time", lambda: now)
+    sources = make_sources(3, now)
+
+    def failing_ingest(due):
+        raise RuntimeError("chroma unavailable")
+
+    feed_scheduler = make_scheduler(sources, failing_ingest)
+    feed_scheduler.reload()
+    # reload 会把逾期的源随机打散，这里让它们全部到期
+    for source in feed_scheduler._sources.values():
+        source["schedule"]["next_fetch_at"] = datetime.fromtimestamp(now - 1)
+    feed_scheduler._heap = [(now - 1, source_id) for source_id in feed_scheduler._sources]
+
+    assert feed_scheduler.run_once() == 3
+
+    queued = {source_id for _, source_id in feed_scheduler._heap}
+    assert queued == {str(source["_id"]) for source in sources}
+    for source in feed_scheduler._sources.values():
+        assert source["schedule"]["interval"] == 1000 * scheduler.BACKOFF_FACTOR
+        assert source["schedule"]["next_fetch_at"].timestamp() > now
+    feed_scheduler.storage.mongo_storage.rss_sources.bulk_write.assert_called_once()
+
+
+def make_due_scheduler(sources, ingest, now):
+    feed_scheduler = make_scheduler(sources, ingest)
+    feed_scheduler.reload()
+    for source in feed_scheduler._sources.values():
+        source["schedule"]["next_fetch_at"] = datetime.fromtimestamp(now - 1)
+    feed_scheduler._heap = [(now - 1, source_id) for source_id in feed_scheduler._sources]
+    return feed_scheduler
+
+
+def test_failed_fetch_honours_retry_after(monkeypatch):
+    now = 1_700_000_000
+    monkeypatch.setattr(scheduler.time, "time", lambda: now)
+    sources = make_sources(1, now)
+    url = sources[0]["url"]
+
+    def ingest(due):
+        return {}, {url: {"status": 503, "retry_after": "7200"}}, {url: "RSS源抓取失败: status=503"}
+
+    feed_scheduler = make_due_scheduler(sources, ingest, now)
+    feed_scheduler.run_once()
+
+    schedule = next(iter(feed_scheduler._sources.values()))["schedule"]
+    assert schedule["interval"] == 1000 * scheduler.BACKOFF_FACTOR
+    assert schedule["next_fetch_at"].timestamp() == now + 7200
+
+
+def test_longer_retry_after_wins_over_open_breaker(monkeypatch):
+    now = 1_700_000_000
+    monkeypatch.setattr(scheduler.time, "time", lambda: now)
+    sources = make_sources(1, now)
+    url = sources[0]["url"]
+    sources[0]["health"] = {"open_until": datetime.fromtimestamp(now + 600)}
+
+    def ingest(due):
+        return {}, {url: {"retry_after": "7200"}}, {url: "429"}
+
+    feed_scheduler = make_due_scheduler(sources, ingest, now)
+    feed_scheduler.run_once()
+
+    schedule = next(iter(feed_scheduler._sources.values()))["schedule"]
+    assert schedule["next_fetch_at"].timestamp() == now + 7200
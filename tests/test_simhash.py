@@ -0,0 +1,51 @@
+from src.core.utils.simhash import SimHashIndex, simhash, hamming_distance, to_hex, from_hex
+
+ARTICLE = (
+    "Open source database release adds vector search, faster replication "
+    "and a new query planner for analytical workloads across large clusters"
+)
+
+
+def test_similar_texts_have_close_fingerprints():
+    original = simhash(ARTICLE)
+    reposted = simhash(ARTICLE + " today")
+    unrelated = simhash("Local football club wins the regional cup after a dramatic penalty shootout in the rain")
+    assert hamming_distance(original, reposted) < hamming_distance(original, unrelated)
+
+
+def test_short_text_has_no_fingerprint():
+    assert simhash("too short") is None
+    assert simhash("") is None
+
+
+def test_hex_round_trip():
+    fingerprint = simhash(ARTICLE)
+    assert from_hex(to_hex(fingerprint)) == fingerprint
+    assert from_hex(None) is None
+    assert from_hex("not-hex") is None
+
+
+def test_index_finds_fingerprints_within_distance():
+    index = SimHashIndex(max_distance=3)
+    base = 0x0123456789ABCDEF
+    index.add(base, "a")
+    # 三位不同，分布在不同的段
+    near = base ^ (1 << 0) ^ (1 << 20) ^ (1 << 40)
+    assert index.find(near) == ("a", 3)
+    assert index.find(base) == ("a", 0)
+
+
+def test_index_ignores_fingerprints_beyond_distance():
+    index = SimHashIndex(max_distance=3)
+    base = 0x0123456789ABCDEF
+    index.add(base, "a")
+    far = base ^ 0b1111
+    assert index.find(far) == (None, None)
+
+
+def test_index_returns_closest_match():
+    index = SimHashIndex(max_distance=3)
+    base = 0x0F0F0F0F0F0F0F0F
+    index.add(base ^ 0b111, "far")
+    index.add(base ^ 0b1, "near")
+    assert index.find(base) == ("near", 1)
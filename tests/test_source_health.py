@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from src.core.models import source_health as health_module
+from src.core.models.source_health import SourceHealthTracker, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+
+def make_tracker():
+    return SourceHealthTracker(mock.MagicMock())
+
+
+def fail(tracker, source, times):
+    for _ in range(times):
+        tracker.record_failure(source, RuntimeError("timeout"), 1.5)
+
+
+def test_breaker_opens_after_threshold():
+    tracker = make_tracker()
+    source = {"_id": "s1", "url": "https://a.example.com/feed"}
+
+    fail(tracker, source, health_module.BREAKER_FAILURE_THRESHOLD - 1)
+    assert source["health"]["breaker_state"] == STATE_CLOSED
+    assert tracker.allow(source)
+
+    fail(tracker, source, 1)
+    health = source["health"]
+    assert health["breaker_state"] == STATE_OPEN
+    assert health["last_error"] == "timeout"
+    assert not tracker.allow(source)
+    tracker.mongo_storage.update_rss_source_health.assert_called_with("s1", health)
+
+
+def test_half_open_after_backoff_and_close_on_success():
+    tracker = make_tracker()
+    source = {"_id": "s1", "url": "https://a.example.com/feed"}
+    fail(tracker, source, health_module.BREAKER_FAILURE_THRESHOLD)
+
+    later = source["health"]["open_until"] + timedelta(seconds=1)
+    assert tracker.allow(source, now=later)
+    assert source["health"]["breaker_state"] == STATE_HALF_OPEN
+
+    tracker.record_success(source, 0.3)
+    assert source["health"]["breaker_state"] == STATE_CLOSED
+    assert source["health"]["consecutive_failures"] == 0
+    assert tracker.allow(source)
+
+
+def test_failed_probe_reopens_with_doubled_backoff():
+    tracker = make_tracker()
+    source = {"_id": "s1", "url": "https://a.example.com/feed"}
+    fail(tracker, source, health_module.BREAKER_FAILURE_THRESHOLD)
+    first_backoff = source["health"]["open_until"] - source["health"]["last_failure_at"]
+
+    tracker.allow(source, now=source["health"]["open_until"])
+    fail(tracker, source, 1)
+
+    health = source["health"]
+    assert health["breaker_state"] == STATE_OPEN
+    assert health["open_until"] - health["last_failure_at"] == first_backoff * 2
+
+
+def test_half_open_failure_below_threshold_opens():
+    tracker = make_tracker()
+    source = {"url": "https://a.example.com/feed", "health": {"breaker_state": STATE_HALF_OPEN}}
+    fail(tracker, source, 1)
+    assert source["health"]["breaker_state"] == STATE_OPEN
+    # 没有 _id 的订阅源只更新内存
+    tracker.mongo_storage.update_rss_source_health.assert_not_called()
+
+
+def test_backoff_is_capped(monkeypatch):
+    monkeypatch.setattr(health_module, "BREAKER_MAX_BACKOFF", 1800)
+    tracker = make_tracker()
+    source = {"_id": "s1", "url": "https://a.example.com/feed"}
+    fail(tracker, source, health_module.BREAKER_FAILURE_THRESHOLD + 5)
+    health = source["health"]
+    assert health["open_until"] - health["last_failure_at"] == timedelta(seconds=1800)
+    assert not tracker.allow(source, now=datetime.now())
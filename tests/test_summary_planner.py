@@ -0,0 +1,45 @@
+from src.core.models.summary_planner import plan_summary_batches, estimate_entry_tokens
+
+
+def entry(index, size=10, source="a"):
+    return {"title": f"title {index}", "link": f"https://{source}.example.com/{index}",
+            "summary": "word " * size, "source": source}
+
+
+def test_small_entries_from_different_sources_share_a_batch():
+    entries = [entry(0, source="a"), entry(1, source="b"), entry(2, source="c")]
+    assert plan_summary_batches(entries, input_budget=10000, output_budget=10000) == [entries]
+
+
+def test_batches_respect_max_items():
+    entries = [entry(index) for index in range(5)]
+    batches = plan_summary_batches(entries, input_budget=10000, output_budget=10000, max_items=2)
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [item for batch in batches for item in batch] == entries
+
+
+def test_batches_respect_token_budgets():
+    entries = [entry(index, size=50) for index in range(6)]
+    input_tokens, output_tokens = estimate_entry_tokens(entries[0])
+
+    by_input = plan_summary_batches(entries, input_budget=input_tokens * 2, output_budget=10 ** 6)
+    assert [len(batch) for batch in by_input] == [2, 2, 2]
+
+    by_output = plan_summary_batches(entries, input_budget=10 ** 6, output_budget=output_tokens * 3)
+    assert [len(batch) for batch in by_output] == [3, 3]
+
+
+def test_oversized_entry_gets_its_own_batch():
+    entries = [entry(0), entry(1, size=5000), entry(2)]
+    batches = plan_summary_batches(entries, input_budget=500, output_budget=10 ** 6)
+    assert batches == [[entries[0]], [entries[1]], [entries[2]]]
+
+
+def test_output_estimate_is_capped():
+    _, small = estimate_entry_tokens(entry(0, size=10))
+    _, large = estimate_entry_tokens(entry(0, size=5000))
+    assert small < large <= 400 + 20 + 20
+
+
+def test_no_entries():
+    assert plan_summary_batches([]) == []
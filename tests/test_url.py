@@ -0,0 +1,28 @@
+import pytest
+
+from src.core.utils.url import normalize_link, canonical_link
+
+
+def test_normalize_link():
+    assert normalize_link(" HTTPS://Example.COM:443/post/1/#comments ") == "https://example.com/post/1"
+    assert normalize_link("http://example.com:8080/a?b=1") == "http://example.com:8080/a?b=1"
+    assert normalize_link("") == ""
+
+
+def test_canonical_link_strips_click_and_campaign_trackers():
+    link = "https://example.com/post?utm_source=rss&id=7&fbclid=abc&utm_medium=feed&gclid=x&mc_cid=1"
+    assert canonical_link(link) == "https://example.com/post?id=7"
+
+
+def test_canonical_link_sorts_remaining_params():
+    assert canonical_link("https://example.com/p?b=2&a=1") == canonical_link("https://example.com/p?a=1&b=2")
+
+
+@pytest.mark.parametrize("param", ["ref", "source", "from", "feature", "share_token", "sharesource", "spm", "pk_id"])
+def test_canonical_link_keeps_generic_params(param):
+    # 通用名称的参数可能决定文章内容，不能当作跟踪参数去掉
+    assert canonical_link(f"https://example.com/p?{param}=1") == f"https://example.com/p?{param}=1"
+
+
+def test_canonical_link_without_query():
+    assert canonical_link("https://Example.com/p/") == "https://example.com/p"
@@ -0,0 +1,108 @@
+"""
+feed 解析基准测试
+
+对比 feedparser 与快速解析器在录制的 feed 样本上的吞吐量和峰值内存，
+并用样本条目生成一个包含大量 HTML 正文的大 feed 模拟大型订阅源。
+用法: python tools/bench_feed_parser.py [大feed条目数]
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import feedparser
+from src.core.utils.fast_feed import FastFeedParser, UnsupportedFeedError
+from src.core.utils.dates import parse_published, to_timestamp
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'feeds')
+
+LARGE_ITEM = """    <item>
+      <title>第 {index} 篇文章</title>
+      <link>https://bench.example.com/posts/{index}</link>
+      <pubDate>Mon, 07 Oct 2024 10:00:00 +0800</pubDate>
+      <description><![CDATA[<p>第 {index} 篇文章的摘要。</p>]]></description>
+      <content:encoded><![CDATA[{body}]]></content:encoded>
+    </item>
+"""
+
+
+def load_fixtures():
+    fixtures = {}
+    for name in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            fixtures[name] = f.read()
+    return fixtures
+
+
+def build_large_feed(count):
+    """生成包含 count 个条目、每条带完整 HTML 正文的 RSS 2.0 feed"""
+    body = "".join(
+        f"<h2>小节 {i}</h2><p>这是一段用于基准测试的正文，<a href=\"https://bench.example.com/{i}\">链接</a>。</p>"
+        for i in range(40)
+    )
+    items = "".join(LARGE_ITEM.format(index=index, body=body) for index in range(count))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/">\n'
+        '  <channel>\n    <title>基准测试</title>\n    <link>https://bench.example.com/</link>\n'
+        f'{items}  </channel>\n</rss>\n'
+    ).encode('utf-8')
+
+
+def parse_feedparser(content):
+    return len(feedparser.parse(content).entries)
+
+
+def parse_fast(content, stop_when=None, newest_known_ts=None):
+    try:
+        return len(list(FastFeedParser(content, stop_when=stop_when, stop_after=3, newest_known_ts=newest_known_ts).entries()))
+    except UnsupportedFeedError:
+        # 与抓取流程一致，不支持的格式回退到 feedparser
+        return parse_feedparser(content)
+
+
+def measure(func, content, runs):
+    seconds = timeit.timeit(lambda: func(content), number=runs) / runs
+    tracemalloc.start()
+    count = func(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count, seconds, peak
+
+
+def report(name, content, runs):
+    print(f"\n{name} ({len(content) / 1024:.1f} KB)")
+    for label, func in [("feedparser", parse_feedparser), ("快速解析", parse_fast)]:
+        count, seconds, peak = measure(func, content, runs)
+        print(
+            f"  {label:<10} 条目 {count:>5}  每次 {seconds * 1000:8.2f} ms  "
+            f"{len(content) / 1024 / 1024 / seconds:7.1f} MB/s  峰值内存 {peak / 1024:8.1f} KB"
+        )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    runs = 5
+    print(f"每项运行 {runs} 次取平均")
+
+    for name, content in load_fixtures().items():
+        report(name, content, runs)
+
+    large = build_large_feed(count)
+    report(f"生成的大 feed: {count} 条", large, runs)
+
+    # 增量抓取：只有最新的 5 条是新条目，之后的链接都已存储
+    known_after = 5
+    stop_when = lambda entry: int(entry['link'].rsplit('/', 1)[1]) >= known_after
+    # 生成的条目发布时间相同，已存储的最新条目也是这个时间
+    newest_known_ts = to_timestamp(parse_published("Mon, 07 Oct 2024 10:00:00 +0800"))
+    count_new, seconds, peak = measure(lambda content: parse_fast(content, stop_when, newest_known_ts), large, runs)
+    print(
+        f"  {'快速+提前停止':<10} 条目 {count_new:>5}  每次 {seconds * 1000:8.2f} ms  "
+        f"峰值内存 {peak / 1024:8.1f} KB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+发布时间处理的微基准测试
+
+对比旧的逐条 strptime 尝试与抓取时规范化后直接读取 published_ts 的耗时
+用法: python tools/bench_published_dates.py [条目数]
+"""
+import os
+import sys
+import timeit
+from datetime import datetime
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.utils.dates import normalize_published
+
+SAMPLES = [
+    'Fri, 16 May 2025 17:07:00 +0800',
+    '2025-05-16T00:05:44Z',
+    '2025-05-16 10:00:00',
+    '2025-05-16',
+]
+
+
+def legacy_parse(published):
+    """旧的日期解析方式"""
+    try:
+        return datetime.strptime(published, '%a, %d %b %Y %H:%M:%S %z')
+    except ValueError:
+        try:
+            return datetime.strptime(published, '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            try:
+                return datetime.strptime(published, '%Y-%m-%d')
+            except ValueError:
+                return datetime.strptime(published, '%Y-%m-%dT%H:%M:%SZ')
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    raw = [{'published': SAMPLES[i % len(SAMPLES)]} for i in range(count)]
+    normalized = [normalize_published(item['published']) for item in raw]
+
+    def legacy_sort():
+        sorted(raw, key=lambda item: legacy_parse(item['published']).timestamp(), reverse=True)
+
+    def legacy_filter():
+        [item for item in raw if legacy_parse(item['published']).strftime('%Y-%m-%d') == '2025-05-16']
+
+    def normalized_sort():
+        sorted(normalized, key=lambda item: item['published_ts'], reverse=True)
+
+    def normalized_filter():
+        [item for item in normalized if item['published_day'] == '2025-05-16']
+
+    def ingest_normalize():
+        [normalize_published(item['published']) for item in raw]
+
+    runs = 5
+    print(f"条目数: {count}，每项运行 {runs} 次取平均")
+    for name, func in [
+        ("旧方式 排序", legacy_sort),
+        ("旧方式 按日期过滤", legacy_filter),
+        ("新方式 排序(published_ts)", normalized_sort),
+        ("新方式 按日期过滤(published_day)", normalized_filter),
+        ("新方式 抓取时规范化(一次性)", ingest_normalize),
+    ]:
+        seconds = timeit.timeit(func, number=runs) / runs
+        print(f"{name}: {seconds * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,9 @@ import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import chromadb
-from src.core.utils.config import get_env_variable
+from src.core.storage.rss_storage import RSSStorage
 
-CHROMA_COLLECTION_NAME = get_env_variable("CHROMA_COLLECTION_NAME")
-CHROMA_HOST = get_env_variable("CHROMA_HOST")
-CHROMA_PORT = get_env_variable("CHROMA_PORT")
-
-client = chromadb.HttpClient(
-    host=CHROMA_HOST,
-    port=CHROMA_PORT
-)
-
-client.delete_collection(CHROMA_COLLECTION_NAME)
-print(f"Chroma集合已清空")
+# 删除 Chroma 中的全部条目，并同步清空 Mongo 中的条目目录、日期统计、摘要缓存和重新摘要队列
+storage = RSSStorage()
+deleted = storage.clear_feeds()
+print(f"已清空 {deleted} 条数据，请重启服务以清除进程内的去重索引和摘要缓存")
@@ -0,0 +1,42 @@
+"""
+通过 OPML 批量导入RSS订阅源
+用法:
+    python tools/import_opml.py subscriptions.opml
+    python tools/import_opml.py --resume <job_id>
+"""
+import os
+import sys
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.storage.mongodb_storage import MongoDBStorage
+from src.core.models.opml import OPMLImporter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="通过 OPML 批量导入RSS订阅源")
+    parser.add_argument("path", nargs="?", help="OPML 文件路径")
+    parser.add_argument("--resume", help="继续之前中断的导入任务")
+    args = parser.parse_args()
+
+    if not args.path and not args.resume:
+        parser.error("需要提供 OPML 文件路径或 --resume <job_id>")
+
+    importer = OPMLImporter(MongoDBStorage())
+    if args.resume:
+        report = importer.import_opml(job_id=args.resume)
+    else:
+        with open(args.path, "rb") as file:
+            job_id = importer.create_job(file.read())
+        # 先输出 job_id，中断后可以用 --resume 继续
+        print(f"导入任务: {job_id}")
+        report = importer.run(job_id)
+
+    print(f"导入完成: {report['summary']}")
+    for feed in report["feeds"]:
+        if feed["status"] == "invalid":
+            print(f"  无效: {feed['url']} {feed.get('error')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.storage.rss_storage import RSSStorage
+
+# 从 Chroma 补齐 Mongo 中的条目目录，可重复执行
+storage = RSSStorage()
+synced = storage.sync_feed_catalog()
+print(f"同步完成，共 {synced} 条数据")
@@ -0,0 +1,10 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.storage.rss_storage import RSSStorage
+
+# 一次性迁移：为旧数据补充 published_ts 和 published_day，并统一为 UTC 日期
+storage = RSSStorage()
+updated = storage.migrate_published_metadata()
+print(f"迁移完成，更新了 {updated} 条数据")
@@ -0,0 +1,10 @@
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.core.storage.rss_storage import RSSStorage
+
+# 按条目目录重新统计每天的条目数量，修正与实际存储的偏差
+storage = RSSStorage()
+days = storage.rebuild_date_histogram()
+print(f"重建完成，共 {days} 天有数据")